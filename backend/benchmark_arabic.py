@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for ArabicTextProcessor normalization on real party names.
+
+Usage:
+    python benchmark_arabic.py [path/to/legal_cases.db] [--repeat N]
+
+Without a path the benchmark reads the newest legal_cases.db* file in ../database.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import timeit
+
+from utils.arabic import ArabicTextProcessor
+
+# Previous implementation: generator to drop diacritics, then one str.replace per mapping
+LEGACY_DIACRITICS = 'ًٌٍَُِّْ'
+LEGACY_MAPPINGS = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا',
+    'ة': 'ه',
+    'ي': 'ى', 'ى': 'ي',
+    'ؤ': 'و',
+    'ئ': 'ي',
+}
+
+def legacy_normalize(text):
+    if not text:
+        return ""
+    normalized = ''.join(char for char in text if char not in LEGACY_DIACRITICS)
+    for original, replacement in LEGACY_MAPPINGS.items():
+        normalized = normalized.replace(original, replacement)
+    return normalized.lower().strip()
+
+def default_database() -> str:
+    database_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database')
+    path = os.path.join(database_dir, 'legal_cases.db')
+    if not os.path.exists(path):
+        sys.exit("No legal_cases.db found; pass a database path")
+    return path
+
+def load_names(db_path: str) -> list:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT plaintiff, defendant, case_number FROM cases").fetchall()
+    finally:
+        conn.close()
+    return [value for row in rows for value in row if value]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", nargs="?", default=None)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = args.database or default_database()
+    names = load_names(db_path)
+    print(f"Corpus: {len(names)} values from {db_path}")
+
+    candidates = {
+        "legacy (generator + replace)": lambda: [legacy_normalize(name) for name in names],
+        "normalize_text (translate)": lambda: [ArabicTextProcessor.normalize_text(name) for name in names],
+        "normalize_many (batch)": lambda: list(ArabicTextProcessor.normalize_many(names)),
+    }
+
+    baseline = None
+    for label, func in candidates.items():
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        per_item_us = best / len(names) * 1_000_000
+        baseline = baseline or best
+        print(f"{label:32} {best * 1000:8.2f} ms  {per_item_us:6.2f} us/value  x{baseline / best:.1f}")
+
+    changed = sum(1 for name in names if legacy_normalize(name) != ArabicTextProcessor.normalize_text(name))
+    print(f"Values normalized differently from legacy (wider tashkeel/tatweel coverage): {changed}")
+
+if __name__ == "__main__":
+    main()
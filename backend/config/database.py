@@ -1,12 +1,371 @@
 import sqlite3
 import os
+import re
+import queue
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
+from functools import partial
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional
 from .settings import settings
+from utils.arabic import ArabicTextProcessor
+
+logger = logging.getLogger(__name__)
+
+# Text columns that get a pre-normalized "<column>_norm" shadow column for Arabic search
+NORMALIZED_SEARCH_COLUMNS = {
+    "cases": ("case_number", "plaintiff", "defendant"),
+}
+
+# Composite indexes behind keyset pagination of listings ordered by (created_at, id).
+# Session dates are stored in more than one text format ("2025-01-15 10:00:00",
+# "2025-01-15T10:00:00", date only), so the calendar orders and seeks by datetime(session_date).
+LISTING_INDEXES = {
+    "cases": ("idx_cases_created_at_id", "created_at, id"),
+    "case_notes": ("idx_case_notes_case_created_at_id", "case_id, created_at, id"),
+    "case_sessions": ("idx_case_sessions_session_at", "datetime(session_date)"),
+    "phone_directory": ("idx_phone_directory_created_at_id", "created_at, id"),
+}
+
+# Trigram FTS5 indexes over normalized text: source table -> (FTS table, indexed columns).
+# Each FTS row uses the source row id as its rowid.
+FULL_TEXT_INDEXES = {
+    "cases": ("cases_fts", ("case_number", "plaintiff", "defendant")),
+    "case_notes": ("case_notes_fts", ("note_text",)),
+    "case_sessions": ("case_sessions_fts", ("session_notes",)),
+}
+
+# Dashboard statistics materialized as stats_counters (metric, key) -> value and
+# stats_monthly (month) -> cases created, plus per-case session/note aggregates stored on
+# the case row (CASE_AGGREGATE_COLUMNS), all kept current by triggers on the source tables.
+# Bump STATISTICS_VERSION when the triggers change; they are then recreated and the counts rebuilt.
+STATISTICS_VERSION = 3
+
+CASE_AGGREGATE_COLUMNS = {
+    "sessions_count": "INTEGER NOT NULL DEFAULT 0",
+    "notes_count": "INTEGER NOT NULL DEFAULT 0",
+    "latest_session_date": "TEXT",
+}
+
+def _count_change(metric: str, key: str, delta: str) -> str:
+    return (
+        f"INSERT INTO stats_counters (metric, key, value) VALUES ('{metric}', {key}, {delta}) "
+        "ON CONFLICT (metric, key) DO UPDATE SET value = value + excluded.value;"
+    )
+
+def _month_change(row: str, delta: str) -> str:
+    month = f"strftime('%Y-%m', {row}.created_at)"
+    return (
+        f"INSERT INTO stats_monthly (month, count) SELECT {month}, {delta} WHERE {month} IS NOT NULL "
+        "ON CONFLICT (month) DO UPDATE SET count = count + excluded.count;"
+    )
+
+def _latest_session(case_id: str) -> str:
+    # Order by datetime() rather than MAX(): session dates are stored in mixed text formats
+    return (
+        f"(SELECT session_date FROM case_sessions WHERE case_id = {case_id} "
+        "ORDER BY datetime(session_date) DESC LIMIT 1)"
+    )
+
+def _case_sessions_change(row: str, delta: str) -> str:
+    return (
+        f"UPDATE cases SET sessions_count = sessions_count + {delta}, "
+        f"latest_session_date = {_latest_session(f'{row}.case_id')} WHERE id = {row}.case_id;"
+    )
+
+def _case_notes_change(row: str, delta: str) -> str:
+    return f"UPDATE cases SET notes_count = notes_count + {delta} WHERE id = {row}.case_id;"
+
+STATISTICS_TRIGGERS = {
+    "cases_stats_insert": ("AFTER INSERT ON cases", (
+        _count_change("total", "'cases'", "1"),
+        _count_change("judgment", "NEW.judgment_type", "1"),
+        _count_change("case_type", "NEW.case_type_id", "1"),
+        _month_change("NEW", "1"),
+    )),
+    "cases_stats_delete": ("AFTER DELETE ON cases", (
+        _count_change("total", "'cases'", "-1"),
+        _count_change("judgment", "OLD.judgment_type", "-1"),
+        _count_change("case_type", "OLD.case_type_id", "-1"),
+        _month_change("OLD", "-1"),
+    )),
+    "cases_stats_update": ("AFTER UPDATE OF judgment_type, case_type_id, created_at ON cases", (
+        _count_change("judgment", "OLD.judgment_type", "-1"),
+        _count_change("judgment", "NEW.judgment_type", "1"),
+        _count_change("case_type", "OLD.case_type_id", "-1"),
+        _count_change("case_type", "NEW.case_type_id", "1"),
+        _month_change("OLD", "-1"),
+        _month_change("NEW", "1"),
+    )),
+    "case_types_stats_insert": ("AFTER INSERT ON case_types", (_count_change("total", "'case_types'", "1"),)),
+    "case_types_stats_delete": ("AFTER DELETE ON case_types", (_count_change("total", "'case_types'", "-1"),)),
+    "case_sessions_stats_insert": ("AFTER INSERT ON case_sessions", (
+        _count_change("total", "'case_sessions'", "1"),
+        # A new session can only move the latest date forward, so no per-case lookup is needed
+        "UPDATE cases SET sessions_count = sessions_count + 1, latest_session_date = CASE "
+        "WHEN latest_session_date IS NULL OR datetime(NEW.session_date) > datetime(latest_session_date) "
+        "THEN NEW.session_date "
+        "ELSE latest_session_date END WHERE id = NEW.case_id;",
+    )),
+    "case_sessions_stats_delete": ("AFTER DELETE ON case_sessions", (
+        _count_change("total", "'case_sessions'", "-1"),
+        _case_sessions_change("OLD", "-1"),
+    )),
+    "case_sessions_stats_update": ("AFTER UPDATE OF case_id, session_date ON case_sessions", (
+        _case_sessions_change("OLD", "-1"),
+        _case_sessions_change("NEW", "1"),
+    )),
+    "case_notes_stats_insert": ("AFTER INSERT ON case_notes", (
+        _count_change("total", "'case_notes'", "1"),
+        _case_notes_change("NEW", "1"),
+    )),
+    "case_notes_stats_delete": ("AFTER DELETE ON case_notes", (
+        _count_change("total", "'case_notes'", "-1"),
+        _case_notes_change("OLD", "-1"),
+    )),
+    "case_notes_stats_update": ("AFTER UPDATE OF case_id ON case_notes", (
+        _case_notes_change("OLD", "-1"),
+        _case_notes_change("NEW", "1"),
+    )),
+    "users_stats_insert": ("AFTER INSERT ON users", (_count_change("total", "'active_users'", "(NEW.is_active = 1)"),)),
+    "users_stats_delete": ("AFTER DELETE ON users", (_count_change("total", "'active_users'", "-(OLD.is_active = 1)"),)),
+    "users_stats_update": ("AFTER UPDATE OF is_active ON users", (
+        _count_change("total", "'active_users'", "(NEW.is_active = 1) - (OLD.is_active = 1)"),
+    )),
+}
+
+# Recompute every materialized statistic from the source tables
+STATISTICS_REBUILD = (
+    "DELETE FROM stats_counters",
+    "DELETE FROM stats_monthly",
+    "INSERT INTO stats_counters (metric, key, value) SELECT 'total', 'cases', COUNT(*) FROM cases",
+    "INSERT INTO stats_counters (metric, key, value) SELECT 'total', 'case_types', COUNT(*) FROM case_types",
+    "INSERT INTO stats_counters (metric, key, value) SELECT 'total', 'case_sessions', COUNT(*) FROM case_sessions",
+    "INSERT INTO stats_counters (metric, key, value) SELECT 'total', 'case_notes', COUNT(*) FROM case_notes",
+    "INSERT INTO stats_counters (metric, key, value) SELECT 'total', 'active_users', COUNT(*) FROM users WHERE is_active = 1",
+    "INSERT INTO stats_counters (metric, key, value) SELECT 'judgment', judgment_type, COUNT(*) FROM cases GROUP BY judgment_type",
+    "INSERT INTO stats_counters (metric, key, value) SELECT 'case_type', case_type_id, COUNT(*) FROM cases GROUP BY case_type_id",
+    """INSERT INTO stats_monthly (month, count)
+       SELECT strftime('%Y-%m', created_at) AS month, COUNT(*) FROM cases
+       WHERE month IS NOT NULL GROUP BY month""",
+    f"""UPDATE cases SET
+           sessions_count = (SELECT COUNT(*) FROM case_sessions WHERE case_id = cases.id),
+           notes_count = (SELECT COUNT(*) FROM case_notes WHERE case_id = cases.id),
+           latest_session_date = {_latest_session("cases.id")}""",
+)
+
+# Table targeted by an INSERT/REPLACE/UPDATE/DELETE statement
+_WRITE_TARGET = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"\[`]?(\w+)",
+    re.IGNORECASE
+)
+
+def written_table(query: str) -> Optional[str]:
+    """Return the table a write statement modifies, or None for other statements"""
+    match = _WRITE_TARGET.match(query)
+    return match.group(1).lower() if match else None
+
+class UnitOfWork:
+    """Runs every statement of one request on one connection inside one transaction.
+
+    Exposes the same execute_query/execute_write calls as DatabaseManager, but writes
+    are not committed individually; the surrounding transaction() commits once.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.written_tables = set()  # Reported to DatabaseManager once the transaction commits
+
+    def execute_query(self, query: str, params: tuple = ()) -> list:
+        """Execute SELECT query inside the transaction and return results"""
+        cursor = self.conn.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def execute_query_one(self, query: str, params: tuple = ()) -> Optional[dict]:
+        """Execute SELECT query inside the transaction and return the first row, or None"""
+        row = self.conn.execute(query, params).fetchone()
+        return dict(row) if row else None
+
+    def execute_write(self, query: str, params: tuple = ()) -> int:
+        """Execute INSERT, UPDATE, DELETE query inside the transaction"""
+        cursor = self.conn.execute(query, params)
+        self.written_tables.add(written_table(query))
+        return DatabaseManager._write_result(query, cursor)
+
+    def execute_many(self, query: str, params_seq: Iterable[tuple]) -> int:
+        """Execute one INSERT, UPDATE or DELETE for each parameter tuple and return the rows affected"""
+        cursor = self.conn.executemany(query, params_seq)
+        self.written_tables.add(written_table(query))
+        return cursor.rowcount
+
+_STOP = object()  # Queue sentinel that tells the writer thread to exit
+
+class _WriteJob:
+    """A single queued write and the future its caller is waiting on"""
+
+    __slots__ = ("query", "params", "future", "standalone")
+
+    def __init__(self, query: str, params: tuple):
+        self.query = query
+        self.params = params
+        self.future = Future()
+        # Statements such as VACUUM cannot run inside a transaction
+        self.standalone = query.lstrip().upper().startswith("VACUUM")
+
+class WritePipeline:
+    """Single writer thread that group-commits queued writes.
+
+    Callers enqueue a statement and get a Future. The writer drains up to
+    db_write_batch_size jobs (waiting at most db_write_batch_wait_ms for stragglers),
+    runs them in one transaction with a savepoint per job so a failing statement only
+    fails its own caller, commits once, and resolves every future with the job's
+    lastrowid/rowcount.
+    """
+
+    def __init__(self, manager: "DatabaseManager"):
+        self.manager = manager
+        self.max_batch = max(1, settings.db_write_batch_size)
+        self.max_wait = max(0, settings.db_write_batch_wait_ms) / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending: Optional[_WriteJob] = None
+        self._stats = {"batches": 0, "jobs": 0, "failed_jobs": 0, "largest_batch": 0}
+
+    def submit(self, query: str, params: tuple = ()) -> Future:
+        """Queue a write and return a Future resolved with lastrowid/rowcount"""
+        self._ensure_started()
+        job = _WriteJob(query, tuple(params))
+        self._queue.put(job)
+        return job.future
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                    self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Flush queued writes and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def get_status(self) -> dict:
+        """Get writer queue statistics"""
+        return {
+            "enabled": True,
+            "queued": self._queue.qsize(),
+            "max_batch": self.max_batch,
+            **self._stats
+        }
+
+    def _next_batch(self) -> Optional[list]:
+        """Block for the next job, then collect more until the batch is full or the window closes"""
+        if self._pending is not None:
+            first, self._pending = self._pending, None
+        else:
+            first = self._queue.get()
+        if first is _STOP:
+            return None
+        if first.standalone:
+            return [first]
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP or job.standalone:
+                # Handle the standalone job (or the stop request) after this batch
+                self._pending = job
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        conn = None
+        generation = None
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+
+            # Reopen the writer connection after the pool was reset (restore, tests)
+            if conn is None or generation != self.manager._generation:
+                if conn is not None:
+                    conn.close()
+                generation = self.manager._generation
+                conn = self.manager._create_connection()
+                conn.isolation_level = None  # The writer manages transactions explicitly
+
+            try:
+                if batch[0].standalone:
+                    self._run_standalone(conn, batch[0])
+                else:
+                    self._commit_batch(conn, batch)
+            except Exception as e:  # Never let the writer thread die
+                logger.error(f"Write pipeline batch failed: {e}", exc_info=True)
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+
+        if conn is not None:
+            conn.close()
+
+    def _run_standalone(self, conn: sqlite3.Connection, job: _WriteJob):
+        cursor = conn.execute(job.query, job.params)
+        job.future.set_result(DatabaseManager._write_result(job.query, cursor))
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    cursor = conn.execute(job.query, job.params)
+                    outcomes.append((job, DatabaseManager._write_result(job.query, cursor), None))
+                    conn.execute("RELEASE write_job")
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((job, None, e))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        self.manager._record_writes(job.query for job, _, error in outcomes if error is None)
+
+        # Only report results once the whole group is durable
+        failed = 0
+        for job, result, error in outcomes:
+            if error is not None:
+                failed += 1
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+        self._stats["batches"] += 1
+        self._stats["jobs"] += len(batch)
+        self._stats["failed_jobs"] += failed
+        self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
 
 class DatabaseManager:
-    """Database connection manager"""
-    
+    """Database connection manager backed by a bounded pool of long-lived connections"""
+
     def __init__(self):
         # Get the backend directory (where this file is located)
         backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,32 +377,706 @@ class DatabaseManager:
         else:
             # Handle absolute path or path relative to backend
             self.db_path = os.path.abspath(os.path.join(backend_dir, settings.database_path))
-    
+
+        # Connection pool state
+        self.pool_size = max(1, settings.db_pool_size)
+        self._pool = queue.LifoQueue(maxsize=self.pool_size)
+        self._lock = threading.Lock()
+        self._open_connections = 0
+        self._generation = 0
+        # Streamed reads use their own connections; this caps how many are open at once
+        self.max_streams = max(1, settings.db_max_streams)
+        self._stream_slots = threading.BoundedSemaphore(self.max_streams)
+        self._open_streams = 0
+
+        # Bumped after every committed write, per table (used to invalidate cached totals)
+        self._table_versions: Dict[str, int] = {}
+        # Called with the set of written tables after each commit, or None after a pool reset
+        self._write_listeners: list = []
+
+        # Whether this SQLite build has FTS5 with the trigram tokenizer (3.34+); probed once
+        self.fts_available: Optional[bool] = None
+
+        # Derived schema (search columns, triggers) is checked once per pool generation
+        self._schema_lock = threading.Lock()
+        self._schema_generation: Optional[int] = None
+
+        # Worker threads that run blocking queries for async route handlers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Optional single-writer pipeline with group commit
+        self._writer: Optional[WritePipeline] = WritePipeline(self) if settings.db_write_queue_enabled else None
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a new connection and apply the per-connection PRAGMAs once"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=settings.db_busy_timeout_ms / 1000,
+            check_same_thread=False  # Connections move between worker threads via the pool
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            self._configure_connection(conn)
+            self._ensure_schema(conn)
+            self._create_search_triggers(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """Apply journal, cache and locking PRAGMAs to a fresh connection"""
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute(f"PRAGMA busy_timeout = {int(settings.db_busy_timeout_ms)};")
+        conn.execute(f"PRAGMA journal_mode = {settings.db_journal_mode};")
+        conn.execute(f"PRAGMA synchronous = {settings.db_synchronous};")
+        # Negative cache_size is interpreted by SQLite as KiB rather than pages
+        conn.execute(f"PRAGMA cache_size = -{int(settings.db_cache_size_kb)};")
+        conn.execute(f"PRAGMA mmap_size = {int(settings.db_mmap_size_mb) * 1024 * 1024};")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        # Used by the TEMP triggers that keep the *_norm search columns in sync
+        conn.create_function("arabic_normalize", 1, ArabicTextProcessor.normalize_text, deterministic=True)
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        """Create derived schema objects the first time a connection is opened after a pool reset"""
+        generation = self._generation
+        if self._schema_generation == generation:
+            return
+        with self._schema_lock:
+            if self._schema_generation == generation:
+                return
+            if self._ensure_search_columns(conn) and self._ensure_search_index(conn):
+                self._ensure_stale_tracking(conn)
+                self._ensure_normalizer_version(conn)
+                self._ensure_listing_indexes(conn)
+                self._ensure_token_tables(conn)
+                self._ensure_statistics(conn)
+                self._schema_generation = generation
+
+    def _ensure_listing_indexes(self, conn: sqlite3.Connection):
+        """Create the composite indexes used by keyset pagination on tables that exist"""
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, (index_name, columns) in LISTING_INDEXES.items():
+            if table in tables:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({columns})")
+
+    def _ensure_statistics(self, conn: sqlite3.Connection):
+        """Create the materialized dashboard statistics and their triggers, rebuilding on version change"""
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not {"cases", "case_types", "case_sessions", "case_notes", "users"} <= tables:
+            return
+        row = conn.execute("SELECT value FROM schema_state WHERE key = 'statistics_version'").fetchone()
+        if row and row["value"] == str(STATISTICS_VERSION):
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stats_counters (
+                    metric TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (metric, key)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS stats_monthly (
+                    month TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID
+            """)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(cases)")}
+            for column, definition in CASE_AGGREGATE_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE cases ADD COLUMN {column} {definition}")
+            for name, (event, statements) in STATISTICS_TRIGGERS.items():
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                conn.execute(f"CREATE TRIGGER {name} {event} BEGIN {' '.join(statements)} END")
+            for statement in STATISTICS_REBUILD:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_state (key, value) VALUES ('statistics_version', ?)",
+                (str(STATISTICS_VERSION),)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def rebuild_statistics(self) -> dict:
+        """Recompute the materialized statistics from the source tables (consistency repair)"""
+        with self.transaction() as uow:
+            for statement in STATISTICS_REBUILD:
+                uow.execute_write(statement)
+            counters = uow.execute_query("SELECT COUNT(*) AS rows FROM stats_counters")[0]["rows"]
+            months = uow.execute_query("SELECT COUNT(*) AS rows FROM stats_monthly")[0]["rows"]
+        return {"counters": counters, "months": months}
+
+    def _ensure_token_tables(self, conn: sqlite3.Connection):
+        """Create the refresh token and access token revocation tables"""
+        # Only the SHA-256 digest of a refresh token is stored; WITHOUT ROWID makes
+        # the digest itself the clustered key, so a renewal is one index seek
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                token_hash BLOB PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+                expires_at INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user_id ON refresh_tokens(user_id)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                jti TEXT PRIMARY KEY,
+                expires_at INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _ensure_search_columns(self, conn: sqlite3.Connection) -> bool:
+        """Add normalized search columns and backfill rows that have none.
+
+        Rows written before the columns existed, or by other tools (which do not have the
+        app's TEMP triggers), are normalized here once per pool start. Returns False while
+        the base tables do not exist yet (fresh database), so the check is repeated on the
+        next new connection.
+        """
+        for table, columns in NORMALIZED_SEARCH_COLUMNS.items():
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if not existing:
+                return False
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for column in columns:
+                    if f"{column}_norm" not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}_norm TEXT")
+                    # Indexing the normalized value turns exact and prefix lookups into index seeks
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_norm ON {table}({column}_norm)")
+
+                # Earlier versions stored these triggers in the schema, where they broke
+                # writes from any connection without arabic_normalize
+                conn.execute(f"DROP TRIGGER IF EXISTS main.{table}_search_norm_insert")
+                conn.execute(f"DROP TRIGGER IF EXISTS main.{table}_search_norm_update")
+
+                conn.execute(
+                    f"UPDATE {table} SET "
+                    + ", ".join(f"{column}_norm = arabic_normalize({column})" for column in columns)
+                    + " WHERE " + " OR ".join(f"({column}_norm IS NULL AND {column} IS NOT NULL)" for column in columns)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return True
+
+    def _create_search_triggers(self, conn: sqlite3.Connection):
+        """Create this connection's TEMP triggers that keep the *_norm columns and FTS rows current.
+
+        arabic_normalize is only registered on the app's connections, so these triggers are
+        TEMP (private to the connection) instead of part of the schema; the sqlite3 CLI, DB
+        browsers and the scripts in database/ can still write to the tables.
+        """
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, columns in NORMALIZED_SEARCH_COLUMNS.items():
+            if table not in tables:
+                continue
+            assignments = ", ".join(f"{column}_norm = arabic_normalize(NEW.{column})" for column in columns)
+            # Bulk writers (the importer) may insert the normalized values themselves
+            missing = " OR ".join(f"(NEW.{column}_norm IS NULL AND NEW.{column} IS NOT NULL)" for column in columns)
+            conn.execute(f"""
+                CREATE TEMP TRIGGER IF NOT EXISTS {table}_search_norm_insert
+                AFTER INSERT ON main.{table} WHEN {missing}
+                BEGIN
+                    UPDATE {table} SET {assignments} WHERE id = NEW.id;
+                END
+            """)
+
+        if "search_stale" in tables:
+            for table in self._stale_tracked_columns():
+                body = "".join(f"{statement}; " for statement in self._refresh_statements(table, "SELECT NEW.row_id"))
+                conn.execute(
+                    f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_search_refresh "
+                    f"AFTER INSERT ON main.search_stale WHEN NEW.source = '{table}' "
+                    f"BEGIN {body}DELETE FROM search_stale WHERE source = NEW.source AND row_id = NEW.row_id; END"
+                )
+
+        for table, (fts_table, columns) in FULL_TEXT_INDEXES.items():
+            if fts_table not in tables or not self.fts_available:
+                continue
+            column_list = ", ".join(columns)
+            normalized = NORMALIZED_SEARCH_COLUMNS.get(table, ())
+            insert_new = (
+                f"INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, "
+                + ", ".join(
+                    f"COALESCE(NEW.{column}_norm, arabic_normalize(NEW.{column}))" if column in normalized
+                    else f"arabic_normalize(NEW.{column})"
+                    for column in columns
+                ) + ");"
+            )
+            conn.execute(
+                f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON main.{table} "
+                f"BEGIN {insert_new} END"
+            )
+
+    @staticmethod
+    def _stale_tracked_columns() -> Dict[str, List[str]]:
+        """Source columns per table whose updates make derived search data stale"""
+        tracked = {table: list(columns) for table, columns in NORMALIZED_SEARCH_COLUMNS.items()}
+        for table, (_, columns) in FULL_TEXT_INDEXES.items():
+            tracked.setdefault(table, [])
+            tracked[table] += [column for column in columns if column not in tracked[table]]
+        return tracked
+
+    def _ensure_stale_tracking(self, conn: sqlite3.Connection):
+        """Record updated search source rows in search_stale, and repair the rows left there.
+
+        The stored triggers only insert (table, id) pairs, so they work on every connection.
+        On the app's connections a TEMP trigger on search_stale (_create_search_triggers)
+        refreshes the row at once and removes the marker; rows updated by other tools stay
+        marked and are refreshed here once per pool start.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_stale (
+                    source TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    PRIMARY KEY (source, row_id)
+                ) WITHOUT ROWID
+            """)
+            for table, columns in self._stale_tracked_columns().items():
+                # REPLACE re-inserts an existing marker, so the refresh trigger still fires
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_search_stale
+                    AFTER UPDATE OF {", ".join(columns)} ON {table}
+                    BEGIN
+                        INSERT OR REPLACE INTO search_stale (source, row_id) VALUES ('{table}', NEW.id);
+                    END
+                """)
+                for statement in self._refresh_statements(table, "SELECT row_id FROM search_stale WHERE source = ?"):
+                    conn.execute(statement, (table,))
+            conn.execute("DELETE FROM search_stale")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _refresh_statements(self, table: str, ids: str) -> List[str]:
+        """Statements recomputing the derived search data of the rows whose id is in the subquery ids"""
+        statements = []
+        columns = NORMALIZED_SEARCH_COLUMNS.get(table)
+        if columns:
+            statements.append(
+                f"UPDATE {table} SET "
+                + ", ".join(f"{column}_norm = arabic_normalize({column})" for column in columns)
+                + f" WHERE id IN ({ids})"
+            )
+        if table in FULL_TEXT_INDEXES and self.fts_available:
+            fts_table, columns = FULL_TEXT_INDEXES[table]
+            statements.append(f"DELETE FROM {fts_table} WHERE rowid IN ({ids})")
+            statements.append(
+                f"INSERT INTO {fts_table} (rowid, {', '.join(columns)}) SELECT id, "
+                + ", ".join(f"arabic_normalize({column})" for column in columns)
+                + f" FROM {table} WHERE id IN ({ids})"
+            )
+        return statements
+
+    def _ensure_search_index(self, conn: sqlite3.Connection) -> bool:
+        """Create the FTS5 search tables and the triggers that remove deleted rows from them.
+
+        Rows are added by the TEMP triggers of _create_search_triggers and replaced through
+        search_stale (_ensure_stale_tracking). Source rows missing from an FTS table (all of
+        them for a new table, or rows inserted by other tools) are indexed here. Returns False while the source tables do not exist yet.
+        """
+        tables = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not all(table in tables for table in FULL_TEXT_INDEXES):
+            return False
+
+        # Earlier versions stored the insert/update triggers, which call arabic_normalize
+        for table in FULL_TEXT_INDEXES:
+            conn.execute(f"DROP TRIGGER IF EXISTS main.{table}_fts_insert")
+            conn.execute(f"DROP TRIGGER IF EXISTS main.{table}_fts_update")
+
+        triggers = {row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        if not self._probe_full_text(conn):
+            # Searches use the *_norm columns instead; without these triggers writes do not
+            # touch FTS tables left by a newer SQLite
+            for table in FULL_TEXT_INDEXES:
+                conn.execute(f"DROP TRIGGER IF EXISTS main.{table}_fts_delete")
+            return True
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table, (fts_table, columns) in FULL_TEXT_INDEXES.items():
+                column_list = ", ".join(columns)
+                # Trigram tokens give substring matches, which suits Arabic words with attached prefixes
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column_list}, tokenize = 'trigram')"
+                )
+
+                # Deletes need no normalizing, so this trigger is stored and also covers other tools
+                # An existing table without its delete trigger was written to without FTS support
+                if fts_table in tables and f"{table}_fts_delete" not in triggers:
+                    conn.execute(f"DELETE FROM {fts_table}")
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} "
+                    f"BEGIN DELETE FROM {fts_table} WHERE rowid = OLD.id; END"
+                )
+
+                self._fill_search_index(conn, table, missing_only=fts_table in tables and f"{table}_fts_delete" in triggers)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return True
+
+    def _probe_full_text(self, conn: sqlite3.Connection) -> bool:
+        """Check once whether FTS5 and its trigram tokenizer are available"""
+        if self.fts_available is None:
+            try:
+                conn.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(value, tokenize = 'trigram')")
+                conn.execute("DROP TABLE temp.fts_probe")
+                self.fts_available = True
+            except sqlite3.OperationalError as e:
+                logger.warning("SQLite %s has no FTS5 trigram tokenizer (%s); searching without the full-text index",
+                               sqlite3.sqlite_version, e)
+                self.fts_available = False
+        return self.fts_available
+
+    @staticmethod
+    def _fill_search_index(conn: sqlite3.Connection, table: str, missing_only: bool = False) -> int:
+        """Copy the rows of a source table into its FTS table and return how many were added"""
+        fts_table, columns = FULL_TEXT_INDEXES[table]
+        cursor = conn.execute(
+            f"INSERT INTO {fts_table} (rowid, {', '.join(columns)}) SELECT id, "
+            + ", ".join(f"arabic_normalize({column})" for column in columns)
+            + f" FROM {table}"
+            + (f" WHERE id NOT IN (SELECT rowid FROM {fts_table})" if missing_only else "")
+        )
+        return cursor.rowcount
+
+    def _refill_search_index(self, conn: sqlite3.Connection) -> dict:
+        """Empty and refill every FTS table, returning the indexed row count per table"""
+        indexed = {}
+        if not self.fts_available:
+            return indexed
+        for table, (fts_table, _) in FULL_TEXT_INDEXES.items():
+            conn.execute(f"DELETE FROM {fts_table}")
+            indexed[fts_table] = self._fill_search_index(conn, table)
+        return indexed
+
+    def rebuild_search_index(self) -> dict:
+        """Repopulate every FTS table from its source table and merge its segments"""
+        with self.transaction() as uow:
+            indexed = self._refill_search_index(uow.conn)
+            for fts_table in indexed:
+                uow.conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('optimize')")
+        return indexed
+
+    def _ensure_normalizer_version(self, conn: sqlite3.Connection):
+        """Recompute stored normalized text when ArabicTextProcessor's rules have changed"""
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_state (key TEXT PRIMARY KEY, value TEXT)")
+        row = conn.execute("SELECT value FROM schema_state WHERE key = 'arabic_normalizer_version'").fetchone()
+        if row and row["value"] == str(ArabicTextProcessor.VERSION):
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table, columns in NORMALIZED_SEARCH_COLUMNS.items():
+                conn.execute(
+                    f"UPDATE {table} SET "
+                    + ", ".join(f"{column}_norm = arabic_normalize({column})" for column in columns)
+                )
+            self._refill_search_index(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_state (key, value) VALUES ('arabic_normalizer_version', ?)",
+                (str(ArabicTextProcessor.VERSION),)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _acquire(self) -> tuple:
+        """Check a connection out of the pool, opening one if the pool is not full"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._open_connections < self.pool_size
+            if can_open:
+                self._open_connections += 1
+            generation = self._generation
+
+        if can_open:
+            try:
+                return self._create_connection(), generation
+            except Exception:
+                with self._lock:
+                    self._open_connections -= 1
+                raise
+
+        try:
+            return self._pool.get(timeout=settings.db_pool_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Database connection pool exhausted ({self.pool_size} connections in use)"
+            )
+
+    def _release(self, conn: sqlite3.Connection, generation: int):
+        """Return a connection to the pool, discarding it if it is stale or broken"""
+        broken = False
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            broken = True
+
+        with self._lock:
+            current = generation == self._generation
+
+        if current and not broken:
+            try:
+                self._pool.put_nowait((conn, generation))
+                return
+            except queue.Full:
+                pass
+
+        conn.close()
+        if current:
+            with self._lock:
+                self._open_connections -= 1
+
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
-        """Get database connection with proper cleanup"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        conn.row_factory = sqlite3.Row
+        """Get a pooled database connection and return it to the pool afterwards"""
+        conn, generation = self._acquire()
         try:
             yield conn
         finally:
-            conn.close()
-    
+            self._release(conn, generation)
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Generator[UnitOfWork, None, None]:
+        """Run a block of statements on one pooled connection inside one transaction.
+
+        BEGIN IMMEDIATE takes the write lock up front, so existence/uniqueness checks
+        made inside the block cannot race with a concurrent insert. Commits on success,
+        rolls back on any exception (including HTTPException raised by validation).
+        """
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            uow = UnitOfWork(conn)
+            try:
+                yield uow
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            self._record_tables(uow.written_tables)
+
+    def close_all(self):
+        """Close every idle pooled connection and retire the ones currently checked out.
+
+        Must be called before the database file is replaced on disk (restore, test setup),
+        otherwise long-lived connections keep pointing at the old file.
+        """
+        with self._lock:
+            self._generation += 1
+            self._open_connections = 0
+
+        while True:
+            try:
+                conn, _ = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+        self._notify_write_listeners(None)
+
+    def get_pool_status(self) -> dict:
+        """Get connection pool statistics"""
+        with self._lock:
+            open_connections = self._open_connections
+            open_streams = self._open_streams
+        idle = self._pool.qsize()
+        return {
+            "pool_size": self.pool_size,
+            "open_connections": open_connections,
+            "idle_connections": idle,
+            "in_use_connections": max(open_connections - idle, 0),
+            "max_streams": self.max_streams,
+            "open_streams": open_streams,
+            "journal_mode": settings.db_journal_mode,
+            "synchronous": settings.db_synchronous,
+            "write_queue": self._writer.get_status() if self._writer else {"enabled": False}
+        }
+
     def execute_query(self, query: str, params: tuple = ()) -> list:
         """Execute SELECT query and return results"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
-    
+
+    def stream_query(self, query: str, params: tuple = (), chunk_size: int = 500) -> Generator[list, None, None]:
+        """Yield the rows of a SELECT as lists of at most chunk_size dicts.
+
+        The statement reads a single consistent snapshot and only one chunk is in memory at a
+        time. A download can keep the generator open for minutes, so it runs on a dedicated
+        connection instead of a pooled one, and at most db_max_streams run at once: each open
+        snapshot keeps WAL checkpoints from completing past it.
+        """
+        if not self._stream_slots.acquire(timeout=settings.db_pool_timeout):
+            raise sqlite3.OperationalError(
+                f"Too many streamed queries in progress ({self.max_streams} open)"
+            )
+        with self._lock:
+            self._open_streams += 1
+        try:
+            conn = self._create_connection()
+            try:
+                conn.execute("PRAGMA query_only = ON;")
+                cursor = conn.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    yield [dict(row) for row in rows]
+            finally:
+                conn.close()
+        finally:
+            with self._lock:
+                self._open_streams -= 1
+            self._stream_slots.release()
+
     def execute_write(self, query: str, params: tuple = ()) -> int:
         """Execute INSERT, UPDATE, DELETE query"""
+        if self._writer is not None:
+            return self._writer.submit(query, params).result()
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             conn.commit()
-            return cursor.lastrowid or cursor.rowcount
+            self._record_writes((query,))
+            return self._write_result(query, cursor)
+
+    def _record_writes(self, queries: Iterable[str]):
+        """Note the tables touched by committed write statements"""
+        self._record_tables(written_table(query) for query in queries)
+
+    def _record_tables(self, tables: Iterable[Optional[str]]):
+        written = {table for table in tables if table}
+        if not written:
+            return
+        with self._lock:
+            for table in written:
+                self._table_versions[table] = self._table_versions.get(table, 0) + 1
+        self._notify_write_listeners(written)
+
+    def add_write_listener(self, callback: Callable[[Optional[set]], None]):
+        """Register a callback run with the tables touched by each committed write.
+
+        The callback receives None when the whole database may have changed (close_all).
+        """
+        self._write_listeners.append(callback)
+
+    def _notify_write_listeners(self, tables: Optional[set]):
+        for callback in self._write_listeners:
+            try:
+                callback(tables)
+            except Exception as e:
+                logger.error(f"Database write listener failed: {e}", exc_info=True)
+
+    def table_version(self, table: str) -> tuple:
+        """Opaque stamp that changes whenever a committed write touches the table or the pool is reset"""
+        with self._lock:
+            return self._generation, self._table_versions.get(table, 0)
+
+    def submit_write(self, query: str, params: tuple = ()) -> Future:
+        """Queue a write without waiting for it (e.g. metrics and log rows).
+
+        With the write pipeline disabled the statement runs immediately and the
+        returned Future is already resolved.
+        """
+        if self._writer is not None:
+            return self._writer.submit(query, params)
+
+        future = Future()
+        try:
+            future.set_result(self.execute_write(query, params))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    @staticmethod
+    def _write_result(query: str, cursor: sqlite3.Cursor) -> int:
+        """Return the new row id for inserts, otherwise the number of affected rows.
+
+        sqlite3 reports the connection-wide last insert rowid after any statement, so on
+        a reused connection it must only be trusted for inserts that actually added a row.
+        """
+        is_insert = query.lstrip().upper().startswith(("INSERT", "REPLACE"))
+        if is_insert and cursor.rowcount > 0 and cursor.lastrowid:
+            return cursor.lastrowid
+        return cursor.rowcount
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the dedicated database executor, creating it on first use"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # One worker per pooled connection so workers never wait on the pool
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.pool_size,
+                        thread_name_prefix="db-worker"
+                    )
+        return self._executor
+
+    async def run_sync(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking database function on the database executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+
+    def _run_transaction(self, func: Callable, immediate: bool, args: tuple, kwargs: dict) -> Any:
+        """Call func(uow, ...) inside a transaction"""
+        with self.transaction(immediate=immediate) as uow:
+            return func(uow, *args, **kwargs)
+
+    async def run_in_transaction(self, func: Callable, *args, immediate: bool = True, **kwargs) -> Any:
+        """Run func(uow, *args, **kwargs) as one unit of work on the database executor"""
+        return await self.run_sync(self._run_transaction, func, immediate, args, kwargs)
+
+    async def fetch_all(self, query: str, params: tuple = ()) -> list:
+        """Async version of execute_query returning a list of dict rows"""
+        return await self.run_sync(self.execute_query, query, params)
+
+    async def fetch_one(self, query: str, params: tuple = ()) -> Optional[dict]:
+        """Execute SELECT query and return the first row, or None"""
+        rows = await self.run_sync(self.execute_query, query, params)
+        return rows[0] if rows else None
+
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        """Async version of execute_write"""
+        if self._writer is not None:
+            # The writer thread resolves the future; no executor worker needs to wait on it
+            return await asyncio.wrap_future(self._writer.submit(query, params))
+        return await self.run_sync(self.execute_write, query, params)
+
+    def shutdown(self):
+        """Flush the write pipeline, stop worker threads and close pooled connections"""
+        if self._writer is not None:
+            self._writer.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.close_all()
 
 # Global database manager instance
 db_manager = DatabaseManager()
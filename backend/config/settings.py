@@ -13,11 +13,54 @@ class Settings(BaseModel):
     # Security settings
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
-    access_token_expire_hours: int = 12
+    access_token_expire_minutes: int = 30       # Short-lived; clients renew through /auth/refresh
+    refresh_token_expire_days: int = 14
+    auth_user_cache_ttl_seconds: float = 30.0   # How long get_current_user reuses a loaded user
+    auth_token_cache_size: int = 1024           # Decoded bearer tokens kept to skip repeated HMAC checks
+    password_hash_workers: int = 2              # Threads running bcrypt, off the event loop
+    password_hash_queue_limit: int = 16         # Waiting hash calls allowed before answering 429
     
     # Database settings
     database_path: str = "../database/legal_cases.db"
-    
+    db_pool_size: int = 10             # Long-lived connections kept open by DatabaseManager
+    db_pool_timeout: float = 30.0      # Seconds to wait for a free pooled connection
+    db_max_streams: int = 4            # Streamed reads (exports) open at once, each on its own connection
+    db_busy_timeout_ms: int = 5000     # How long SQLite retries a locked database
+    db_journal_mode: str = "WAL"       # WAL lets readers run while a writer commits
+    db_synchronous: str = "NORMAL"     # Safe with WAL, avoids an fsync per commit
+    db_cache_size_kb: int = 16384      # Page cache per connection
+    db_mmap_size_mb: int = 256         # Memory-mapped I/O window
+    db_write_queue_enabled: bool = False  # Route execute_write through a single group-commit writer
+    db_write_batch_size: int = 64         # Max writes committed together
+    db_write_batch_wait_ms: int = 2       # How long the writer waits to fill a batch
+
+    # Cache settings
+    cache_max_entries: int = 1024          # LRU bound of the in-process result cache
+    cache_default_ttl_seconds: float = 60.0
+
+    # Export settings
+    export_chunk_size: int = 500           # Rows fetched and encoded per chunk of a streamed export
+    export_job_workers: int = 1            # Threads rendering background export jobs
+    export_job_retention_minutes: int = 60 # How long finished export files stay downloadable
+    pdf_render_workers: int = 2            # Processes laying out PDF exports
+    pdf_max_rows: int = 20000              # Larger PDF exports are rendered as background export jobs
+    pdf_job_max_rows: int = 200000         # PDF exports are refused above this; layout holds every row in memory
+
+    # Backup settings
+    backup_pages_per_step: int = 256       # Database pages copied per backup step
+    backup_step_sleep_ms: int = 10         # Pause between steps so writers are not starved
+    backup_max_restarts: int = 3           # Copy restarts caused by writes before copying in one step
+    backup_chunk_size_kb: int = 64         # Deduplication unit of the backup store, rounded to whole pages
+    # Retention: every count at 0 keeps all backups until an admin configures a policy
+    backup_keep_last: int = 0              # Retention: newest backups always kept
+    backup_keep_hourly: int = 0            # Retention: newest backup of each of the last N hours
+    backup_keep_daily: int = 0             # Retention: newest backup of each of the last N days
+    backup_keep_weekly: int = 0            # Retention: newest backup of each of the last N weeks
+
+    # Import settings
+    import_batch_size: int = 1000          # Rows checked and inserted per batch of a bulk import
+    import_max_rows: int = 100000          # Largest accepted import file
+
     # Network settings
     host: str = "127.0.0.1"  # Default to localhost, can be overridden
     port: int = 8000
@@ -50,8 +93,42 @@ class Settings(BaseModel):
         self.debug = os.getenv("DEBUG", "true").lower() == "true"
         self.secret_key = os.getenv("SECRET_KEY", self.secret_key)
         self.algorithm = os.getenv("ALGORITHM", self.algorithm)
-        self.access_token_expire_hours = int(os.getenv("ACCESS_TOKEN_EXPIRE_HOURS", self.access_token_expire_hours))
+        self.access_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", self.access_token_expire_minutes))
+        self.refresh_token_expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", self.refresh_token_expire_days))
+        self.auth_user_cache_ttl_seconds = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", self.auth_user_cache_ttl_seconds))
+        self.auth_token_cache_size = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", self.auth_token_cache_size))
+        self.password_hash_workers = int(os.getenv("PASSWORD_HASH_WORKERS", self.password_hash_workers))
+        self.password_hash_queue_limit = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", self.password_hash_queue_limit))
         self.database_path = os.getenv("DATABASE_PATH", self.database_path)
+        self.db_pool_size = int(os.getenv("DB_POOL_SIZE", self.db_pool_size))
+        self.db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", self.db_pool_timeout))
+        self.db_max_streams = int(os.getenv("DB_MAX_STREAMS", self.db_max_streams))
+        self.db_busy_timeout_ms = int(os.getenv("DB_BUSY_TIMEOUT_MS", self.db_busy_timeout_ms))
+        self.db_journal_mode = os.getenv("DB_JOURNAL_MODE", self.db_journal_mode).upper()
+        self.db_synchronous = os.getenv("DB_SYNCHRONOUS", self.db_synchronous).upper()
+        self.db_cache_size_kb = int(os.getenv("DB_CACHE_SIZE_KB", self.db_cache_size_kb))
+        self.db_mmap_size_mb = int(os.getenv("DB_MMAP_SIZE_MB", self.db_mmap_size_mb))
+        self.db_write_queue_enabled = os.getenv("DB_WRITE_QUEUE_ENABLED", "false").lower() == "true"
+        self.db_write_batch_size = int(os.getenv("DB_WRITE_BATCH_SIZE", self.db_write_batch_size))
+        self.db_write_batch_wait_ms = int(os.getenv("DB_WRITE_BATCH_WAIT_MS", self.db_write_batch_wait_ms))
+        self.cache_max_entries = int(os.getenv("CACHE_MAX_ENTRIES", self.cache_max_entries))
+        self.cache_default_ttl_seconds = float(os.getenv("CACHE_DEFAULT_TTL_SECONDS", self.cache_default_ttl_seconds))
+        self.export_chunk_size = int(os.getenv("EXPORT_CHUNK_SIZE", self.export_chunk_size))
+        self.export_job_workers = int(os.getenv("EXPORT_JOB_WORKERS", self.export_job_workers))
+        self.export_job_retention_minutes = int(os.getenv("EXPORT_JOB_RETENTION_MINUTES", self.export_job_retention_minutes))
+        self.pdf_render_workers = int(os.getenv("PDF_RENDER_WORKERS", self.pdf_render_workers))
+        self.pdf_max_rows = int(os.getenv("PDF_MAX_ROWS", self.pdf_max_rows))
+        self.pdf_job_max_rows = int(os.getenv("PDF_JOB_MAX_ROWS", self.pdf_job_max_rows))
+        self.backup_pages_per_step = int(os.getenv("BACKUP_PAGES_PER_STEP", self.backup_pages_per_step))
+        self.backup_step_sleep_ms = int(os.getenv("BACKUP_STEP_SLEEP_MS", self.backup_step_sleep_ms))
+        self.backup_max_restarts = int(os.getenv("BACKUP_MAX_RESTARTS", self.backup_max_restarts))
+        self.backup_chunk_size_kb = int(os.getenv("BACKUP_CHUNK_SIZE_KB", self.backup_chunk_size_kb))
+        self.backup_keep_last = int(os.getenv("BACKUP_KEEP_LAST", self.backup_keep_last))
+        self.backup_keep_hourly = int(os.getenv("BACKUP_KEEP_HOURLY", self.backup_keep_hourly))
+        self.backup_keep_daily = int(os.getenv("BACKUP_KEEP_DAILY", self.backup_keep_daily))
+        self.backup_keep_weekly = int(os.getenv("BACKUP_KEEP_WEEKLY", self.backup_keep_weekly))
+        self.import_batch_size = int(os.getenv("IMPORT_BATCH_SIZE", self.import_batch_size))
+        self.import_max_rows = int(os.getenv("IMPORT_MAX_ROWS", self.import_max_rows))
         
         # Network settings
         self.host = os.getenv("HOST", self.host)
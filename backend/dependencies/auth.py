@@ -1,13 +1,31 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
-from utils.auth import auth_utils
+from utils.auth import auth_utils, token_store
+from utils.cache import TTLCache
 from config.database import db_manager
+from config.settings import settings
 from models.user import User, UserType
 
 # Security scheme
 security = HTTPBearer()
 
+# Recently loaded users keyed by id. Writes to the users table drop every entry, and the
+# user management endpoints also invalidate explicitly so deactivation applies at once.
+user_cache = TTLCache(default_ttl=settings.auth_user_cache_ttl_seconds)
+db_manager.add_write_listener(user_cache.on_database_write)
+
+def invalidate_cached_user(user_id: int):
+    """Forget a cached user after its account was changed"""
+    user_cache.delete(user_id)
+
+async def _load_user(user_id: int) -> Optional[dict]:
+    users = await db_manager.fetch_all(
+        "SELECT id, username, full_name, user_type, is_active, created_at, updated_at FROM users WHERE id = ?",
+        (user_id,)
+    )
+    return users[0] if users else None
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """Get current authenticated user"""
     
@@ -20,6 +38,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Tokens revoked by logout stay unusable until they expire
+    jti = payload.get("jti")
+    if jti and await token_store.is_revoked(jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="رمز الدخول غير صالح أو منتهي الصلاحية",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     user_id = payload.get("user_id")
     if not user_id:
         raise HTTPException(
@@ -28,20 +55,16 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Get user from database
-    users = db_manager.execute_query(
-        "SELECT id, username, full_name, user_type, is_active, created_at, updated_at FROM users WHERE id = ?",
-        (user_id,)
-    )
+    # Get user from cache or database
+    user_data = await user_cache.get_or_set_async(user_id, lambda: _load_user(user_id), tags=("users",))
     
-    if not users or not users[0]['is_active']:
+    if not user_data or not user_data['is_active']:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="المستخدم غير موجود أو معطل",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_data = users[0]
     return User(**user_data)
 
 async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
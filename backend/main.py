@@ -10,6 +10,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config.settings import settings
+from config.database import db_manager
+from utils.auth import password_hasher
+from utils.pdf_export import pdf_renderer
 from routes.auth import router as auth_router
 from routes.users import router as users_router
 from routes.case_types import router as case_types_router
@@ -19,8 +22,9 @@ from routes.case_notes import router as case_notes_router
 from routes.stats import router as stats_router
 from routes.phone_directory import router as phone_directory_router
 # Phase 4 - Polish Features
-from routes.backup import router as backup_router
-from routes.export import router as export_router
+from routes.backup import router as backup_router, backup_manager
+from routes.export import router as export_router, export_job_manager
+from routes.data_import import router as import_router
 from routes.print import router as print_router
 from routes.performance import router as performance_router
 
@@ -121,8 +125,21 @@ app.include_router(phone_directory_router, prefix="/api/v1")
 # Phase 4 - Polish Features 
 app.include_router(backup_router, prefix="/api/v1")
 app.include_router(export_router, prefix="/api/v1")
+app.include_router(import_router, prefix="/api/v1")
 app.include_router(print_router, prefix="/api/v1")
-app.include_router(performance_router, prefix="/api/v1")# Root endpoint
+app.include_router(performance_router, prefix="/api/v1")
+
+# Shutdown hook
+@app.on_event("shutdown")
+def shutdown_database():
+    """Flush queued writes and close pooled database connections"""
+    password_hasher.shutdown()
+    export_job_manager.clear()
+    pdf_renderer.shutdown()
+    backup_manager.shutdown()
+    db_manager.shutdown()
+
+# Root endpoint
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -160,6 +177,7 @@ async def api_info():
             "stats": "/api/v1/stats",
             "backup": "/api/v1/backup",
             "export": "/api/v1/export",
+            "import": "/api/v1/import",
             "print": "/api/v1/print",
             "performance": "/api/v1/performance"
         }
@@ -12,6 +12,8 @@ class LoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
     expires_in: int  # seconds
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None  # seconds
     user: User
 
 class TokenRefreshRequest(BaseModel):
@@ -18,10 +18,12 @@ class ErrorResponse(BaseResponse):
 class PaginatedResponse(BaseModel, Generic[T]):
     """Paginated response model"""
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None   # Not computed for keyset (cursor) pages
+    total_exact: Optional[bool] = None   # False when total is only a lower-bound estimate
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class UserInfo(BaseModel):
     """User information for responses"""
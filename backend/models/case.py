@@ -1,8 +1,9 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 from .base import BaseModelWithAudit, UserInfo
 from .case_type import CaseTypeSimple
+from utils.arabic import ArabicTextProcessor
 
 class JudgmentType(str, Enum):
     FIRST = "حكم اول"
@@ -82,12 +83,50 @@ class Case(BaseModelWithAudit):
     case_type: Optional[CaseTypeSimple] = None
     judgment_type: JudgmentType
     previous_judgment_id: Optional[int] = None
+    # Maintained on the case row by triggers on case_sessions and case_notes
+    sessions_count: int = 0
+    notes_count: int = 0
+    latest_session_date: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 class CaseWithDetails(Case):
     """Case with related data"""
-    sessions_count: int = 0
-    notes_count: int = 0
     latest_session: Optional[str] = None
+
+# Judgment types keyed by their normalized spelling ("حكم أول" matches "حكم اول")
+JUDGMENT_TYPE_SPELLINGS = {ArabicTextProcessor.normalize_text(item.value): item for item in JudgmentType}
+
+class CaseImportRow(CaseBase):
+    """One row of a bulk case import; the case type is given by id or by name"""
+    case_type_id: Optional[int] = None
+    case_type: Optional[str] = None
+    
+    @field_validator('judgment_type', mode='before')
+    @classmethod
+    def normalize_judgment_type(cls, v):
+        judgment_type = JUDGMENT_TYPE_SPELLINGS.get(ArabicTextProcessor.normalize_text(str(v or '')))
+        if judgment_type is None:
+            raise ValueError('نوع الحكم غير صالح')
+        return judgment_type
+    
+    @field_validator('case_type')
+    @classmethod
+    def validate_case_type(cls, v, info):
+        if not v and info.data.get('case_type_id') is None:
+            raise ValueError('نوع القضية مطلوب')
+        return v
+
+class CaseImportRowError(BaseModel):
+    """Problems found in one row of an import file"""
+    row: int
+    case_number: Optional[str] = None
+    errors: List[str]
+
+class CaseImportResult(BaseModel):
+    """Bulk case import report"""
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[CaseImportRowError]
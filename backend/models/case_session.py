@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional
-from datetime import datetime
+from typing import Optional, List
+from datetime import datetime, date
 from .base import BaseModelWithAudit
 
 class CaseSessionBase(BaseModel):
@@ -39,3 +39,26 @@ class CaseSession(BaseModelWithAudit):
     
     class Config:
         from_attributes = True
+
+class CalendarSession(BaseModel):
+    """Session entry in the calendar, with a summary of its case"""
+    id: int
+    case_id: int
+    session_date: datetime
+    session_notes: Optional[str] = None
+    case_number: str
+    plaintiff: str
+    defendant: str
+    case_type_name: Optional[str] = None
+    judgment_type: Optional[str] = None
+
+class CalendarDay(BaseModel):
+    """Sessions falling on one day"""
+    date: date
+    sessions: List[CalendarSession]
+
+class SessionCalendarResponse(BaseModel):
+    """Sessions in a date range grouped by day; follow next_cursor for the rest of the range"""
+    days: List[CalendarDay]
+    size: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Optional, Literal
+from datetime import datetime, date
+
+class ExportJobCreate(BaseModel):
+    """Background export request"""
+    data_type: Literal["cases", "sessions"]
+    format: str
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    status: Optional[str] = None            # Cases only
+    case_type: Optional[str] = None         # Cases only
+    include_sessions: bool = False          # Cases only: one row per case session
+    gzip: bool = False                      # csv/json/ndjson only
+
+class ExportJob(BaseModel):
+    """Background export job status"""
+    id: str
+    data_type: str
+    format: str
+    status: Literal["queued", "running", "completed", "failed"]
+    rows_done: int = 0
+    total_rows: Optional[int] = None        # Counted when the job starts running
+    progress: float = 0.0                   # Percent of total_rows written
+    filename: Optional[str] = None
+    size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -62,10 +62,12 @@ class PhoneDirectoryResponse(PhoneDirectoryBase):
 class PhoneDirectoryListResponse(BaseModel):
     """Model for paginated phone directory list responses"""
     items: list[PhoneDirectoryResponse]
-    total: int
-    page: int
+    total: Optional[int] = None   # Not computed for keyset (cursor) pages
+    total_exact: Optional[bool] = None   # False when total is only a lower-bound estimate
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class PhoneDirectorySearchRequest(BaseModel):
     """Model for phone directory search requests"""
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Rebuild a database file from a backup without the server.
+
+Backups in the store are given by their manifest (database/backups/store/manifests/*.json);
+zip archives (downloads and backups made before the store) are extracted. Incremental zip
+archives are replayed onto their full base, so any backup in a chain can be restored; the
+parent archives must be in the same directory.
+
+Usage:
+    python restore_backup.py database/backups/store/manifests/legal_cases_backup_....json restored.db
+    python restore_backup.py path/to/backup.zip restored.db
+    python restore_backup.py path/to/backup.zip --list
+
+Stop the server before copying the restored file over database/legal_cases.db.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from utils import backup_archive
+from utils.backup_store import BackupStore
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archive", help="Backup manifest or archive to restore")
+    parser.add_argument("output", nargs="?", help="Database file to create")
+    parser.add_argument("--list", action="store_true", help="Only show the backup, or chain of archives, that would be restored")
+    args = parser.parse_args()
+
+    if args.archive.endswith(".json"):
+        restore_from_store(parser, args)
+        return
+
+    chain = backup_archive.resolve_chain(args.archive)
+    for path, metadata in chain:
+        pages = f"{metadata.get('changed_pages', '?')}/{metadata.get('page_count', '?')} pages"
+        print(f"{os.path.basename(path):50} {metadata.get('backup_type', 'full'):12} {pages:>18}  {metadata.get('backup_date', '')}")
+
+    if args.list:
+        return
+    if not args.output:
+        parser.error("output is required unless --list is given")
+    if os.path.exists(args.output):
+        sys.exit(f"{args.output} already exists")
+
+    applied = backup_archive.extract(args.archive, args.output)
+    print(f"Restored {args.output} from {len(applied)} archive(s); integrity check: {integrity_check(args.output)}")
+
+def restore_from_store(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    # The store is the directory above manifests/
+    store = BackupStore(os.path.dirname(os.path.dirname(os.path.abspath(args.archive))))
+    manifest = store.read_manifest(args.archive)
+    print(f"{manifest['name']:50} {len(manifest['chunks'])} chunks  {manifest['created_at']}")
+
+    if args.list:
+        return
+    if not args.output:
+        parser.error("output is required unless --list is given")
+    if os.path.exists(args.output):
+        sys.exit(f"{args.output} already exists")
+
+    store.materialize(args.archive, args.output)
+    print(f"Restored {args.output}; integrity check: {integrity_check(args.output)}")
+
+def integrity_check(db_path: str) -> str:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import timedelta
-from models.auth import LoginRequest, LoginResponse
+from typing import Optional
+from models.auth import LoginRequest, LoginResponse, TokenRefreshRequest
 from models.user import User
-from utils.auth import auth_utils
+from utils.auth import auth_utils, password_hasher, token_store
 from config.database import db_manager
 from config.settings import settings
 
@@ -13,7 +15,7 @@ async def login(login_data: LoginRequest):
     """User login endpoint"""
     
     # Get user from database
-    users = db_manager.execute_query(
+    users = await db_manager.fetch_all(
         "SELECT * FROM users WHERE username = ? AND is_active = 1",
         (login_data.username,)
     )
@@ -27,13 +29,17 @@ async def login(login_data: LoginRequest):
     user_data = users[0]
     
     # Verify password
-    if not auth_utils.verify_password(login_data.password, user_data['password_hash']):
+    if not await password_hasher.verify(login_data.password, user_data['password_hash']):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="اسم المستخدم أو كلمة المرور غير صحيحة"
         )
     
-    # Create access token
+    refresh_token = await token_store.issue(user_data['id'])
+    return _token_response(user_data, refresh_token)
+
+def _token_response(user_data: dict, refresh_token: str) -> LoginResponse:
+    """Build the login/refresh response with a new access token"""
     token_data = {
         "user_id": user_data['id'],
         "username": user_data['username'],
@@ -41,7 +47,7 @@ async def login(login_data: LoginRequest):
     }
     
     access_token = auth_utils.create_access_token(token_data)
-    expires_in = settings.access_token_expire_hours * 3600  # Convert to seconds
+    expires_in = settings.access_token_expire_minutes * 60  # Convert to seconds
     
     # Create user response (without password hash)
     user_response = User(
@@ -57,22 +63,38 @@ async def login(login_data: LoginRequest):
     return LoginResponse(
         access_token=access_token,
         expires_in=expires_in,
+        refresh_token=refresh_token,
+        refresh_expires_in=settings.refresh_token_expire_days * 86400,
         user=user_response
     )
 
 @router.post("/logout")
-async def logout():
-    """User logout endpoint"""
-    # In JWT, logout is handled client-side by removing the token
-    # Server-side blacklisting can be implemented if needed
+async def logout(
+    logout_data: Optional[TokenRefreshRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+):
+    """User logout endpoint: revokes the presented access token and refresh token"""
+    if credentials:
+        payload = auth_utils.decode_access_token(credentials.credentials)
+        if payload and payload.get("jti"):
+            await token_store.revoke_access_token(payload["jti"], int(payload["exp"]))
+    
+    if logout_data:
+        await token_store.revoke_refresh_token(logout_data.refresh_token)
+    
     return {"message": "تم تسجيل الخروج بنجاح"}
 
-@router.post("/refresh")
-async def refresh_token():
-    """Refresh token endpoint - placeholder for future implementation"""
-    # This would typically involve refresh tokens stored in database
-    # For now, client should re-authenticate when token expires
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="تجديد الرمز المميز غير مدعوم حالياً"
-    )
+@router.post("/refresh", response_model=LoginResponse)
+async def refresh_token(refresh_data: TokenRefreshRequest):
+    """Exchange a refresh token for a new access token and a new refresh token"""
+    
+    # One indexed lookup; the old refresh token is consumed by the rotation
+    rotated = await token_store.rotate(refresh_data.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="رمز التجديد غير صالح أو منتهي الصلاحية"
+        )
+    
+    user_data, new_refresh_token = rotated
+    return _token_response(user_data, new_refresh_token)
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
 from fastapi.responses import FileResponse
-from typing import Dict, Any, List
+from starlette.background import BackgroundTask
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime
+import logging
 import os
-import sqlite3
 import shutil
+import sqlite3
 import json
-import zipfile
+import threading
+import time
+import uuid
 import tempfile
 from io import BytesIO
 
@@ -14,9 +19,18 @@ from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
 from config.database import db_manager
 from config.settings import settings
+from utils import backup_archive
+from utils.backup_store import BackupStore, select_retained
 
 router = APIRouter(prefix="/backup", tags=["Database Backup"])
 
+logger = logging.getLogger(__name__)
+
+BACKUP_JOB_HISTORY = 20           # Finished backup jobs kept for the status endpoint
+
+class _SnapshotRestarted(Exception):
+    """Raised from the backup progress callback to abandon a stepped copy"""
+
 class BackupManager:
     """Comprehensive database backup and restore manager"""
     
@@ -24,63 +38,261 @@ class BackupManager:
         self.db_path = db_manager.db_path
         self.backup_dir = os.path.join(os.path.dirname(self.db_path), "backups")
         os.makedirs(self.backup_dir, exist_ok=True)
+        self.store = BackupStore(os.path.join(self.backup_dir, "store"), settings.backup_chunk_size_kb * 1024)
+        # Background backup jobs, newest last
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
     
-    def create_full_backup(self, user_id: int) -> Dict[str, Any]:
-        """Create a complete database backup with metadata"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"legal_cases_backup_{timestamp}.zip"
-        backup_path = os.path.join(self.backup_dir, backup_name)
-        
-        # Get database statistics for metadata
-        stats = self._get_backup_stats()
-        
-        # Create backup metadata
-        metadata = {
-            "backup_date": datetime.now().isoformat(),
-            "backup_type": "full",
-            "created_by": user_id,
-            "database_size": os.path.getsize(self.db_path),
-            "statistics": stats,
-            "version": settings.app_version,
-            "tables": self._get_table_info()
-        }
+    def create_backup(self, user_id: int,
+                      progress: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, Any]:
+        """Create a database backup with metadata.
+        
+        The live database is copied with SQLite's online backup API, then the snapshot is
+        written to the deduplicated backup store, which only adds the chunks no earlier
+        backup already holds. progress(phase, done, total) reports pages copied in the
+        "snapshot" phase and bytes stored in the "store" phase.
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        backup_name = f"legal_cases_backup_{timestamp}"
+        snapshot_path = os.path.join(self.backup_dir, f"snapshot_{timestamp}.db.tmp")
         
-        # Create ZIP backup with database and metadata
-        with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add database file
-            zipf.write(self.db_path, "legal_cases.db")
+        try:
+            self._snapshot(snapshot_path, progress)
             
-            # Add metadata
-            zipf.writestr("backup_metadata.json", json.dumps(metadata, indent=2, ensure_ascii=False))
+            # Metadata describes the snapshot, not the live database that kept changing
+            snapshot = sqlite3.connect(snapshot_path)
+            snapshot.row_factory = sqlite3.Row
+            try:
+                metadata = {
+                    "backup_date": datetime.now().isoformat(),
+                    "backup_type": "full",
+                    "created_by": user_id,
+                    "database_size": os.path.getsize(snapshot_path),
+                    "statistics": self._get_backup_stats(snapshot),
+                    "version": settings.app_version,
+                    "tables": self._get_table_info(snapshot)
+                }
+                schemas = {"table_schemas.sql": self._export_table_schemas(snapshot)}
+            finally:
+                snapshot.close()
             
-            # Add table schemas
-            schemas = self._export_table_schemas()
-            zipf.writestr("table_schemas.sql", schemas)
+            manifest = self.store.write(backup_name, snapshot_path, metadata, schemas, progress)
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
         
-        # Store backup info in database
+        # Create backups table if not exists
+        self._ensure_backups_table()
+        return self._register_backup(manifest, user_id, datetime.now().isoformat())
+    
+    def _register_backup(self, manifest: Dict[str, Any], user_id: int, created_at: str) -> Dict[str, Any]:
+        """Insert the backups row describing a backup in the store"""
+        metadata = dict(
+            manifest["metadata"],
+            storage="store",
+            chunk_count=len(manifest["chunks"]),
+            new_chunks=manifest["new_chunks"],
+            added_bytes=manifest["added_bytes"]
+        )
         backup_info = {
-            "backup_name": backup_name,
-            "backup_path": backup_path,
-            "backup_size": os.path.getsize(backup_path),
+            "backup_name": manifest["name"],
+            "backup_path": self.store.manifest_path(manifest["name"]),
+            "backup_size": manifest["size"],
             "created_by": user_id,
-            "created_at": datetime.now().isoformat(),
+            "created_at": created_at,
             "metadata": metadata
         }
         
-        # Create backups table if not exists
-        self._ensure_backups_table()
-        
-        # Insert backup record
-        db_manager.execute_write(
+        backup_info["id"] = db_manager.execute_write(
             """INSERT INTO backups 
                (backup_name, backup_path, backup_size, created_by, created_at, metadata) 
                VALUES (?, ?, ?, ?, ?, ?)""",
-            (backup_name, backup_path, backup_info["backup_size"], 
-             user_id, backup_info["created_at"], json.dumps(metadata))
+            (backup_info["backup_name"], backup_info["backup_path"], backup_info["backup_size"], 
+             user_id, created_at, json.dumps(metadata))
         )
         
         return backup_info
     
+    def reconcile_catalog(self, user_id: Optional[int] = None) -> List[str]:
+        """Register backups in the store that have no row in the backups table; returns their names.
+        
+        The backups table lives in the database it describes, so restoring an older backup
+        drops the rows of every backup made after it, including the one taken just before
+        the restore, while their manifests stay in the store. Unlisted, they could neither be
+        restored nor removed by the retention policy, and their chunks would never be freed.
+        Rows are attributed to their creator, or to user_id (by default the first admin)
+        when the restored database has no such user.
+        """
+        self._ensure_backups_table()
+        missing = self._unlisted_manifests()
+        if not missing:
+            return []
+        
+        users = {row["id"] for row in db_manager.execute_query("SELECT id FROM users")}
+        if user_id is None:
+            admin = db_manager.execute_query(
+                "SELECT id FROM users WHERE user_type = 'admin' ORDER BY id LIMIT 1"
+            )
+            user_id = admin[0]["id"] if admin else None
+        
+        registered = []
+        for manifest in missing:
+            name = manifest["name"]
+            created_by = manifest["metadata"].get("created_by")
+            if created_by not in users:
+                created_by = user_id
+            if created_by is None:
+                logger.warning("Backup %s has no user to be registered under", name)
+                continue
+            self._register_backup(manifest, created_by, manifest["created_at"])
+            registered.append(name)
+        
+        if registered:
+            logger.info("Registered %d backups missing from the backups table: %s",
+                        len(registered), ", ".join(registered))
+        return registered
+    
+    def _unlisted_manifests(self) -> List[Dict[str, Any]]:
+        """Manifests of the backups in the store that have no row in the backups table"""
+        known = {row["backup_name"] for row in db_manager.execute_query("SELECT backup_name FROM backups")}
+        return [
+            self.store.read_manifest(self.store.manifest_path(name))
+            for name in sorted(self.store.names()) if name not in known
+        ]
+    
+    def _snapshot(self, snapshot_path: str, progress: Optional[Callable[[str, int, int], None]] = None):
+        """Copy the live database through the SQLite backup API.
+        
+        The copy advances backup_pages_per_step pages at a time and pauses between steps, so
+        writers get the database in between. A write from another connection makes SQLite
+        restart the copy from the first page; after backup_max_restarts restarts the copy is
+        finished in one step from a single read snapshot, which in WAL mode does not block
+        writers. Either way the file is a consistent snapshot.
+        """
+        pause = settings.backup_step_sleep_ms / 1000
+        state = {"remaining": None, "restarts": 0}
+        
+        def report(status, remaining, total):
+            if progress:
+                progress("snapshot", total - remaining, total)
+        
+        def step(status, remaining, total):
+            if state["remaining"] is not None and remaining > state["remaining"]:
+                state["restarts"] += 1
+                if state["restarts"] > settings.backup_max_restarts:
+                    raise _SnapshotRestarted()
+            state["remaining"] = remaining
+            report(status, remaining, total)
+            if remaining and pause > 0:
+                # Called after each step while no lock is held
+                time.sleep(pause)
+        
+        source = sqlite3.connect(self.db_path, timeout=settings.db_busy_timeout_ms / 1000)
+        try:
+            target = sqlite3.connect(snapshot_path)
+            try:
+                try:
+                    source.backup(target, pages=max(1, settings.backup_pages_per_step), progress=step)
+                except _SnapshotRestarted:
+                    logger.info("Backup restarted %d times by concurrent writes; copying in one step",
+                                state["restarts"])
+                    source.backup(target, pages=-1, progress=report)
+                # The copy inherits WAL mode; make the archived file self-contained
+                target.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                target.close()
+        finally:
+            source.close()
+    
+    def start_backup(self, user_id: int) -> Dict[str, Any]:
+        """Queue a backup on the background worker; a backup already in progress is returned instead"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job["status"] in ("queued", "running"):
+                    return self._public_job(job)
+            
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": "queued",
+                "phase": None,
+                "done": 0,
+                "total": 0,
+                "created_by": user_id,
+                "created_at": datetime.now(),
+                "finished_at": None,
+                "backup": None,
+                "error": None
+            }
+            self._jobs[job["id"]] = job
+            
+            # Keep the most recent jobs only
+            finished = [job_id for job_id, old in self._jobs.items() if old["finished_at"] is not None]
+            for job_id in finished[:max(0, len(self._jobs) - BACKUP_JOB_HISTORY)]:
+                del self._jobs[job_id]
+            
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+            self._executor.submit(self._run_backup_job, job)
+            return self._public_job(job)
+    
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        """Get the status and progress of a backup job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Backup job not found")
+            return self._public_job(job)
+    
+    def _run_backup_job(self, job: Dict[str, Any]):
+        def progress(phase: str, done: int, total: int):
+            job.update(phase=phase, done=done, total=total)
+        
+        job["status"] = "running"
+        try:
+            job["backup"] = self.create_backup(job["created_by"], progress)
+            job["status"] = "completed"
+        except Exception as e:
+            logger.exception("Backup job %s failed", job["id"])
+            job["error"] = e.detail if isinstance(e, HTTPException) else str(e)
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = datetime.now()
+        
+        if job["status"] == "completed":
+            try:
+                self.apply_retention()
+            except Exception:
+                logger.exception("Applying the backup retention policy failed")
+    
+    @staticmethod
+    def _public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+        if job["status"] == "completed":
+            progress = 100.0
+        elif job["total"]:
+            progress = round(job["done"] / job["total"] * 100, 1)
+        else:
+            progress = 0.0
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "phase": job["phase"],
+            "progress": progress,   # Percent of the current phase
+            "done": job["done"],
+            "total": job["total"],
+            "created_at": job["created_at"].isoformat(),
+            "finished_at": job["finished_at"].isoformat() if job["finished_at"] else None,
+            "backup": job["backup"],
+            "error": job["error"]
+        }
+    
+    def shutdown(self):
+        """Stop the backup worker; a running backup finishes in the background"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
     def list_backups(self) -> List[Dict[str, Any]]:
         """List all available backups with metadata"""
         self._ensure_backups_table()
@@ -121,29 +333,46 @@ class BackupManager:
             raise HTTPException(status_code=404, detail="Backup file not found")
         
         # Create a backup of current database before restore
-        current_backup = self.create_full_backup(user_id)
+        current_backup = self.create_backup(user_id)
         
         try:
-            # Extract and restore from backup
-            with zipfile.ZipFile(backup_path, 'r') as zipf:
-                # Extract database to temporary location
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    zipf.extract("legal_cases.db", temp_dir)
-                    temp_db_path = os.path.join(temp_dir, "legal_cases.db")
-                    
-                    # Validate extracted database
-                    if not self._validate_database(temp_db_path):
-                        raise HTTPException(status_code=400, detail="Invalid backup database")
-                    
-                    # Replace current database
-                    shutil.copy2(temp_db_path, self.db_path)
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_db_path = os.path.join(temp_dir, "legal_cases.db")
+                self._materialize(backup_path, temp_db_path)
+                
+                # Validate extracted database
+                if not self._validate_database(temp_db_path):
+                    raise HTTPException(status_code=400, detail="Invalid backup database")
+                
+                # Replace current database through the SQLite backup API so the
+                # copy is transactional and consistent with the WAL of pooled connections
+                source = sqlite3.connect(temp_db_path)
+                try:
+                    with db_manager.get_connection() as target:
+                        source.backup(target)
+                finally:
+                    source.close()
+
+                # Drop pooled connections so they reopen against the restored schema
+                db_manager.close_all()
             
-            # Log restore operation
+            # The restored backups table predates every backup made after this one
+            try:
+                registered = self.reconcile_catalog(user_id)
+            except Exception:
+                logger.exception("Registering backups after the restore failed")
+                registered = []
+            
+            # Log restore operation; ids in the restored table may differ from before
+            restored = db_manager.execute_query(
+                "SELECT id FROM backups WHERE backup_name = ?", (backup["backup_name"],)
+            )
             db_manager.execute_write(
                 """INSERT INTO backup_operations 
                    (operation_type, backup_id, user_id, operation_date, status) 
                    VALUES (?, ?, ?, ?, ?)""",
-                ("restore", backup_id, user_id, datetime.now().isoformat(), "success")
+                ("restore", restored[0]["id"] if restored else None, user_id,
+                 datetime.now().isoformat(), "success")
             )
             
             return {
@@ -151,7 +380,8 @@ class BackupManager:
                 "message": "Database restored successfully",
                 "backup_name": backup["backup_name"],
                 "restore_date": datetime.now().isoformat(),
-                "current_backup_created": current_backup["backup_name"]
+                "current_backup_created": current_backup["backup_name"],
+                "backups_registered": registered
             }
             
         except Exception as e:
@@ -164,31 +394,149 @@ class BackupManager:
             )
             raise HTTPException(status_code=500, detail=f"Restore failed: {str(e)}")
     
-    def _get_backup_stats(self) -> Dict[str, int]:
+    def _materialize(self, backup_path: str, output_path: str):
+        """Rebuild a backup's database file from the store or from a zip archive"""
+        if backup_path.endswith(".json"):
+            self.store.materialize(backup_path, output_path)
+        else:
+            # Zip archives from before the store; incrementals are replayed onto their full base
+            backup_archive.extract(backup_path, output_path)
+    
+    def export_archive(self, backup: Dict[str, Any], archive_path: str):
+        """Write a backup from the store as a standalone zip archive for download"""
+        manifest = self.store.read_manifest(backup["backup_path"])
+        db_path = archive_path + ".db.tmp"
+        try:
+            self.store.materialize(backup["backup_path"], db_path)
+            extra_files = {name: self.store.read_file(manifest, name) for name in manifest["files"]}
+            backup_archive.write_full_archive(db_path, archive_path, dict(manifest["metadata"]), extra_files)
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+    
+    def delete_backup(self, backup_id: int) -> Dict[str, Any]:
+        """Delete a backup and the stored chunks no other backup uses"""
+        backup = db_manager.execute_query(
+            "SELECT * FROM backups WHERE id = ?", (backup_id,)
+        )
+        
+        if not backup:
+            raise HTTPException(status_code=404, detail="Backup not found")
+        
+        # Incremental archives from before the store cannot be restored without their parent
+        dependents = db_manager.execute_query(
+            "SELECT backup_name FROM backups WHERE json_extract(metadata, '$.parent_backup_id') = ?", (backup_id,)
+        )
+        if dependents:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Backup is the parent of incremental backup {dependents[0]['backup_name']}; delete that first"
+            )
+        
+        try:
+            self._remove_backup(backup[0])
+            garbage = self.store.collect_garbage()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to delete backup: {str(e)}")
+        
+        return {
+            "status": "success",
+            "message": "Backup deleted successfully",
+            "freed_bytes": garbage["freed_bytes"]
+        }
+    
+    def _remove_backup(self, backup: Dict[str, Any]):
+        if backup["backup_path"].endswith(".json"):
+            self.store.delete(backup["backup_path"])
+        elif os.path.exists(backup["backup_path"]):
+            os.remove(backup["backup_path"])
+        # The operation history outlives the backup it refers to
+        db_manager.execute_write("UPDATE backup_operations SET backup_id = NULL WHERE backup_id = ?", (backup["id"],))
+        db_manager.execute_write("DELETE FROM backups WHERE id = ?", (backup["id"],))
+    
+    def apply_retention(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Delete the backups the retention policy no longer keeps, then their unused chunks.
+        
+        The policy keeps the backup_keep_last newest backups plus the newest backup of each of
+        the last backup_keep_hourly hours, backup_keep_daily days and backup_keep_weekly weeks
+        that have one; with every count at 0 (the default) nothing is deleted. Archives that a
+        kept incremental backup is replayed from are kept too. A dry run writes nothing, not
+        even the registration of unlisted backups.
+        """
+        # Backups left out of the table by a restore are subject to the policy too
+        if not dry_run:
+            self.reconcile_catalog()
+        backups = db_manager.execute_query(
+            "SELECT id, backup_name, backup_path, created_at, metadata FROM backups"
+        )
+        if dry_run:
+            backups += [
+                {"id": manifest["name"], "backup_name": manifest["name"],
+                 "backup_path": self.store.manifest_path(manifest["name"]), "created_at": manifest["created_at"]}
+                for manifest in self._unlisted_manifests()
+            ]
+        
+        keep = select_retained(
+            backups,
+            keep_last=settings.backup_keep_last,
+            hourly=settings.backup_keep_hourly,
+            daily=settings.backup_keep_daily,
+            weekly=settings.backup_keep_weekly
+        )
+        
+        parents = {}
+        for backup in backups:
+            try:
+                parents[backup["id"]] = json.loads(backup.get("metadata") or "{}").get("parent_backup_id")
+            except ValueError:
+                parents[backup["id"]] = None
+        for backup_id in list(keep):
+            parent = parents.get(backup_id)
+            while parent is not None and parent not in keep:
+                keep.add(parent)
+                parent = parents.get(parent)
+        
+        removed = [backup for backup in backups if backup["id"] not in keep]
+        garbage = None
+        if not dry_run:
+            for backup in removed:
+                logger.info("Retention policy removes backup %s", backup["backup_name"])
+                self._remove_backup(backup)
+            garbage = self.store.collect_garbage()
+        
+        return {
+            "dry_run": dry_run,
+            "kept": [backup["backup_name"] for backup in backups if backup["id"] in keep],
+            "removed": [backup["backup_name"] for backup in removed],
+            "garbage_collected": garbage,
+            "store": self.store.usage()
+        }
+    
+    def _get_backup_stats(self, conn: sqlite3.Connection) -> Dict[str, int]:
         """Get database statistics for backup metadata"""
         stats = {}
         tables = ["cases", "users", "case_types", "case_sessions", "case_notes"]
         
         for table in tables:
             try:
-                result = db_manager.execute_query(f"SELECT COUNT(*) as count FROM {table}")
-                stats[table] = result[0]["count"]
+                result = conn.execute(f"SELECT COUNT(*) as count FROM {table}").fetchone()
+                stats[table] = result["count"]
             except:
                 stats[table] = 0
         
         return stats
     
-    def _get_table_info(self) -> List[Dict[str, Any]]:
+    def _get_table_info(self, conn: sqlite3.Connection) -> List[Dict[str, Any]]:
         """Get information about all tables"""
-        tables = db_manager.execute_query(
+        tables = conn.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
-        )
+        ).fetchall()
         
         table_info = []
         for table in tables:
             table_name = table["name"]
             try:
-                count = db_manager.execute_query(f"SELECT COUNT(*) as count FROM {table_name}")[0]["count"]
+                count = conn.execute(f'SELECT COUNT(*) as count FROM "{table_name}"').fetchone()["count"]
                 table_info.append({
                     "name": table_name,
                     "record_count": count
@@ -201,14 +549,14 @@ class BackupManager:
         
         return table_info
     
-    def _export_table_schemas(self) -> str:
+    def _export_table_schemas(self, conn: sqlite3.Connection) -> str:
         """Export table schemas as SQL"""
         schemas = []
         
         # Get all tables
-        tables = db_manager.execute_query(
+        tables = conn.execute(
             "SELECT sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
-        )
+        ).fetchall()
         
         for table in tables:
             if table["sql"]:
@@ -269,20 +617,25 @@ class BackupManager:
 # Initialize backup manager
 backup_manager = BackupManager()
 
-@router.post("/create")
+@router.post("/create", status_code=202)
 async def create_backup(
     current_user: User = Depends(get_admin_user)
 ):
-    """Create a new database backup (Admin only)"""
-    try:
-        backup_info = backup_manager.create_full_backup(current_user.id)
-        return {
-            "status": "success",
-            "message": "Backup created successfully",
-            "backup": backup_info
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Backup creation failed: {str(e)}")
+    """Start a database backup in the background (Admin only); poll /backup/jobs/{job_id}"""
+    job = backup_manager.start_backup(current_user.id)
+    return {
+        "status": "accepted",
+        "message": "Backup started",
+        "job": job
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_backup_job(
+    job_id: str,
+    current_user: User = Depends(get_admin_user)
+):
+    """Get backup job status and progress (Admin only)"""
+    return backup_manager.get_job(job_id)
 
 @router.get("/list")
 async def list_backups(
@@ -290,7 +643,7 @@ async def list_backups(
 ):
     """List all available backups (Admin only)"""
     try:
-        backups = backup_manager.list_backups()
+        backups = await db_manager.run_sync(backup_manager.list_backups)
         return {
             "backups": backups,
             "total": len(backups)
@@ -304,7 +657,7 @@ async def restore_backup(
     current_user: User = Depends(get_admin_user)
 ):
     """Restore database from backup (Admin only)"""
-    return backup_manager.restore_backup(backup_id, current_user.id)
+    return await db_manager.run_sync(backup_manager.restore_backup, backup_id, current_user.id)
 
 @router.get("/download/{backup_id}")
 async def download_backup(
@@ -312,7 +665,7 @@ async def download_backup(
     current_user: User = Depends(get_admin_user)
 ):
     """Download backup file (Admin only)"""
-    backup = db_manager.execute_query(
+    backup = await db_manager.fetch_all(
         "SELECT * FROM backups WHERE id = ?", (backup_id,)
     )
     
@@ -325,10 +678,27 @@ async def download_backup(
     if not os.path.exists(backup_path):
         raise HTTPException(status_code=404, detail="Backup file not found")
     
+    if not backup_path.endswith(".json"):
+        return FileResponse(
+            path=backup_path,
+            filename=backup["backup_name"],
+            media_type="application/zip"
+        )
+    
+    # Backups in the store are assembled into a standalone archive for download
+    temp_dir = tempfile.mkdtemp(prefix="backup_download_")
+    archive_path = os.path.join(temp_dir, f"{backup['backup_name']}.zip")
+    try:
+        await db_manager.run_sync(backup_manager.export_archive, backup, archive_path)
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    
     return FileResponse(
-        path=backup_path,
-        filename=backup["backup_name"],
-        media_type="application/zip"
+        path=archive_path,
+        filename=os.path.basename(archive_path),
+        media_type="application/zip",
+        background=BackgroundTask(shutil.rmtree, temp_dir, ignore_errors=True)
     )
 
 @router.delete("/delete/{backup_id}")
@@ -337,39 +707,22 @@ async def delete_backup(
     current_user: User = Depends(get_admin_user)
 ):
     """Delete a backup (Admin only)"""
-    backup = db_manager.execute_query(
-        "SELECT * FROM backups WHERE id = ?", (backup_id,)
-    )
-    
-    if not backup:
-        raise HTTPException(status_code=404, detail="Backup not found")
-    
-    backup = backup[0]
-    backup_path = backup["backup_path"]
-    
-    try:
-        # Delete file
-        if os.path.exists(backup_path):
-            os.remove(backup_path)
-        
-        # Delete record
-        db_manager.execute_write(
-            "DELETE FROM backups WHERE id = ?", (backup_id,)
-        )
-        
-        return {
-            "status": "success",
-            "message": "Backup deleted successfully"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to delete backup: {str(e)}")
+    return await db_manager.run_sync(backup_manager.delete_backup, backup_id)
+
+@router.post("/prune")
+async def prune_backups(
+    dry_run: bool = Query(False, description="Only report which backups the policy would delete"),
+    current_user: User = Depends(get_admin_user)
+):
+    """Apply the backup retention policy and collect unused chunks (Admin only)"""
+    return await db_manager.run_sync(backup_manager.apply_retention, dry_run)
 
 @router.get("/operations")
 async def get_backup_operations(
     current_user: User = Depends(get_admin_user)
 ):
     """Get backup operation history (Admin only)"""
-    operations = db_manager.execute_query("""
+    operations = await db_manager.fetch_all("""
         SELECT bo.*, u.full_name as user_name, b.backup_name
         FROM backup_operations bo
         LEFT JOIN users u ON bo.user_id = u.id
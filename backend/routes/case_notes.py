@@ -4,7 +4,7 @@ from models.case_note import CaseNote, CaseNoteCreate, CaseNoteUpdate
 from models.base import PaginatedResponse
 from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
-from config.database import db_manager
+from config.database import db_manager, UnitOfWork
 from config.settings import settings
 from utils.database import db_utils
 
@@ -16,12 +16,14 @@ async def get_case_notes(
     page: int = Query(1, ge=1),
     size: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     current_user: User = Depends(get_current_user)
 ):
     """Get all notes for a specific case"""
     
     # Check if case exists
-    cases = db_manager.execute_query("SELECT id FROM cases WHERE id = ?", (case_id,))
+    cases = await db_manager.fetch_all("SELECT id FROM cases WHERE id = ?", (case_id,))
     if not cases:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,28 +31,52 @@ async def get_case_notes(
         )
     
     base_query = """
-    SELECT cn.*, 
+    SELECT cn.*, {rank_column}
            cu.full_name as created_by_name,
            uu.full_name as updated_by_name
     FROM case_notes cn
     LEFT JOIN users cu ON cn.created_by = cu.id
     LEFT JOIN users uu ON cn.updated_by = uu.id
-    WHERE cn.case_id = ?
     """
     
-    params = [case_id]
+    params = []
+    rank_column = ""
+    keys = [("cn.created_at", "created_at", True), ("cn.id", "id", True)]
+    
+    # Add search condition for note text: full-text index ranked by bm25 when the term is long enough
+    fts_query = db_utils.build_fts_query(search) if search else None
+    if fts_query:
+        base_query += """
+    JOIN (SELECT rowid AS note_id, rank
+          FROM case_notes_fts WHERE case_notes_fts MATCH ?) m ON m.note_id = cn.id
+    """
+        params.append(fts_query)
+        rank_column = "m.rank as search_rank,"
+        keys = [("m.rank", "search_rank", False), ("cn.id", "id", True)]
+    
+    base_query = base_query.format(rank_column=rank_column)
+    base_query += " WHERE cn.case_id = ?"
+    params.append(case_id)
     
-    # Add search condition for note text
-    if search:
+    if search and not fts_query:
         search_condition, search_params = db_utils.build_search_conditions(
             search, ['cn.note_text']
         )
         base_query += f" AND {search_condition}"
         params.extend(search_params)
     
-    base_query += " ORDER BY cn.created_at DESC"
+    # Resume after the cursor row
+    if cursor:
+        keyset_condition, keyset_params = db_utils.build_keyset_condition(keys, cursor)
+        base_query += f" AND {keyset_condition}"
+        params.extend(keyset_params)
     
-    result = db_utils.paginate_query(base_query, tuple(params), page, size)
+    base_query += f" ORDER BY {db_utils.keyset_order_by(keys)}"
+    
+    if cursor:
+        result = await db_utils.keyset_paginate(base_query, tuple(params), keys, size)
+    else:
+        result = await db_utils.paginate(base_query, tuple(params), page, size, keys, include_total)
     
     # Transform results to include user info
     for item in result['items']:
@@ -61,6 +87,7 @@ async def get_case_notes(
         # Remove temporary fields
         item.pop('created_by_name', None)
         item.pop('updated_by_name', None)
+        item.pop('search_rank', None)
     
     return PaginatedResponse(**result)
 
@@ -72,34 +99,34 @@ async def create_case_note(
 ):
     """Add new note to case"""
     
-    # Check if case exists
-    cases = db_manager.execute_query("SELECT id FROM cases WHERE id = ?", (case_id,))
-    if not cases:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="القضية غير موجودة"
+    def create_in_transaction(uow: UnitOfWork) -> dict:
+        # Check if case exists
+        if not uow.execute_query_one("SELECT id FROM cases WHERE id = ?", (case_id,)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="القضية غير موجودة"
+            )
+        
+        # Create note
+        note_id = uow.execute_write(
+            """INSERT INTO case_notes (case_id, note_text, created_by, updated_by)
+               VALUES (?, ?, ?, ?)""",
+            (case_id, note_data.note_text, current_user.id, current_user.id)
+        )
+        
+        # Get created note
+        return uow.execute_query_one(
+            """SELECT cn.*, 
+                      cu.full_name as created_by_name,
+                      uu.full_name as updated_by_name
+               FROM case_notes cn
+               LEFT JOIN users cu ON cn.created_by = cu.id
+               LEFT JOIN users uu ON cn.updated_by = uu.id
+               WHERE cn.id = ?""",
+            (note_id,)
         )
     
-    # Create note
-    note_id = db_manager.execute_write(
-        """INSERT INTO case_notes (case_id, note_text, created_by, updated_by)
-           VALUES (?, ?, ?, ?)""",
-        (case_id, note_data.note_text, current_user.id, current_user.id)
-    )
-    
-    # Get created note
-    notes = db_manager.execute_query(
-        """SELECT cn.*, 
-                  cu.full_name as created_by_name,
-                  uu.full_name as updated_by_name
-           FROM case_notes cn
-           LEFT JOIN users cu ON cn.created_by = cu.id
-           LEFT JOIN users uu ON cn.updated_by = uu.id
-           WHERE cn.id = ?""",
-        (note_id,)
-    )
-    
-    note = notes[0]
+    note = await db_manager.run_in_transaction(create_in_transaction)
     
     # Add user info
     if note.get('created_by'):
@@ -120,7 +147,7 @@ async def get_case_note(
 ):
     """Get note by ID"""
     
-    notes = db_manager.execute_query(
+    notes = await db_manager.fetch_all(
         """SELECT cn.*, 
                   cu.full_name as created_by_name,
                   uu.full_name as updated_by_name
@@ -160,7 +187,7 @@ async def update_case_note(
     """Update case note"""
     
     # Check if note exists
-    existing = db_manager.execute_query("SELECT id FROM case_notes WHERE id = ?", (note_id,))
+    existing = await db_manager.fetch_all("SELECT id FROM case_notes WHERE id = ?", (note_id,))
     if not existing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -189,7 +216,7 @@ async def update_case_note(
     query = f"UPDATE case_notes SET {', '.join(update_fields)} WHERE id = ?"
     params.append(note_id)
     
-    db_manager.execute_write(query, tuple(params))
+    await db_manager.execute(query, tuple(params))
     
     # Return updated note
     return await get_case_note(note_id, current_user)
@@ -202,7 +229,7 @@ async def delete_case_note(
     """Delete case note (Admin only)"""
     
     # Check if note exists
-    existing = db_manager.execute_query("SELECT id FROM case_notes WHERE id = ?", (note_id,))
+    existing = await db_manager.fetch_all("SELECT id FROM case_notes WHERE id = ?", (note_id,))
     if not existing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -210,7 +237,7 @@ async def delete_case_note(
         )
     
     # Delete note (hard delete)
-    rows_affected = db_manager.execute_write("DELETE FROM case_notes WHERE id = ?", (note_id,))
+    rows_affected = await db_manager.execute("DELETE FROM case_notes WHERE id = ?", (note_id,))
     
     if rows_affected == 0:
         raise HTTPException(
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Optional
-from models.case_session import CaseSession, CaseSessionCreate, CaseSessionUpdate
+from datetime import date, timedelta
+from models.case_session import CaseSession, CaseSessionCreate, CaseSessionUpdate, SessionCalendarResponse
 from models.base import PaginatedResponse
 from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
-from config.database import db_manager
+from config.database import db_manager, UnitOfWork
 from config.settings import settings
 from utils.database import db_utils
 
@@ -15,12 +16,14 @@ async def get_case_sessions(
     case_id: int,
     page: int = Query(1, ge=1),
     size: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     current_user: User = Depends(get_current_user)
 ):
     """Get all sessions for a specific case"""
     
     # Check if case exists
-    cases = db_manager.execute_query("SELECT id FROM cases WHERE id = ?", (case_id,))
+    cases = await db_manager.fetch_all("SELECT id FROM cases WHERE id = ?", (case_id,))
     if not cases:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,17 +32,35 @@ async def get_case_sessions(
     
     base_query = """
     SELECT cs.*, 
+           COALESCE(cs.session_date, '') as sort_session_date,
            cu.full_name as created_by_name,
            uu.full_name as updated_by_name
     FROM case_sessions cs
     LEFT JOIN users cu ON cs.created_by = cu.id
     LEFT JOIN users uu ON cs.updated_by = uu.id
     WHERE cs.case_id = ?
-    ORDER BY cs.session_date DESC, cs.created_at DESC
     """
     
-    params = (case_id,)
-    result = db_utils.paginate_query(base_query, params, page, size)
+    params = [case_id]
+    # Undated sessions sort last, as NULLs do in a descending sort
+    keys = [
+        ("COALESCE(cs.session_date, '')", "sort_session_date", True),
+        ("cs.created_at", "created_at", True),
+        ("cs.id", "id", True)
+    ]
+    
+    # Resume after the cursor row
+    if cursor:
+        keyset_condition, keyset_params = db_utils.build_keyset_condition(keys, cursor)
+        base_query += f" AND {keyset_condition}"
+        params.extend(keyset_params)
+    
+    base_query += f" ORDER BY {db_utils.keyset_order_by(keys)}"
+    
+    if cursor:
+        result = await db_utils.keyset_paginate(base_query, tuple(params), keys, size)
+    else:
+        result = await db_utils.paginate(base_query, tuple(params), page, size, keys, include_total)
     
     # Transform results to include user info
     for item in result['items']:
@@ -50,6 +71,7 @@ async def get_case_sessions(
         # Remove temporary fields
         item.pop('created_by_name', None)
         item.pop('updated_by_name', None)
+        item.pop('sort_session_date', None)
     
     return PaginatedResponse(**result)
 
@@ -61,35 +83,35 @@ async def create_case_session(
 ):
     """Add new session to case"""
     
-    # Check if case exists
-    cases = db_manager.execute_query("SELECT id FROM cases WHERE id = ?", (case_id,))
-    if not cases:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="القضية غير موجودة"
+    def create_in_transaction(uow: UnitOfWork) -> dict:
+        # Check if case exists
+        if not uow.execute_query_one("SELECT id FROM cases WHERE id = ?", (case_id,)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="القضية غير موجودة"
+            )
+        
+        # Create session
+        session_id = uow.execute_write(
+            """INSERT INTO case_sessions (case_id, session_date, session_notes, created_by, updated_by)
+               VALUES (?, ?, ?, ?, ?)""",
+            (case_id, session_data.session_date, session_data.session_notes,
+             current_user.id, current_user.id)
+        )
+        
+        # Get created session
+        return uow.execute_query_one(
+            """SELECT cs.*, 
+                      cu.full_name as created_by_name,
+                      uu.full_name as updated_by_name
+               FROM case_sessions cs
+               LEFT JOIN users cu ON cs.created_by = cu.id
+               LEFT JOIN users uu ON cs.updated_by = uu.id
+               WHERE cs.id = ?""",
+            (session_id,)
         )
     
-    # Create session
-    session_id = db_manager.execute_write(
-        """INSERT INTO case_sessions (case_id, session_date, session_notes, created_by, updated_by)
-           VALUES (?, ?, ?, ?, ?)""",
-        (case_id, session_data.session_date, session_data.session_notes,
-         current_user.id, current_user.id)
-    )
-    
-    # Get created session
-    sessions = db_manager.execute_query(
-        """SELECT cs.*, 
-                  cu.full_name as created_by_name,
-                  uu.full_name as updated_by_name
-           FROM case_sessions cs
-           LEFT JOIN users cu ON cs.created_by = cu.id
-           LEFT JOIN users uu ON cs.updated_by = uu.id
-           WHERE cs.id = ?""",
-        (session_id,)
-    )
-    
-    session = sessions[0]
+    session = await db_manager.run_in_transaction(create_in_transaction)
     
     # Add user info
     if session.get('created_by'):
@@ -103,6 +125,60 @@ async def create_case_session(
     
     return CaseSession(**session)
 
+@router.get("/sessions/calendar", response_model=SessionCalendarResponse)
+async def get_sessions_calendar(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    size: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Get sessions between two dates (inclusive) with their case summary, grouped by day.
+    
+    Pages are cut by keyset on (session time, id), so a day may continue on the next page;
+    pass next_cursor as cursor to fetch it.
+    """
+    
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="تاريخ النهاية يجب أن يكون بعد تاريخ البداية"
+        )
+    
+    # datetime(session_date) matches idx_case_sessions_session_at, so the range is an index seek
+    base_query = """
+    SELECT cs.id, cs.case_id, cs.session_date, cs.session_notes,
+           datetime(cs.session_date) as session_at,
+           c.case_number, c.plaintiff, c.defendant, c.judgment_type,
+           ct.name as case_type_name
+    FROM case_sessions cs
+    JOIN cases c ON c.id = cs.case_id
+    LEFT JOIN case_types ct ON ct.id = c.case_type_id
+    WHERE datetime(cs.session_date) >= ? AND datetime(cs.session_date) < ?
+    """
+    params = [f"{date_from.isoformat()} 00:00:00", f"{(date_to + timedelta(days=1)).isoformat()} 00:00:00"]
+    keys = [("datetime(cs.session_date)", "session_at", False), ("cs.id", "id", False)]
+    
+    # Resume after the cursor row
+    if cursor:
+        keyset_condition, keyset_params = db_utils.build_keyset_condition(keys, cursor)
+        base_query += f" AND {keyset_condition}"
+        params.extend(keyset_params)
+    
+    base_query += f" ORDER BY {db_utils.keyset_order_by(keys)}"
+    
+    result = await db_utils.keyset_paginate(base_query, tuple(params), keys, size)
+    
+    # Rows arrive in time order, so each day's sessions are contiguous
+    days = []
+    for item in result['items']:
+        day = item.pop('session_at')[:10]
+        if not days or days[-1]['date'] != day:
+            days.append({"date": day, "sessions": []})
+        days[-1]['sessions'].append(item)
+    
+    return SessionCalendarResponse(days=days, size=size, next_cursor=result['next_cursor'])
+
 @router.get("/sessions/{session_id}", response_model=CaseSession)
 async def get_case_session(
     session_id: int,
@@ -110,7 +186,7 @@ async def get_case_session(
 ):
     """Get session by ID"""
     
-    sessions = db_manager.execute_query(
+    sessions = await db_manager.fetch_all(
         """SELECT cs.*, 
                   cu.full_name as created_by_name,
                   uu.full_name as updated_by_name
@@ -150,7 +226,7 @@ async def update_case_session(
     """Update case session"""
     
     # Check if session exists
-    existing = db_manager.execute_query("SELECT id FROM case_sessions WHERE id = ?", (session_id,))
+    existing = await db_manager.fetch_all("SELECT id FROM case_sessions WHERE id = ?", (session_id,))
     if not existing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -183,7 +259,7 @@ async def update_case_session(
     query = f"UPDATE case_sessions SET {', '.join(update_fields)} WHERE id = ?"
     params.append(session_id)
     
-    db_manager.execute_write(query, tuple(params))
+    await db_manager.execute(query, tuple(params))
     
     # Return updated session
     return await get_case_session(session_id, current_user)
@@ -196,7 +272,7 @@ async def delete_case_session(
     """Delete case session (Admin only)"""
     
     # Check if session exists
-    existing = db_manager.execute_query("SELECT id FROM case_sessions WHERE id = ?", (session_id,))
+    existing = await db_manager.fetch_all("SELECT id FROM case_sessions WHERE id = ?", (session_id,))
     if not existing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -204,7 +280,7 @@ async def delete_case_session(
         )
     
     # Delete session (hard delete)
-    rows_affected = db_manager.execute_write("DELETE FROM case_sessions WHERE id = ?", (session_id,))
+    rows_affected = await db_manager.execute("DELETE FROM case_sessions WHERE id = ?", (session_id,))
     
     if rows_affected == 0:
         raise HTTPException(
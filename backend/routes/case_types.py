@@ -4,9 +4,10 @@ from models.case_type import CaseType, CaseTypeCreate, CaseTypeUpdate
 from models.base import PaginatedResponse
 from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
-from config.database import db_manager
+from config.database import db_manager, UnitOfWork
 from config.settings import settings
 from utils.database import db_utils
+from utils.cache import app_cache
 
 router = APIRouter(prefix="/case-types", tags=["Case Types"])
 
@@ -18,6 +19,16 @@ async def get_case_types(
     current_user: User = Depends(get_current_user)
 ):
     """Get all case types"""
+    # The list rarely changes and is requested by every case form; cached until case_types/users change
+    result = await app_cache.get_or_set_async(
+        ("case_types", page, size, search),
+        lambda: _load_case_types(page, size, search),
+        tags=("case_types", "users")
+    )
+    return PaginatedResponse(**result)
+
+async def _load_case_types(page: int, size: int, search: Optional[str]) -> dict:
+    """Query one page of case types with user info"""
     
     base_query = """
     SELECT ct.*, 
@@ -39,7 +50,7 @@ async def get_case_types(
     
     base_query += " ORDER BY ct.name"
     
-    result = db_utils.paginate_query(base_query, tuple(params), page, size)
+    result = await db_utils.paginate(base_query, tuple(params), page, size)
     
     # Transform results to include user info
     for item in result['items']:
@@ -51,7 +62,7 @@ async def get_case_types(
         item.pop('created_by_name', None)
         item.pop('updated_by_name', None)
     
-    return PaginatedResponse(**result)
+    return result
 
 @router.post("", response_model=CaseType, status_code=status.HTTP_201_CREATED)
 async def create_case_type(
@@ -60,38 +71,39 @@ async def create_case_type(
 ):
     """Create new case type"""
     
-    # Check if name already exists
-    existing = db_manager.execute_query(
-        "SELECT id FROM case_types WHERE LOWER(name) = LOWER(?)",
-        (case_type_data.name,)
-    )
-    
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="نوع القضية موجود بالفعل"
+    def create_in_transaction(uow: UnitOfWork) -> dict:
+        # Check if name already exists
+        existing = uow.execute_query_one(
+            "SELECT id FROM case_types WHERE LOWER(name) = LOWER(?)",
+            (case_type_data.name,)
+        )
+        
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="نوع القضية موجود بالفعل"
+            )
+        
+        # Create case type
+        case_type_id = uow.execute_write(
+            """INSERT INTO case_types (name, description, created_by, updated_by)
+               VALUES (?, ?, ?, ?)""",
+            (case_type_data.name, case_type_data.description, current_user.id, current_user.id)
+        )
+        
+        # Get created case type
+        return uow.execute_query_one(
+            """SELECT ct.*, 
+                      cu.full_name as created_by_name,
+                      uu.full_name as updated_by_name
+               FROM case_types ct
+               LEFT JOIN users cu ON ct.created_by = cu.id
+               LEFT JOIN users uu ON ct.updated_by = uu.id
+               WHERE ct.id = ?""",
+            (case_type_id,)
         )
     
-    # Create case type
-    case_type_id = db_manager.execute_write(
-        """INSERT INTO case_types (name, description, created_by, updated_by)
-           VALUES (?, ?, ?, ?)""",
-        (case_type_data.name, case_type_data.description, current_user.id, current_user.id)
-    )
-    
-    # Get created case type
-    case_types = db_manager.execute_query(
-        """SELECT ct.*, 
-                  cu.full_name as created_by_name,
-                  uu.full_name as updated_by_name
-           FROM case_types ct
-           LEFT JOIN users cu ON ct.created_by = cu.id
-           LEFT JOIN users uu ON ct.updated_by = uu.id
-           WHERE ct.id = ?""",
-        (case_type_id,)
-    )
-    
-    case_type = case_types[0]
+    case_type = await db_manager.run_in_transaction(create_in_transaction)
     if case_type.get('created_by'):
         case_type['created_by'] = {"id": case_type['created_by'], "full_name": case_type.get('created_by_name')}
     if case_type.get('updated_by'):
@@ -108,7 +120,7 @@ async def get_case_type(
 ):
     """Get case type by ID"""
     
-    case_types = db_manager.execute_query(
+    case_types = await db_manager.fetch_all(
         """SELECT ct.*, 
                   cu.full_name as created_by_name,
                   uu.full_name as updated_by_name
@@ -143,26 +155,6 @@ async def update_case_type(
 ):
     """Update case type"""
     
-    # Check if case type exists
-    existing = db_manager.execute_query("SELECT id FROM case_types WHERE id = ?", (case_type_id,))
-    if not existing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="نوع القضية غير موجود"
-        )
-    
-    # Check if new name conflicts with existing (if name is being updated)
-    if case_type_update.name:
-        name_conflicts = db_manager.execute_query(
-            "SELECT id FROM case_types WHERE LOWER(name) = LOWER(?) AND id != ?",
-            (case_type_update.name, case_type_id)
-        )
-        if name_conflicts:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="نوع القضية موجود بالفعل"
-            )
-    
     # Build update query
     update_fields = []
     params = []
@@ -175,35 +167,56 @@ async def update_case_type(
         update_fields.append("description = ?")
         params.append(case_type_update.description)
     
-    if not update_fields:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="لا يوجد بيانات للتحديث"
-        )
-    
+    has_changes = bool(update_fields)
     update_fields.append("updated_by = ?")
     update_fields.append("updated_at = CURRENT_TIMESTAMP")
     params.extend([current_user.id])
     
-    # Update case type
     query = f"UPDATE case_types SET {', '.join(update_fields)} WHERE id = ?"
     params.append(case_type_id)
     
-    db_manager.execute_write(query, tuple(params))
-    
-    # Return updated case type
-    case_types = db_manager.execute_query(
-        """SELECT ct.*, 
-                  cu.full_name as created_by_name,
-                  uu.full_name as updated_by_name
-           FROM case_types ct
-           LEFT JOIN users cu ON ct.created_by = cu.id
-           LEFT JOIN users uu ON ct.updated_by = uu.id
-           WHERE ct.id = ?""",
-        (case_type_id,)
-    )
+    def update_in_transaction(uow: UnitOfWork) -> dict:
+        # Check if case type exists
+        if not uow.execute_query_one("SELECT id FROM case_types WHERE id = ?", (case_type_id,)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="نوع القضية غير موجود"
+            )
+        
+        # Check if new name conflicts with existing (if name is being updated)
+        if case_type_update.name:
+            name_conflicts = uow.execute_query_one(
+                "SELECT id FROM case_types WHERE LOWER(name) = LOWER(?) AND id != ?",
+                (case_type_update.name, case_type_id)
+            )
+            if name_conflicts:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="نوع القضية موجود بالفعل"
+                )
+        
+        if not has_changes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="لا يوجد بيانات للتحديث"
+            )
+        
+        # Update case type
+        uow.execute_write(query, tuple(params))
+        
+        # Return updated case type
+        return uow.execute_query_one(
+            """SELECT ct.*, 
+                      cu.full_name as created_by_name,
+                      uu.full_name as updated_by_name
+               FROM case_types ct
+               LEFT JOIN users cu ON ct.created_by = cu.id
+               LEFT JOIN users uu ON ct.updated_by = uu.id
+               WHERE ct.id = ?""",
+            (case_type_id,)
+        )
     
-    case_type = case_types[0]
+    case_type = await db_manager.run_in_transaction(update_in_transaction)
     if case_type.get('created_by'):
         case_type['created_by'] = {"id": case_type['created_by'], "full_name": case_type.get('created_by_name')}
     if case_type.get('updated_by'):
@@ -221,7 +234,7 @@ async def delete_case_type(
     """Delete case type (Admin only)"""
     
     # Check if case type exists
-    existing = db_manager.execute_query("SELECT id FROM case_types WHERE id = ?", (case_type_id,))
+    existing = await db_manager.fetch_all("SELECT id FROM case_types WHERE id = ?", (case_type_id,))
     if not existing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -229,7 +242,7 @@ async def delete_case_type(
         )
     
     # Check if case type is being used by any cases
-    cases_using_type = db_manager.execute_query(
+    cases_using_type = await db_manager.fetch_all(
         "SELECT COUNT(*) as count FROM cases WHERE case_type_id = ?",
         (case_type_id,)
     )
@@ -241,7 +254,7 @@ async def delete_case_type(
         )
     
     # Delete case type (hard delete)
-    rows_affected = db_manager.execute_write("DELETE FROM case_types WHERE id = ?", (case_type_id,))
+    rows_affected = await db_manager.execute("DELETE FROM case_types WHERE id = ?", (case_type_id,))
     
     if rows_affected == 0:
         raise HTTPException(
@@ -4,7 +4,7 @@ from models.case import Case, CaseCreate, CaseUpdate, CaseWithDetails, JudgmentT
 from models.base import PaginatedResponse
 from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
-from config.database import db_manager
+from config.database import db_manager, UnitOfWork
 from config.settings import settings
 from utils.database import db_utils
 
@@ -15,14 +15,55 @@ async def get_cases(
     page: int = Query(1, ge=1),
     size: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
     search: Optional[str] = Query(None),
+    include_notes: bool = Query(False),
+    match: str = Query("contains", pattern="^(contains|prefix|exact)$"),
     case_type_id: Optional[int] = Query(None),
     judgment_type: Optional[JudgmentType] = Query(None),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all cases with filtering"""
+    """Get all cases with filtering.
     
-    base_query = """
-    SELECT c.*, 
+    Pass the returned next_cursor as cursor to fetch the next page by keyset instead of OFFSET.
+    include_total=false skips counting; total is then a lower bound (total_exact is false).
+    """
+    
+    conditions = []
+    params = []
+    joins = ""
+    rank_column = ""
+    keys = [("c.created_at", "created_at", True), ("c.id", "id", True)]
+    
+    # Add search condition: full-text index ranked by bm25, or the normalized columns for short terms
+    # and for exact/prefix lookups
+    fts_query = db_utils.build_fts_query(search) if search and match == "contains" else None
+    if fts_query:
+        match_query, match_params = db_utils.build_case_match_query(fts_query, include_notes)
+        joins = f" JOIN ({match_query}) m ON m.case_id = c.id"
+        rank_column = "m.rank as search_rank,"
+        params.extend(match_params)
+        keys = [("m.rank", "search_rank", False), ("c.id", "id", True)]
+    elif search:
+        search_condition, search_params = db_utils.build_normalized_search_conditions(
+            search, ['c.case_number_norm', 'c.plaintiff_norm', 'c.defendant_norm'], match
+        )
+        if search_condition and include_notes and match == "contains":
+            # Without the full-text index, notes and session notes are scanned with LIKE
+            notes_condition, notes_params = db_utils.build_search_conditions(search, ['cn.note_text'])
+            sessions_condition, sessions_params = db_utils.build_search_conditions(search, ['cs.session_notes'])
+            search_condition = (
+                f"({search_condition}"
+                f" OR EXISTS (SELECT 1 FROM case_notes cn WHERE cn.case_id = c.id AND {notes_condition})"
+                f" OR EXISTS (SELECT 1 FROM case_sessions cs WHERE cs.case_id = c.id AND {sessions_condition}))"
+            )
+            search_params = search_params + notes_params + sessions_params
+        if search_condition:
+            conditions.append(search_condition)
+            params.extend(search_params)
+    
+    base_query = f"""
+    SELECT c.*, {rank_column}
            ct.name as case_type_name,
            ct.description as case_type_description,
            cu.full_name as created_by_name,
@@ -31,19 +72,9 @@ async def get_cases(
     JOIN case_types ct ON c.case_type_id = ct.id
     LEFT JOIN users cu ON c.created_by = cu.id
     LEFT JOIN users uu ON c.updated_by = uu.id
+    {joins}
     """
     
-    conditions = []
-    params = []
-    
-    # Add search condition
-    if search:
-        search_condition, search_params = db_utils.build_search_conditions(
-            search, ['c.case_number', 'c.plaintiff', 'c.defendant']
-        )
-        conditions.append(search_condition)
-        params.extend(search_params)
-    
     # Add case type filter
     if case_type_id:
         conditions.append("c.case_type_id = ?")
@@ -54,13 +85,26 @@ async def get_cases(
         conditions.append("c.judgment_type = ?")
         params.append(judgment_type.value)
     
+    # Resume after the cursor row
+    if cursor:
+        keyset_condition, keyset_params = db_utils.build_keyset_condition(keys, cursor)
+        conditions.append(keyset_condition)
+        params.extend(keyset_params)
+    
     # Add WHERE clause if we have conditions
     if conditions:
         base_query += " WHERE " + " AND ".join(conditions)
     
-    base_query += " ORDER BY c.created_at DESC"
+    base_query += f" ORDER BY {db_utils.keyset_order_by(keys)}"
     
-    result = db_utils.paginate_query(base_query, tuple(params), page, size)
+    if cursor:
+        result = await db_utils.keyset_paginate(base_query, tuple(params), keys, size)
+    else:
+        # The total of the unfiltered listing is cached until cases is written to
+        result = await db_utils.paginate(
+            base_query, tuple(params), page, size, keys, include_total,
+            total_table=None if conditions or joins else "cases"
+        )
     
     # Transform results to include case type and user info
     for item in result['items']:
@@ -83,65 +127,11 @@ async def get_cases(
         item.pop('case_type_description', None)
         item.pop('created_by_name', None)
         item.pop('updated_by_name', None)
+        item.pop('search_rank', None)
     
     return PaginatedResponse(**result)
 
-@router.post("", response_model=Case, status_code=status.HTTP_201_CREATED)
-async def create_case(
-    case_data: CaseCreate,
-    current_user: User = Depends(get_current_user)
-):
-    """Create new case"""
-    
-    # Check if case number already exists
-    existing = db_manager.execute_query(
-        "SELECT id FROM cases WHERE case_number = ?",
-        (case_data.case_number,)
-    )
-    
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="رقم القضية موجود بالفعل"
-        )
-    
-    # Check if case type exists
-    case_types = db_manager.execute_query(
-        "SELECT id FROM case_types WHERE id = ?",
-        (case_data.case_type_id,)
-    )
-    
-    if not case_types:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="نوع القضية غير موجود"
-        )
-    
-    # Check previous judgment reference if provided
-    if case_data.previous_judgment_id:
-        previous_cases = db_manager.execute_query(
-            "SELECT id FROM cases WHERE id = ?",
-            (case_data.previous_judgment_id,)
-        )
-        if not previous_cases:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="القضية المرجعية غير موجودة"
-            )
-    
-    # Create case
-    case_id = db_manager.execute_write(
-        """INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, 
-                             judgment_type, previous_judgment_id, created_by, updated_by)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-        (case_data.case_number, case_data.plaintiff, case_data.defendant,
-         case_data.case_type_id, case_data.judgment_type.value,
-         case_data.previous_judgment_id, current_user.id, current_user.id)
-    )
-    
-    # Get created case with related data
-    cases = db_manager.execute_query(
-        """SELECT c.*, 
+CASE_DETAIL_QUERY = """SELECT c.*, 
                   ct.name as case_type_name,
                   ct.description as case_type_description,
                   cu.full_name as created_by_name,
@@ -150,12 +140,10 @@ async def create_case(
            JOIN case_types ct ON c.case_type_id = ct.id
            LEFT JOIN users cu ON c.created_by = cu.id
            LEFT JOIN users uu ON c.updated_by = uu.id
-           WHERE c.id = ?""",
-        (case_id,)
-    )
-    
-    case = cases[0]
-    
+           WHERE c.id = ?"""
+
+def _case_from_row(case: dict) -> Case:
+    """Build Case response from a CASE_DETAIL_QUERY row"""
     # Add case type info
     case['case_type'] = {
         "id": case['case_type_id'],
@@ -177,6 +165,61 @@ async def create_case(
     
     return Case(**case)
 
+def _check_case_references(uow: UnitOfWork, case_type_id: Optional[int], previous_judgment_id: Optional[int]):
+    """Validate case type and previous judgment references inside a unit of work"""
+    # Check if case type exists
+    if case_type_id is not None and not uow.execute_query_one("SELECT id FROM case_types WHERE id = ?", (case_type_id,)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="نوع القضية غير موجود"
+        )
+    
+    # Check previous judgment reference if provided
+    if previous_judgment_id and not uow.execute_query_one("SELECT id FROM cases WHERE id = ?", (previous_judgment_id,)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="القضية المرجعية غير موجودة"
+        )
+
+@router.post("", response_model=Case, status_code=status.HTTP_201_CREATED)
+async def create_case(
+    case_data: CaseCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Create new case"""
+    
+    def create_in_transaction(uow: UnitOfWork) -> dict:
+        # Check if case number already exists
+        existing = uow.execute_query_one(
+            "SELECT id FROM cases WHERE case_number = ?",
+            (case_data.case_number,)
+        )
+        
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="رقم القضية موجود بالفعل"
+            )
+        
+        _check_case_references(uow, case_data.case_type_id, case_data.previous_judgment_id)
+        
+        # Create case
+        case_id = uow.execute_write(
+            """INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, 
+                                 judgment_type, previous_judgment_id, created_by, updated_by)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (case_data.case_number, case_data.plaintiff, case_data.defendant,
+             case_data.case_type_id, case_data.judgment_type.value,
+             case_data.previous_judgment_id, current_user.id, current_user.id)
+        )
+        
+        # Get created case with related data
+        return uow.execute_query_one(CASE_DETAIL_QUERY, (case_id,))
+    
+    case = await db_manager.run_in_transaction(create_in_transaction)
+    
+    return _case_from_row(case)
+
 @router.get("/{case_id}", response_model=Case)
 async def get_case(
     case_id: int,
@@ -184,48 +227,15 @@ async def get_case(
 ):
     """Get case by ID"""
     
-    cases = db_manager.execute_query(
-        """SELECT c.*, 
-                  ct.name as case_type_name,
-                  ct.description as case_type_description,
-                  cu.full_name as created_by_name,
-                  uu.full_name as updated_by_name
-           FROM cases c
-           JOIN case_types ct ON c.case_type_id = ct.id
-           LEFT JOIN users cu ON c.created_by = cu.id
-           LEFT JOIN users uu ON c.updated_by = uu.id
-           WHERE c.id = ?""",
-        (case_id,)
-    )
+    case = await db_manager.fetch_one(CASE_DETAIL_QUERY, (case_id,))
     
-    if not cases:
+    if not case:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="القضية غير موجودة"
         )
     
-    case = cases[0]
-    
-    # Add case type info
-    case['case_type'] = {
-        "id": case['case_type_id'],
-        "name": case['case_type_name'],
-        "description": case.get('case_type_description')
-    }
-    
-    # Add user info
-    if case.get('created_by'):
-        case['created_by'] = {"id": case['created_by'], "full_name": case.get('created_by_name')}
-    if case.get('updated_by'):
-        case['updated_by'] = {"id": case['updated_by'], "full_name": case.get('updated_by_name')}
-    
-    # Clean up temporary fields
-    case.pop('case_type_name', None)
-    case.pop('case_type_description', None)
-    case.pop('created_by_name', None)
-    case.pop('updated_by_name', None)
-    
-    return Case(**case)
+    return _case_from_row(case)
 
 @router.get("/{case_id}/full", response_model=CaseWithDetails)
 async def get_case_with_details(
@@ -234,38 +244,11 @@ async def get_case_with_details(
 ):
     """Get case with all related data (sessions, notes counts)"""
     
-    # Get basic case data
+    # Session and note aggregates are stored on the case row, so this is a single query
     case_data = await get_case(case_id, current_user)
     
-    # Get sessions count
-    sessions_count = db_manager.execute_query(
-        "SELECT COUNT(*) as count FROM case_sessions WHERE case_id = ?",
-        (case_id,)
-    )[0]['count']
-    
-    # Get notes count
-    notes_count = db_manager.execute_query(
-        "SELECT COUNT(*) as count FROM case_notes WHERE case_id = ?",
-        (case_id,)
-    )[0]['count']
-    
-    # Get latest session date
-    latest_session = db_manager.execute_query(
-        "SELECT session_date FROM case_sessions WHERE case_id = ? ORDER BY session_date DESC LIMIT 1",
-        (case_id,)
-    )
-    
-    latest_session_date = None
-    if latest_session and latest_session[0]['session_date']:
-        latest_session_date = latest_session[0]['session_date']
-    
-    # Convert Case to CaseWithDetails
     case_dict = case_data.dict()
-    case_dict.update({
-        "sessions_count": sessions_count,
-        "notes_count": notes_count,
-        "latest_session": latest_session_date
-    })
+    case_dict["latest_session"] = case_data.latest_session_date
     
     return CaseWithDetails(**case_dict)
 
@@ -277,50 +260,6 @@ async def update_case(
 ):
     """Update case"""
     
-    # Check if case exists
-    existing = db_manager.execute_query("SELECT id FROM cases WHERE id = ?", (case_id,))
-    if not existing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="القضية غير موجودة"
-        )
-    
-    # Check case number uniqueness if being updated
-    if case_update.case_number:
-        number_conflicts = db_manager.execute_query(
-            "SELECT id FROM cases WHERE case_number = ? AND id != ?",
-            (case_update.case_number, case_id)
-        )
-        if number_conflicts:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="رقم القضية موجود بالفعل"
-            )
-    
-    # Check case type exists if being updated
-    if case_update.case_type_id:
-        case_types = db_manager.execute_query(
-            "SELECT id FROM case_types WHERE id = ?",
-            (case_update.case_type_id,)
-        )
-        if not case_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="نوع القضية غير موجود"
-            )
-    
-    # Check previous judgment reference if being updated
-    if case_update.previous_judgment_id:
-        previous_cases = db_manager.execute_query(
-            "SELECT id FROM cases WHERE id = ?",
-            (case_update.previous_judgment_id,)
-        )
-        if not previous_cases:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="القضية المرجعية غير موجودة"
-            )
-    
     # Build update query
     update_fields = []
     params = []
@@ -349,24 +288,51 @@ async def update_case(
         update_fields.append("previous_judgment_id = ?")
         params.append(case_update.previous_judgment_id)
     
-    if not update_fields:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="لا يوجد بيانات للتحديث"
-        )
-    
+    has_changes = bool(update_fields)
     update_fields.append("updated_by = ?")
     update_fields.append("updated_at = CURRENT_TIMESTAMP")
     params.extend([current_user.id])
     
-    # Update case
     query = f"UPDATE cases SET {', '.join(update_fields)} WHERE id = ?"
     params.append(case_id)
     
-    db_manager.execute_write(query, tuple(params))
+    def update_in_transaction(uow: UnitOfWork) -> dict:
+        # Check if case exists
+        if not uow.execute_query_one("SELECT id FROM cases WHERE id = ?", (case_id,)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="القضية غير موجودة"
+            )
+        
+        # Check case number uniqueness if being updated
+        if case_update.case_number:
+            number_conflicts = uow.execute_query_one(
+                "SELECT id FROM cases WHERE case_number = ? AND id != ?",
+                (case_update.case_number, case_id)
+            )
+            if number_conflicts:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="رقم القضية موجود بالفعل"
+                )
+        
+        _check_case_references(uow, case_update.case_type_id, case_update.previous_judgment_id)
+        
+        if not has_changes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="لا يوجد بيانات للتحديث"
+            )
+        
+        # Update case
+        uow.execute_write(query, tuple(params))
+        
+        # Return updated case
+        return uow.execute_query_one(CASE_DETAIL_QUERY, (case_id,))
+    
+    case = await db_manager.run_in_transaction(update_in_transaction)
     
-    # Return updated case
-    return await get_case(case_id, current_user)
+    return _case_from_row(case)
 
 @router.delete("/{case_id}")
 async def delete_case(
@@ -376,7 +342,7 @@ async def delete_case(
     """Delete case (Admin only)"""
     
     # Check if case exists
-    existing = db_manager.execute_query("SELECT id FROM cases WHERE id = ?", (case_id,))
+    existing = await db_manager.fetch_all("SELECT id FROM cases WHERE id = ?", (case_id,))
     if not existing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -384,7 +350,7 @@ async def delete_case(
         )
     
     # Delete case (CASCADE will handle related sessions and notes)
-    rows_affected = db_manager.execute_write("DELETE FROM cases WHERE id = ?", (case_id,))
+    rows_affected = await db_manager.execute("DELETE FROM cases WHERE id = ?", (case_id,))
     
     if rows_affected == 0:
         raise HTTPException(
@@ -404,7 +370,7 @@ async def get_cases_by_type(
     """Get cases by case type"""
     
     # Check if case type exists
-    case_types = db_manager.execute_query(
+    case_types = await db_manager.fetch_all(
         "SELECT id FROM case_types WHERE id = ?",
         (case_type_id,)
     )
@@ -418,6 +384,12 @@ async def get_cases_by_type(
     return await get_cases(
         page=page,
         size=size,
+        search=None,
+        include_notes=False,
+        match="contains",
         case_type_id=case_type_id,
+        judgment_type=None,
+        cursor=None,
+        include_total=True,
         current_user=current_user
     )
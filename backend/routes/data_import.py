@@ -0,0 +1,260 @@
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, status
+from pydantic import ValidationError
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+import csv
+import io
+import os
+import zipfile
+
+# Optional import - XLSX files need openpyxl
+try:
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+from dependencies.auth import get_current_user
+from models.user import User
+from models.case import CaseImportRow, CaseImportResult
+from config.database import db_manager, UnitOfWork, NORMALIZED_SEARCH_COLUMNS
+from config.settings import settings
+from utils.arabic import ArabicTextProcessor
+
+router = APIRouter(prefix="/import", tags=["Export/Import"])
+
+REQUIRED_COLUMNS = ("case_number", "plaintiff", "defendant", "judgment_type")
+CASE_TYPE_COLUMNS = ("case_type", "case_type_id")
+
+CSV_ENCODING_ERROR = "تعذر قراءة ملف CSV، يرجى حفظه بترميز UTF-8"
+CSV_FORMAT_ERROR = "ملف CSV غير صالح"
+XLSX_FORMAT_ERROR = "ملف Excel تالف أو غير صالح"
+
+class CaseImporter:
+    """Bulk case import from CSV or XLSX files.
+
+    The file is parsed and validated row by row without holding the write lock. Valid
+    rows are then checked and inserted in batches inside one transaction: each batch is
+    loaded into a temp table and joined against cases and case types, so uniqueness and
+    case type lookups cost one query per batch instead of one per row.
+    """
+
+    def import_file(self, file: BinaryIO, filename: str, user_id: int) -> Dict[str, Any]:
+        extension = os.path.splitext(filename or "")[1].lower()
+        if extension == ".csv":
+            rows = self._read_csv(file)
+        elif extension == ".xlsx":
+            if not EXCEL_AVAILABLE:
+                raise HTTPException(status_code=400, detail="Excel import requires openpyxl package")
+            rows = self._read_xlsx(file)
+        else:
+            raise HTTPException(status_code=400, detail="صيغة الملف غير مدعومة، استخدم CSV أو XLSX")
+
+        errors: List[Dict[str, Any]] = []
+        valid: List[Tuple[int, CaseImportRow]] = []
+        seen_case_numbers = set()
+        total_rows = 0
+
+        for row_number, raw in rows:
+            total_rows += 1
+            if total_rows > settings.import_max_rows:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"الملف يتجاوز الحد الأقصى لعدد الصفوف ({settings.import_max_rows})"
+                )
+            try:
+                row = CaseImportRow(
+                    case_number=raw.get("case_number", ""),
+                    plaintiff=raw.get("plaintiff", ""),
+                    defendant=raw.get("defendant", ""),
+                    judgment_type=raw.get("judgment_type", ""),
+                    case_type_id=raw.get("case_type_id") or None,
+                    case_type=raw.get("case_type", "")
+                )
+            except ValidationError as e:
+                errors.append({
+                    "row": row_number,
+                    "case_number": raw.get("case_number") or None,
+                    "errors": [error["msg"].removeprefix("Value error, ") for error in e.errors()]
+                })
+                continue
+
+            if row.case_number in seen_case_numbers:
+                errors.append({"row": row_number, "case_number": row.case_number, "errors": ["رقم القضية مكرر في الملف"]})
+                continue
+            seen_case_numbers.add(row.case_number)
+            valid.append((row_number, row))
+
+        imported = 0
+        if valid:
+            with db_manager.transaction() as uow:
+                self._create_temp_tables(uow)
+                try:
+                    batch_size = max(1, settings.import_batch_size)
+                    for start in range(0, len(valid), batch_size):
+                        imported += self._import_batch(uow, valid[start:start + batch_size], user_id, errors)
+                finally:
+                    uow.conn.execute("DROP TABLE IF EXISTS temp.case_import")
+                    uow.conn.execute("DROP TABLE IF EXISTS temp.case_type_keys")
+
+        errors.sort(key=lambda error: error["row"])
+        return {
+            "total_rows": total_rows,
+            "imported": imported,
+            "failed": len(errors),
+            "errors": errors
+        }
+
+    def _create_temp_tables(self, uow: UnitOfWork):
+        # Temp tables are private to this connection; statements go straight to the
+        # connection so they are not reported as writes to shared tables
+        conn = uow.conn
+        conn.execute("DROP TABLE IF EXISTS temp.case_import")
+        conn.execute("""
+            CREATE TEMP TABLE case_import (
+                row_number INTEGER PRIMARY KEY,
+                case_number TEXT NOT NULL,
+                case_type_key TEXT NOT NULL
+            )
+        """)
+
+        # Case types can be referenced by id or by name in any Arabic spelling
+        conn.execute("DROP TABLE IF EXISTS temp.case_type_keys")
+        conn.execute("CREATE TEMP TABLE case_type_keys (key TEXT PRIMARY KEY, case_type_id INTEGER NOT NULL)")
+        conn.execute("""
+            INSERT OR IGNORE INTO temp.case_type_keys (key, case_type_id)
+            SELECT 'id:' || id, id FROM case_types
+            UNION ALL
+            SELECT 'name:' || arabic_normalize(name), id FROM case_types
+        """)
+
+    def _import_batch(self, uow: UnitOfWork, batch: List[Tuple[int, CaseImportRow]],
+                      user_id: int, errors: List[Dict[str, Any]]) -> int:
+        """Resolve and insert one batch of validated rows, returning how many were inserted"""
+        conn = uow.conn
+        # Text is normalized once per batch; the *_norm values are inserted with the rows, so
+        # the insert triggers do not normalize them again row by row
+        case_type_names = ArabicTextProcessor.normalize_many(
+            row.case_type if row.case_type_id is None else None for _, row in batch
+        )
+        case_type_keys = [
+            f"id:{row.case_type_id}" if row.case_type_id is not None else f"name:{name}"
+            for (_, row), name in zip(batch, case_type_names)
+        ]
+        norms = list(zip(*(
+            list(ArabicTextProcessor.normalize_many([getattr(row, column) for _, row in batch]))
+            for column in NORMALIZED_SEARCH_COLUMNS["cases"]
+        )))
+
+        conn.execute("DELETE FROM temp.case_import")
+        conn.executemany(
+            "INSERT INTO temp.case_import (row_number, case_number, case_type_key) VALUES (?, ?, ?)",
+            [(row_number, row.case_number, key) for (row_number, row), key in zip(batch, case_type_keys)]
+        )
+
+        lookups = {
+            lookup[0]: (lookup[1], lookup[2])
+            for lookup in conn.execute("""
+                SELECT i.row_number, k.case_type_id, c.id IS NOT NULL
+                FROM temp.case_import i
+                LEFT JOIN temp.case_type_keys k ON k.key = i.case_type_key
+                LEFT JOIN cases c ON c.case_number = i.case_number
+            """)
+        }
+
+        inserts = []
+        for (row_number, row), row_norms in zip(batch, norms):
+            case_type_id, exists = lookups[row_number]
+            row_errors = []
+            if exists:
+                row_errors.append("رقم القضية موجود بالفعل")
+            if case_type_id is None:
+                row_errors.append("نوع القضية غير موجود")
+            if row_errors:
+                errors.append({"row": row_number, "case_number": row.case_number, "errors": row_errors})
+                continue
+            inserts.append((row.case_number, row.plaintiff, row.defendant, case_type_id,
+                            row.judgment_type.value, user_id, user_id, *row_norms))
+
+        if inserts:
+            norm_columns = ", ".join(f"{column}_norm" for column in NORMALIZED_SEARCH_COLUMNS["cases"])
+            uow.execute_many(
+                f"""INSERT INTO cases (case_number, plaintiff, defendant, case_type_id,
+                                      judgment_type, created_by, updated_by, {norm_columns})
+                    VALUES (?, ?, ?, ?, ?, ?, ?, {", ".join("?" * len(NORMALIZED_SEARCH_COLUMNS["cases"]))})""",
+                inserts
+            )
+        return len(inserts)
+
+    def _read_csv(self, file: BinaryIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Parse CSV rows lazily; row numbers count the header as row 1"""
+        reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+        try:
+            headers = self._read_headers(next(reader, None))
+            for row_number, values in enumerate(reader, 2):
+                row = self._clean_row(headers, values)
+                if row:
+                    yield row_number, row
+        except UnicodeDecodeError:
+            # e.g. a file saved by Excel as Windows-1256
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=CSV_ENCODING_ERROR)
+        except csv.Error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=CSV_FORMAT_ERROR)
+
+    def _read_xlsx(self, file: BinaryIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """Parse the first worksheet lazily with openpyxl's read-only mode"""
+        try:
+            workbook = load_workbook(file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError):
+            # Not a zip archive, or a zip without the workbook parts
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=XLSX_FORMAT_ERROR)
+        try:
+            values_iter = workbook.worksheets[0].iter_rows(values_only=True)
+            headers = self._read_headers(next(values_iter, None))
+            for row_number, values in enumerate(values_iter, 2):
+                row = self._clean_row(headers, values)
+                if row:
+                    yield row_number, row
+        except (zipfile.BadZipFile, SyntaxError):
+            # Truncated archive or malformed sheet XML (XML parse errors derive from SyntaxError)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=XLSX_FORMAT_ERROR)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _read_headers(header_row) -> List[str]:
+        headers = [str(header).strip().lower() if header is not None else "" for header in header_row or ()]
+        missing = [column for column in REQUIRED_COLUMNS if column not in headers]
+        if not any(column in headers for column in CASE_TYPE_COLUMNS):
+            missing.append(" أو ".join(CASE_TYPE_COLUMNS))
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"الملف لا يحتوي على الأعمدة المطلوبة: {', '.join(missing)}"
+            )
+        return headers
+
+    @staticmethod
+    def _clean_row(headers: List[str], values) -> Dict[str, str]:
+        """Map a row to its headers with whitespace collapsed; blank rows come back empty"""
+        row = {}
+        for header, value in zip(headers, values):
+            if not header or value is None:
+                continue
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)  # Spreadsheet numbers such as case type ids
+            text = " ".join(str(value).split())
+            if text:
+                row[header] = text
+        return row
+
+# Initialize case importer
+case_importer = CaseImporter()
+
+@router.post("/cases", response_model=CaseImportResult)
+async def import_cases(
+    file: UploadFile = File(..., description="CSV or XLSX file with a header row"),
+    current_user: User = Depends(get_current_user)
+):
+    """Import cases in bulk; valid rows are inserted and every rejected row is reported"""
+    return await db_manager.run_sync(case_importer.import_file, file.file, file.filename, current_user.id)
@@ -1,40 +1,61 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
-from fastapi.responses import StreamingResponse
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, date
 import csv
 import json
 import io
+import logging
+import re
 import tempfile
+import threading
+import time
+import uuid
 import os
 import zipfile
+import zlib
+import itertools
 
 # Optional imports - will work without these packages
 try:
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
 
-try:
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-
 from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
+from models.export import ExportJob, ExportJobCreate
 from config.database import db_manager
 from config.settings import settings
+from utils.pdf_export import PDF_AVAILABLE, pdf_renderer
 
 router = APIRouter(prefix="/export", tags=["Export/Import"])
 
+logger = logging.getLogger(__name__)
+
+# Formats encoded row by row and streamed straight from a database cursor
+STREAMING_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+EXCEL_WIDTH_SAMPLE_ROWS = 200           # Rows inspected to estimate Excel column widths
+EXPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024  # Rendered files above this size spill to disk
+FILE_BLOCK_SIZE = 64 * 1024               # Read size when sending rendered files
+
+# Tables an export reads; a finished job is reused until one of them is written
+EXPORT_SOURCE_TABLES = {
+    "cases": ("cases", "case_types"),
+    "sessions": ("case_sessions", "cases", "users"),
+}
+
 class ExportManager:
     """Comprehensive data export manager"""
     
@@ -47,18 +68,24 @@ class ExportManager:
         except:
             self.arabic_font_available = False
     
-    def export_cases(self, format: str, date_from: Optional[date] = None, 
-                    date_to: Optional[date] = None, status: Optional[str] = None,
-                    case_type: Optional[str] = None) -> Dict[str, Any]:
-        """Export cases data in various formats"""
+    def build_cases_query(self, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                          status: Optional[str] = None, case_type: Optional[str] = None,
+                          include_sessions: bool = False) -> Tuple[str, list]:
+        """Build the cases export query; with include_sessions there is one row per case session"""
         
         # Build query with filters (simplified to match actual schema)
-        base_query = """
+        session_columns = ""
+        session_join = ""
+        if include_sessions:
+            session_columns = ", cs.id as session_id, cs.session_date, cs.session_notes"
+            session_join = " LEFT JOIN case_sessions cs ON cs.case_id = c.id"
+        
+        base_query = f"""
             SELECT c.id, c.case_number, c.plaintiff, c.defendant,
                    ct.name as case_type, c.judgment_type, c.previous_judgment_id,
-                   c.created_at, c.updated_at
+                   c.created_at, c.updated_at{session_columns}
             FROM cases c
-            JOIN case_types ct ON c.case_type_id = ct.id
+            JOIN case_types ct ON c.case_type_id = ct.id{session_join}
             WHERE 1=1
         """
         
@@ -80,34 +107,19 @@ class ExportManager:
             base_query += " AND ct.name LIKE ?"
             params.append(f"%{case_type}%")
         
-        base_query += " ORDER BY c.created_at DESC"
+        base_query += " ORDER BY c.created_at DESC, c.id DESC"
+        if include_sessions:
+            base_query += ", cs.session_date"
         
-        # Get data
-        cases = db_manager.execute_query(base_query, tuple(params))
-        
-        if format == "csv":
-            return self._export_to_csv(cases, "cases")
-        elif format == "excel":
-            if not EXCEL_AVAILABLE:
-                raise HTTPException(status_code=400, detail="Excel export requires openpyxl package")
-            return self._export_to_excel(cases, "cases")
-        elif format == "pdf":
-            if not PDF_AVAILABLE:
-                raise HTTPException(status_code=400, detail="PDF export requires reportlab package")
-            return self._export_to_pdf(cases, "cases")
-        elif format == "json":
-            return self._export_to_json(cases, "cases")
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported export format")
+        return base_query, params
     
-    def export_sessions(self, format: str, date_from: Optional[date] = None,
-                       date_to: Optional[date] = None) -> Dict[str, Any]:
-        """Export sessions data"""
+    def build_sessions_query(self, date_from: Optional[date] = None,
+                             date_to: Optional[date] = None) -> Tuple[str, list]:
+        """Build the sessions export query"""
         
         base_query = """
             SELECT cs.id, c.case_number, c.plaintiff, c.defendant,
-                   cs.session_date, cs.session_time, cs.court_name,
-                   cs.session_type, cs.session_status, cs.session_notes,
+                   cs.session_date, cs.session_notes,
                    cs.created_at, u.full_name as created_by_name
             FROM case_sessions cs
             JOIN cases c ON cs.case_id = c.id
@@ -127,23 +139,86 @@ class ExportManager:
         
         base_query += " ORDER BY cs.session_date DESC"
         
-        sessions = db_manager.execute_query(base_query, tuple(params))
+        return base_query, params
+    
+    def export_cases(self, format: str, date_from: Optional[date] = None, 
+                    date_to: Optional[date] = None, status: Optional[str] = None,
+                    case_type: Optional[str] = None, include_sessions: bool = False,
+                    compress: bool = False, progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Export cases data in various formats"""
+        
+        base_query, params = self.build_cases_query(date_from, date_to, status, case_type, include_sessions)
+        return self.render(format, base_query, tuple(params), "cases", compress, progress)
+    
+    def export_sessions(self, format: str, date_from: Optional[date] = None,
+                       date_to: Optional[date] = None, compress: bool = False,
+                       progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Export sessions data"""
         
-        if format == "csv":
-            return self._export_to_csv(sessions, "sessions")
-        elif format == "excel":
+        base_query, params = self.build_sessions_query(date_from, date_to)
+        return self.render(format, base_query, tuple(params), "sessions", compress, progress)
+    
+    def check_format(self, format: str):
+        """Reject formats that are unknown or whose optional package is missing"""
+        if format in STREAMING_FORMATS:
+            return
+        if format == "excel":
             if not EXCEL_AVAILABLE:
                 raise HTTPException(status_code=400, detail="Excel export requires openpyxl package")
-            return self._export_to_excel(sessions, "sessions")
         elif format == "pdf":
             if not PDF_AVAILABLE:
                 raise HTTPException(status_code=400, detail="PDF export requires reportlab package")
-            return self._export_to_pdf(sessions, "sessions")
-        elif format == "json":
-            return self._export_to_json(sessions, "sessions")
         else:
             raise HTTPException(status_code=400, detail="Unsupported export format")
     
+    def render(self, format: str, query: str, params: tuple, data_type: str, compress: bool = False,
+               progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Render the rows of an export query; progress(n) is called as each batch of n rows is written"""
+        self.check_format(format)
+        
+        if format in STREAMING_FORMATS:
+            return self.open_stream(query, params, format, data_type, compress, progress)
+        
+        if format == "excel":
+            return self._export_to_excel(self._open_row_chunks(query, params, progress), data_type)
+        
+        # PDF tables are laid out from the full result, so its size is capped
+        collected = self._collect_rows(query, params, settings.pdf_job_max_rows)
+        if collected is None:
+            raise self._pdf_too_large()
+        headers, rows = collected
+        result = self.pdf_result(pdf_renderer.render(headers, rows, data_type), data_type)
+        if progress:
+            progress(len(rows))
+        return result
+    
+    def collect_pdf_rows(self, request: ExportJobCreate) -> Optional[Tuple[List[str], List[tuple]]]:
+        """Read the rows of a PDF export request, or return None when it has more than pdf_max_rows"""
+        query, params = self._request_query(request)
+        return self._collect_rows(query, tuple(params), settings.pdf_max_rows)
+    
+    def check_pdf_rows(self, request: ExportJobCreate):
+        """Refuse a PDF export request with more than pdf_job_max_rows rows before a job is queued"""
+        if request.format != "pdf":
+            return
+        query, params = self._request_query(request)
+        count = db_manager.execute_query(f"SELECT COUNT(*) as count FROM ({query})", tuple(params))[0]["count"]
+        if count > settings.pdf_job_max_rows:
+            raise self._pdf_too_large()
+    
+    def _request_query(self, request: ExportJobCreate) -> Tuple[str, list]:
+        if request.data_type == "cases":
+            return self.build_cases_query(request.date_from, request.date_to, request.status,
+                                          request.case_type, request.include_sessions)
+        return self.build_sessions_query(request.date_from, request.date_to)
+    
+    def _pdf_too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"PDF exports are limited to {settings.pdf_job_max_rows} rows; "
+                   "narrow the date range or filters, or export as csv or ndjson"
+        )
+    
     def export_reports_summary(self, format: str, date_from: Optional[date] = None,
                               date_to: Optional[date] = None) -> Dict[str, Any]:
         """Export comprehensive reports summary"""
@@ -162,182 +237,199 @@ class ExportManager:
         else:
             raise HTTPException(status_code=400, detail="Summary export only supports PDF and Excel")
     
-    def _export_to_csv(self, data: List[Dict], data_type: str) -> Dict[str, Any]:
-        """Export data to CSV format"""
-        if not data:
-            raise HTTPException(status_code=404, detail="No data found for export")
+    def open_stream(self, query: str, params: tuple, format: str, data_type: str,
+                    compress: bool = False, progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """Start a streamed export; the returned "chunks" iterator yields encoded bytes.
         
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
+        The first chunk of rows is fetched here so that query errors and empty results are
+        reported before the response starts. Memory stays at one chunk of rows regardless of size.
+        """
+        row_chunks = self._open_row_chunks(query, params, progress)
         
-        content = output.getvalue()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{data_type}_export_{timestamp}.csv"
+        encoders = {"csv": self._stream_csv, "json": self._stream_json, "ndjson": self._stream_ndjson}
+        chunks = encoders[format](row_chunks, data_type)
+        content_type, extension = STREAMING_FORMATS[format]
         
+        if compress:
+            chunks = self._gzip_stream(chunks)
+            content_type, extension = "application/gzip", f"{extension}.gz"
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         return {
-            "content": content,
-            "filename": filename,
-            "content_type": "text/csv",
-            "size": len(content.encode('utf-8'))
+            "chunks": chunks,
+            "filename": f"{data_type}_export_{timestamp}.{extension}",
+            "content_type": content_type
         }
     
-    def _export_to_excel(self, data: List[Dict], data_type: str) -> Dict[str, Any]:
-        """Export data to Excel format with styling"""
-        if not data:
+    def _open_row_chunks(self, query: str, params: tuple,
+                         progress: Optional[Callable[[int], None]] = None) -> Iterator[List[Dict]]:
+        """Run an export query and return its row chunks, raising 404 if it has no rows"""
+        row_chunks = db_manager.stream_query(query, params, settings.export_chunk_size)
+        first_chunk = next(row_chunks, None)
+        if not first_chunk:
+            row_chunks.close()
             raise HTTPException(status_code=404, detail="No data found for export")
+        return self._row_chunks(first_chunk, row_chunks, progress)
+    
+    @staticmethod
+    def _row_chunks(first_chunk: List[Dict], row_chunks: Iterator[List[Dict]],
+                    progress: Optional[Callable[[int], None]]) -> Iterator[List[Dict]]:
+        """Yield the prefetched chunk and the rest, reporting each one once the consumer is done with it.
         
-        wb = Workbook()
-        ws = wb.active
-        ws.title = data_type.title()
+        Closing this generator closes the query stream and its connection.
+        """
+        try:
+            for rows in itertools.chain([first_chunk], row_chunks):
+                yield rows
+                if progress:
+                    progress(len(rows))
+        finally:
+            row_chunks.close()
+    
+    def _stream_csv(self, row_chunks: Iterable[List[Dict]], data_type: str) -> Iterator[bytes]:
+        """Encode row chunks as CSV, one encoded block per chunk"""
+        output = io.StringIO()
+        writer = None
+        for rows in row_chunks:
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=rows[0].keys())
+                writer.writeheader()
+            writer.writerows(rows)
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate()
+    
+    def _stream_json(self, row_chunks: Iterable[List[Dict]], data_type: str) -> Iterator[bytes]:
+        """Encode row chunks as one JSON document; total_records comes last since it is only known at the end"""
+        header = json.dumps({"export_date": datetime.now().isoformat(), "data_type": data_type}, ensure_ascii=False)
+        yield (header[:-1] + ', "data": [').encode('utf-8')
+        
+        total = 0
+        for rows in row_chunks:
+            separator = ",\n" if total else "\n"
+            yield (separator + ",\n".join(
+                json.dumps(row, ensure_ascii=False, default=str) for row in rows
+            )).encode('utf-8')
+            total += len(rows)
+        
+        yield f'\n], "total_records": {total}}}'.encode('utf-8')
+    
+    def _stream_ndjson(self, row_chunks: Iterable[List[Dict]], data_type: str) -> Iterator[bytes]:
+        """Encode row chunks as JSON Lines, one object per row"""
+        for rows in row_chunks:
+            yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows).encode('utf-8')
+    
+    @staticmethod
+    def _gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Compress a byte stream into a gzip file incrementally"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    
+    def _export_to_excel(self, row_chunks: Iterator[List[Dict]], data_type: str) -> Dict[str, Any]:
+        """Export row chunks to Excel using openpyxl's write-only mode.
+        
+        Rows are written straight to the sheet's XML instead of being kept as cell objects,
+        column widths are estimated from the first rows, and the finished file is spooled to
+        a temporary file that is streamed back and removed once sent.
+        """
+        first_chunk = next(row_chunks)
+        headers = list(first_chunk[0].keys())
         
-        # Headers
-        headers = list(data[0].keys())
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=data_type.title())
+        
+        # Column widths must be set before the first row is written
+        sample = first_chunk[:EXCEL_WIDTH_SAMPLE_ROWS]
+        for col, header in enumerate(headers, 1):
+            max_length = max([len(str(header))] + [len(str(record.get(header) or '')) for record in sample])
+            ws.column_dimensions[get_column_letter(col)].width = min(max_length + 2, 50)
         
         # Style headers
         header_font = Font(bold=True, color="FFFFFF")
         header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
         header_alignment = Alignment(horizontal="center", vertical="center")
         
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
             cell.font = header_font
             cell.fill = header_fill
             cell.alignment = header_alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
         
         # Data rows
-        for row, record in enumerate(data, 2):
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=row, column=col, value=record.get(header, ''))
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to bytes
-        output = io.BytesIO()
-        wb.save(output)
-        content = output.getvalue()
+        for rows in itertools.chain([first_chunk], row_chunks):
+            for record in rows:
+                ws.append([record.get(header, '') for header in headers])
+        
+        output = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+        try:
+            wb.save(output)
+            size = output.tell()
+            output.seek(0)
+        except Exception:
+            output.close()
+            raise
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{data_type}_export_{timestamp}.xlsx"
         
         return {
-            "content": content,
+            "chunks": self._file_chunks(output),
             "filename": filename,
             "content_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "size": len(content)
+            "size": size
         }
     
-    def _export_to_pdf(self, data: List[Dict], data_type: str) -> Dict[str, Any]:
-        """Export data to PDF format"""
-        if not data:
-            raise HTTPException(status_code=404, detail="No data found for export")
-        
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        
-        elements = []
-        
-        # Title
-        title = f"{data_type.title()} Export Report"
-        elements.append(Paragraph(title, title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Add export info
-        export_info = f"Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>Total Records: {len(data)}"
-        elements.append(Paragraph(export_info, styles['Normal']))
-        elements.append(Spacer(1, 20))
-        
-        # Prepare table data
-        headers = list(data[0].keys())
-        table_data = [headers]
-        
-        for record in data:
-            row = []
-            for header in headers:
-                value = str(record.get(header, ''))
-                # Truncate long values for PDF display
-                if len(value) > 30:
-                    value = value[:27] + "..."
-                row.append(value)
-            table_data.append(row)
-        
-        # Create table
-        table = Table(table_data)
-        
-        # Style table
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        
-        # Build PDF
-        doc.build(elements)
-        
-        content = buffer.getvalue()
+    @staticmethod
+    def _file_chunks(file, block_size: int = FILE_BLOCK_SIZE) -> Iterator[bytes]:
+        """Read a rendered file in blocks and close (delete) it afterwards"""
+        try:
+            while True:
+                block = file.read(block_size)
+                if not block:
+                    break
+                yield block
+        finally:
+            file.close()
+    
+    def _collect_rows(self, query: str, params: tuple,
+                      max_rows: Optional[int] = None) -> Optional[Tuple[List[str], List[tuple]]]:
+        """Fetch an export's column names and row values; None once there are more than max_rows"""
+        row_chunks = self._open_row_chunks(query, params)
+        headers, rows = None, []
+        for chunk in row_chunks:
+            if headers is None:
+                headers = list(chunk[0].keys())
+            rows.extend(tuple(record.values()) for record in chunk)
+            if max_rows is not None and len(rows) > max_rows:
+                row_chunks.close()
+                return None
+        return headers, rows
+    
+    def pdf_result(self, path: str, data_type: str) -> Dict[str, Any]:
+        """Describe a PDF rendered by pdf_renderer; the temporary file is deleted once sent"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{data_type}_export_{timestamp}.pdf"
         
         return {
-            "content": content,
-            "filename": filename,
+            "chunks": self._path_chunks(path),
+            "filename": f"{data_type}_export_{timestamp}.pdf",
             "content_type": "application/pdf",
-            "size": len(content)
+            "size": os.path.getsize(path)
         }
     
-    def _export_to_json(self, data: List[Dict], data_type: str) -> Dict[str, Any]:
-        """Export data to JSON format"""
-        if not data:
-            raise HTTPException(status_code=404, detail="No data found for export")
-        
-        export_data = {
-            "export_date": datetime.now().isoformat(),
-            "data_type": data_type,
-            "total_records": len(data),
-            "data": data
-        }
-        
-        content = json.dumps(export_data, indent=2, ensure_ascii=False, default=str)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{data_type}_export_{timestamp}.json"
-        
-        return {
-            "content": content,
-            "filename": filename,
-            "content_type": "application/json",
-            "size": len(content.encode('utf-8'))
-        }
+    @classmethod
+    def _path_chunks(cls, path: str) -> Iterator[bytes]:
+        """Read a rendered file from disk in blocks and delete it afterwards"""
+        try:
+            yield from cls._file_chunks(open(path, "rb"))
+        finally:
+            os.remove(path)
     
     def _get_comprehensive_stats(self, date_from: Optional[date] = None,
                                 date_to: Optional[date] = None) -> Dict[str, Any]:
@@ -401,58 +493,371 @@ class ExportManager:
         # This would be implemented with openpyxl when available
         raise HTTPException(status_code=501, detail="Excel export not implemented without openpyxl")
 
-# Initialize export manager
+class ExportJobManager:
+    """Renders exports on background threads into files that can be downloaded later.
+    
+    Jobs live in memory and are keyed by their parameters: an identical request made while
+    a job is queued or running joins that job, and a finished file is handed out again until
+    one of the tables it was read from is written (DatabaseManager.table_version).
+    """
+    
+    def __init__(self, workers: int = 1, retention_minutes: int = 60):
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_minutes * 60
+        self.export_dir = os.path.join(os.path.dirname(db_manager.db_path), "exports")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._job_keys: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            # Files left by a previous process belong to no job; drop them before the first one
+            os.makedirs(self.export_dir, exist_ok=True)
+            for name in os.listdir(self.export_dir):
+                self._remove_file(os.path.join(self.export_dir, name))
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export-job")
+        return self._executor
+    
+    def submit(self, request: ExportJobCreate) -> Dict[str, Any]:
+        """Queue an export, or return the outstanding or still current job for the same request"""
+        export_manager.check_format(request.format)
+        
+        filters = {"date_from": request.date_from, "date_to": request.date_to}
+        tables = EXPORT_SOURCE_TABLES[request.data_type]
+        if request.data_type == "cases":
+            filters.update(status=request.status, case_type=request.case_type,
+                           include_sessions=request.include_sessions)
+            if request.include_sessions:
+                tables += ("case_sessions",)
+        compress = request.gzip and request.format in STREAMING_FORMATS
+        key = (request.data_type, request.format, compress, tuple(sorted(filters.items())))
+        
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(self._job_keys.get(key))
+            if job is not None and (
+                job["status"] in ("queued", "running")
+                or (job["status"] == "completed" and job["data_version"] == self._data_version(tables))
+            ):
+                return self._public(job)
+            
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "data_type": request.data_type,
+                "format": request.format,
+                "compress": compress,
+                "filters": filters,
+                "tables": tables,
+                "status": "queued",
+                "rows_done": 0,
+                "total_rows": None,
+                "filename": None,
+                "content_type": None,
+                "size": None,
+                "error": None,
+                "data_version": None,
+                "path": os.path.join(self.export_dir, job_id),
+                "created_at": datetime.now(),
+                "started_at": None,
+                "finished_at": None,
+                "finished_ts": None,
+            }
+            self._jobs[job_id] = job
+            self._job_keys[key] = job_id
+            self._get_executor().submit(self._run, job)
+            return self._public(job)
+    
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Get a job's status and progress"""
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="مهمة التصدير غير موجودة")
+            return self._public(job)
+    
+    def get_artifact(self, job_id: str) -> Dict[str, Any]:
+        """Get the path, name and size of a finished job's file"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or (job["status"] == "completed" and not os.path.exists(job["path"])):
+                raise HTTPException(status_code=404, detail="مهمة التصدير غير موجودة")
+            if job["status"] != "completed":
+                raise HTTPException(status_code=409, detail="ملف التصدير غير جاهز بعد")
+            return {key: job[key] for key in ("path", "filename", "content_type", "size")}
+    
+    def _run(self, job: Dict[str, Any]):
+        job["started_at"] = datetime.now()
+        job["status"] = "running"
+        part_path = job["path"] + ".part"
+        
+        def progress(rows: int):
+            job["rows_done"] += rows
+        
+        try:
+            # Stamp the data before reading it, so a write racing the export makes the file stale
+            job["data_version"] = self._data_version(job["tables"])
+            if job["data_type"] == "cases":
+                query, params = export_manager.build_cases_query(**job["filters"])
+            else:
+                query, params = export_manager.build_sessions_query(**job["filters"])
+            
+            job["total_rows"] = db_manager.execute_query(
+                f"SELECT COUNT(*) as count FROM ({query})", tuple(params)
+            )[0]["count"]
+            
+            result = export_manager.render(job["format"], query, tuple(params), job["data_type"],
+                                           job["compress"], progress)
+            chunks = result["chunks"] if "chunks" in result else iter((result["content"],))
+            try:
+                with open(part_path, "wb") as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+            finally:
+                # Closes the query's connection if writing stopped early
+                if hasattr(chunks, "close"):
+                    chunks.close()
+            os.replace(part_path, job["path"])
+            
+            job.update(
+                filename=result["filename"],
+                content_type=result["content_type"],
+                size=os.path.getsize(job["path"]),
+                total_rows=job["rows_done"]
+            )
+            job["status"] = "completed"
+        except Exception as e:
+            self._remove_file(part_path)
+            if isinstance(e, HTTPException):
+                job["error"] = e.detail
+            else:
+                logger.exception("Export job %s failed", job["id"])
+                job["error"] = str(e)
+            job["status"] = "failed"
+        finally:
+            job["finished_at"] = datetime.now()
+            job["finished_ts"] = time.monotonic()
+    
+    def _purge_expired(self):
+        """Forget finished jobs past the retention period and delete their files"""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job["finished_ts"] is not None and now - job["finished_ts"] > self.retention_seconds:
+                del self._jobs[job_id]
+                self._remove_file(job["path"])
+        for key, job_id in list(self._job_keys.items()):
+            if job_id not in self._jobs:
+                del self._job_keys[key]
+    
+    @staticmethod
+    def _data_version(tables: Tuple[str, ...]) -> tuple:
+        return tuple(db_manager.table_version(table) for table in tables)
+    
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        total = job["total_rows"]
+        if job["status"] == "completed":
+            progress = 100.0
+        else:
+            progress = round(min(job["rows_done"] / total, 1.0) * 100, 1) if total else 0.0
+        return {
+            "id": job["id"],
+            "data_type": job["data_type"],
+            "format": job["format"],
+            "status": job["status"],
+            "rows_done": job["rows_done"],
+            "total_rows": total,
+            "progress": progress,
+            "filename": job["filename"],
+            "size": job["size"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+    
+    def clear(self):
+        """Cancel queued jobs, forget every job and delete the rendered files"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            for job in self._jobs.values():
+                self._remove_file(job["path"])
+            self._jobs.clear()
+            self._job_keys.clear()
+
+# Initialize export managers
 export_manager = ExportManager()
+export_job_manager = ExportJobManager(settings.export_job_workers, settings.export_job_retention_minutes)
+
+def _export_response(result: Dict[str, Any]) -> StreamingResponse:
+    """Send a streamed export chunk by chunk, or an already rendered file in one piece"""
+    content = result["chunks"] if "chunks" in result else io.BytesIO(result["content"])
+    return StreamingResponse(
+        content,
+        media_type=result["content_type"],
+        headers={"Content-Disposition": f"attachment; filename={result['filename']}"}
+    )
+
+async def _pdf_export_response(job_request: ExportJobCreate) -> Response:
+    """Render a PDF export for this request, or hand a large one to a background export job.
+    
+    Up to pdf_max_rows rows are laid out while the client waits; the layout runs in a worker
+    process and is awaited here, so it holds neither a database worker nor a thread. Larger
+    exports answer 202 with the job, to be polled and downloaded under /export/jobs, up to
+    pdf_job_max_rows; beyond that the export is refused with 413.
+    """
+    export_manager.check_format(job_request.format)
+    collected = await db_manager.run_sync(export_manager.collect_pdf_rows, job_request)
+    if collected is None:
+        await db_manager.run_sync(export_manager.check_pdf_rows, job_request)
+        job = export_job_manager.submit(job_request)
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
+    
+    headers, rows = collected
+    path = await pdf_renderer.render_async(headers, rows, job_request.data_type)
+    return _export_response(export_manager.pdf_result(path, job_request.data_type))
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single "bytes=start-end" range; returns None when it cannot be satisfied.
+    
+    Raises ValueError for headers this endpoint ignores (malformed, inverted or multiple
+    ranges); RFC 9110 has those served as a plain 200 with the full body.
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header)
+    if not match or not (match.group(1) or match.group(2)):
+        raise ValueError(range_header)
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        raise ValueError(range_header)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+def _read_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(FILE_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+def _artifact_response(artifact: Dict[str, Any], range_header: Optional[str]) -> Response:
+    """Send a rendered export file, honouring a single byte range so downloads can resume"""
+    size = artifact["size"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={artifact['filename']}"
+    }
+    
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            range_header = None
+        else:
+            if byte_range is None:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    
+    if not range_header:
+        return FileResponse(artifact["path"], media_type=artifact["content_type"], headers=headers)
+    
+    start, end = byte_range
+    headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(
+        _read_file_range(artifact["path"], start, end),
+        status_code=206,
+        media_type=artifact["content_type"],
+        headers=headers
+    )
+
+@router.post("/jobs", response_model=ExportJob, status_code=202)
+async def create_export_job(
+    job_request: ExportJobCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """Queue a cases or sessions export to be rendered in the background"""
+    await db_manager.run_sync(export_manager.check_pdf_rows, job_request)
+    return export_job_manager.submit(job_request)
+
+@router.get("/jobs/{job_id}", response_model=ExportJob)
+async def get_export_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status and progress of an export job"""
+    return export_job_manager.get(job_id)
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Download the file of a finished export job; supports Range requests"""
+    artifact = export_job_manager.get_artifact(job_id)
+    return _artifact_response(artifact, request.headers.get("range"))
 
 @router.get("/cases")
 async def export_cases(
-    format: str = Query(..., description="Export format: csv, excel, pdf, json"),
+    format: str = Query(..., description="Export format: csv, json, ndjson, excel, pdf"),
     date_from: Optional[date] = Query(None, description="Start date filter"),
     date_to: Optional[date] = Query(None, description="End date filter"),
     status: Optional[str] = Query(None, description="Case status filter"),
     case_type: Optional[str] = Query(None, description="Case type filter"),
+    include_sessions: bool = Query(False, description="One row per case session"),
+    gzip: bool = Query(False, description="Compress csv/json/ndjson output as .gz"),
     current_user: User = Depends(get_current_user)
 ):
     """Export cases data in various formats"""
     
-    result = export_manager.export_cases(format, date_from, date_to, status, case_type)
-    
-    if format in ["excel", "pdf"]:
-        return StreamingResponse(
-            io.BytesIO(result["content"]),
-            media_type=result["content_type"],
-            headers={"Content-Disposition": f"attachment; filename={result['filename']}"}
-        )
-    else:
-        return StreamingResponse(
-            io.StringIO(result["content"]),
-            media_type=result["content_type"],
-            headers={"Content-Disposition": f"attachment; filename={result['filename']}"}
-        )
+    if format == "pdf":
+        return await _pdf_export_response(ExportJobCreate(
+            data_type="cases", format=format, date_from=date_from, date_to=date_to,
+            status=status, case_type=case_type, include_sessions=include_sessions
+        ))
+    result = await db_manager.run_sync(
+        export_manager.export_cases, format, date_from, date_to, status, case_type, include_sessions, gzip
+    )
+    return _export_response(result)
 
 @router.get("/sessions")
 async def export_sessions(
-    format: str = Query(..., description="Export format: csv, excel, pdf, json"),
+    format: str = Query(..., description="Export format: csv, json, ndjson, excel, pdf"),
     date_from: Optional[date] = Query(None, description="Start date filter"),
     date_to: Optional[date] = Query(None, description="End date filter"),
+    gzip: bool = Query(False, description="Compress csv/json/ndjson output as .gz"),
     current_user: User = Depends(get_current_user)
 ):
     """Export sessions data in various formats"""
     
-    result = export_manager.export_sessions(format, date_from, date_to)
-    
-    if format in ["excel", "pdf"]:
-        return StreamingResponse(
-            io.BytesIO(result["content"]),
-            media_type=result["content_type"],
-            headers={"Content-Disposition": f"attachment; filename={result['filename']}"}
-        )
-    else:
-        return StreamingResponse(
-            io.StringIO(result["content"]),
-            media_type=result["content_type"],
-            headers={"Content-Disposition": f"attachment; filename={result['filename']}"}
-        )
+    if format == "pdf":
+        return await _pdf_export_response(ExportJobCreate(
+            data_type="sessions", format=format, date_from=date_from, date_to=date_to
+        ))
+    result = await db_manager.run_sync(export_manager.export_sessions, format, date_from, date_to, gzip)
+    return _export_response(result)
 
 @router.get("/summary")
 async def export_summary_report(
@@ -466,7 +871,7 @@ async def export_summary_report(
     if format not in ["pdf", "excel"]:
         raise HTTPException(status_code=400, detail="Summary reports only support PDF and Excel formats")
     
-    result = export_manager.export_reports_summary(format, date_from, date_to)
+    result = await db_manager.run_sync(export_manager.export_reports_summary, format, date_from, date_to)
     
     return StreamingResponse(
         io.BytesIO(result["content"]),
@@ -491,6 +896,12 @@ async def get_supported_formats(
             "description": "JavaScript Object Notation", 
             "supports": ["cases", "sessions", "notes"],
             "available": True
+        },
+        "ndjson": {
+            "name": "JSON Lines",
+            "description": "One JSON object per line, suited to very large exports",
+            "supports": ["cases", "sessions"],
+            "available": True
         }
     }
     
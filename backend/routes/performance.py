@@ -17,6 +17,8 @@ from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
 from config.database import db_manager
 from config.settings import settings
+from utils.cache import app_cache
+from utils.auth import password_hasher
 
 router = APIRouter(prefix="/performance", tags=["Performance"])
 
@@ -24,8 +26,7 @@ class PerformanceManager:
     """System performance monitoring and optimization"""
     
     def __init__(self):
-        self.cache = {}
-        self.cache_ttl = {}
+        self.cache = app_cache
         self.performance_logs = []
         self._ensure_performance_tables()
     
@@ -89,7 +90,8 @@ class PerformanceManager:
                 cpu_percent = 0.0
                 memory_usage_mb = 0.0
             
-            db_manager.execute_write("""
+            # Fire-and-forget: with the write pipeline enabled this is group-committed
+            db_manager.submit_write("""
                 INSERT INTO performance_logs 
                 (timestamp, operation_type, duration_ms, memory_usage_mb, 
                  cpu_percent, user_id, endpoint, parameters)
@@ -147,8 +149,8 @@ class PerformanceManager:
             except:
                 pass
             
-            # Active database connections (estimate)
-            active_connections = len(self.performance_logs)  # Simplified metric
+            # Open connections held by the database pool
+            active_connections = db_manager.get_pool_status()["open_connections"]
             
             metrics = {
                 "timestamp": datetime.now().isoformat(),
@@ -163,7 +165,7 @@ class PerformanceManager:
             }
             
             # Store metrics
-            db_manager.execute_write("""
+            db_manager.submit_write("""
                 INSERT INTO system_metrics 
                 (timestamp, cpu_percent, memory_percent, memory_used_mb, 
                  disk_usage_percent, active_connections, database_size_mb)
@@ -231,6 +233,7 @@ class PerformanceManager:
             
             return {
                 "database_size_mb": os.path.getsize(db_manager.db_path) / 1024 / 1024,
+                "connection_pool": db_manager.get_pool_status(),
                 "tables_info": tables_info,
                 "integrity_check": integrity_ok,
                 "recent_performance": recent_logs,
@@ -293,11 +296,32 @@ class PerformanceManager:
                 "duration_ms": int((time.time() - start_time) * 1000)
             }
     
+    def rebuild_search_index(self) -> Dict[str, Any]:
+        """Rebuild the full-text search index from the cases, notes and sessions tables"""
+        start_time = time.time()
+        
+        try:
+            indexed = db_manager.rebuild_search_index()
+            duration_ms = int((time.time() - start_time) * 1000)
+            self.log_operation("search_index_rebuild", duration_ms)
+            
+            return {
+                "status": "success",
+                "duration_ms": duration_ms,
+                "indexed_rows": indexed,
+                "timestamp": datetime.now().isoformat()
+            }
+            
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e),
+                "duration_ms": int((time.time() - start_time) * 1000)
+            }
+    
     def clear_cache(self) -> Dict[str, Any]:
         """Clear application cache"""
-        cache_items = len(self.cache)
-        self.cache.clear()
-        self.cache_ttl.clear()
+        cache_items = self.cache.clear()
         
         return {
             "status": "success",
@@ -307,19 +331,17 @@ class PerformanceManager:
     
     def get_cache_info(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        current_time = time.time()
         
         # Clean expired items
-        expired_keys = [key for key, ttl in self.cache_ttl.items() if ttl < current_time]
-        for key in expired_keys:
-            self.cache.pop(key, None)
-            self.cache_ttl.pop(key, None)
+        expired = self.cache.purge_expired()
+        keys = self.cache.keys()
         
         return {
-            "cache_size": len(self.cache),
-            "cache_items": list(self.cache.keys()),
-            "memory_usage_estimate": len(str(self.cache)) / 1024,  # KB estimate
-            "expired_cleaned": len(expired_keys)
+            "cache_size": len(keys),
+            "cache_items": [str(key) for key in keys],
+            "memory_usage_estimate": len(str(keys)) / 1024,  # KB estimate of the keys only
+            "expired_cleaned": expired,
+            "statistics": self.cache.get_stats()
         }
     
     def get_performance_trends(self, hours: int = 24) -> Dict[str, Any]:
@@ -374,14 +396,14 @@ async def get_system_metrics(
     current_user: User = Depends(get_current_user)
 ):
     """Get current system performance metrics"""
-    return performance_manager.get_system_metrics()
+    return await db_manager.run_sync(performance_manager.get_system_metrics)
 
 @router.get("/database")
 async def get_database_performance(
     current_user: User = Depends(get_current_user)
 ):
     """Get database performance information"""
-    return performance_manager.get_database_performance()
+    return await db_manager.run_sync(performance_manager.get_database_performance)
 
 @router.post("/optimize")
 async def optimize_system(
@@ -407,7 +429,14 @@ async def optimize_system_sync(
     current_user: User = Depends(get_admin_user)
 ):
     """Optimize system performance synchronously (Admin only)"""
-    return performance_manager.optimize_database()
+    return await db_manager.run_sync(performance_manager.optimize_database)
+
+@router.post("/search-index/rebuild")
+async def rebuild_search_index(
+    current_user: User = Depends(get_admin_user)
+):
+    """Rebuild the full-text search index (Admin only)"""
+    return await db_manager.run_sync(performance_manager.rebuild_search_index)
 
 @router.post("/cache/clear")
 async def clear_cache(
@@ -423,13 +452,20 @@ async def get_cache_info(
     """Get cache information (Admin only)"""
     return performance_manager.get_cache_info()
 
+@router.get("/password-hashing")
+async def get_password_hashing_stats(
+    current_user: User = Depends(get_admin_user)
+):
+    """Get password hashing pool load and latency (Admin only)"""
+    return password_hasher.get_stats()
+
 @router.get("/trends")
 async def get_performance_trends(
     hours: int = 24,
     current_user: User = Depends(get_current_user)
 ):
     """Get performance trends over specified hours"""
-    return performance_manager.get_performance_trends(hours)
+    return await db_manager.run_sync(performance_manager.get_performance_trends, hours)
 
 @router.get("/logs")
 async def get_performance_logs(
@@ -438,7 +474,7 @@ async def get_performance_logs(
 ):
     """Get recent performance logs"""
     
-    logs = db_manager.execute_query("""
+    logs = await db_manager.fetch_all("""
         SELECT * FROM performance_logs
         ORDER BY timestamp DESC
         LIMIT ?
@@ -459,7 +495,7 @@ async def health_check(
     
     # Test database connection
     try:
-        db_test = db_manager.execute_query("SELECT 1 as test")
+        db_test = await db_manager.fetch_all("SELECT 1 as test")
         db_status = "healthy" if db_test else "unhealthy"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -478,7 +514,9 @@ async def health_check(
     response_time = int((time.time() - start_time) * 1000)
     
     # Log health check
-    performance_manager.log_operation("health_check", response_time, current_user.id, "/performance/health")
+    await db_manager.run_sync(
+        performance_manager.log_operation, "health_check", response_time, current_user.id, "/performance/health"
+    )
     
     health_status = {
         "status": "healthy" if db_status == "healthy" else "degraded",
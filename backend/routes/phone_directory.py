@@ -23,6 +23,7 @@ from models.base import BaseResponse, PaginatedResponse
 from models.user import User
 from dependencies.auth import get_current_user
 from config.database import db_manager
+from utils.database import db_utils
 
 router = APIRouter(prefix="/phone-directory", tags=["Phone Directory"])
 
@@ -42,7 +43,7 @@ async def create_phone_entry(
     
     try:
         # Insert new entry using db_manager
-        entry_id = db_manager.execute_write("""
+        entry_id = await db_manager.execute("""
             INSERT INTO phone_directory (الاسم, الرقم, الجهه, created_by, updated_by)
             VALUES (?, ?, ?, ?, ?)
         """, (
@@ -60,7 +61,7 @@ async def create_phone_entry(
             )
         
         # Fetch the created entry
-        rows = db_manager.execute_query("""
+        rows = await db_manager.fetch_all("""
             SELECT id, الاسم, الرقم, الجهه, created_at, updated_at, created_by, updated_by
             FROM phone_directory WHERE id = ?
         """, (entry_id,))
@@ -99,6 +100,8 @@ async def list_phone_entries(
     name: Optional[str] = Query(None, alias="الاسم", description="Search by name"),
     phone: Optional[str] = Query(None, alias="الرقم", description="Search by phone"),
     org: Optional[str] = Query(None, alias="الجهه", description="Search by organization"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (keyset pagination)"),
+    include_total: bool = Query(True, description="Count all matching entries (false returns a lower bound)"),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -128,27 +131,31 @@ async def list_phone_entries(
             where_conditions.append("الجهه LIKE ?")
             params.append(f"%{org}%")
         
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        # Get total count
-        count_rows = db_manager.execute_query(f"""
-            SELECT COUNT(*) as total FROM phone_directory WHERE {where_clause}
-        """, params)
+        keys = [("created_at", "created_at", True), ("id", "id", True)]
         
-        total = count_rows[0]["total"] if count_rows else 0
+        if cursor:
+            # Keyset page: seek past the cursor row, no count and no OFFSET
+            keyset_condition, keyset_params = db_utils.build_keyset_condition(keys, cursor)
+            where_conditions.append(keyset_condition)
+            params.extend(keyset_params)
         
-        # Calculate pagination
-        offset = (page - 1) * size
-        pages = (total + size - 1) // size
+        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
-        # Get entries
-        rows = db_manager.execute_query(f"""
+        query = f"""
             SELECT id, الاسم, الرقم, الجهه, created_at, updated_at, created_by, updated_by
             FROM phone_directory 
             WHERE {where_clause}
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """, params + [size, offset])
+            ORDER BY {db_utils.keyset_order_by(keys)}
+        """
+        
+        if cursor:
+            result = await db_utils.keyset_paginate(query, tuple(params), keys, size)
+        else:
+            result = await db_utils.paginate(
+                query, tuple(params), page, size, keys, include_total,
+                total_table=None if where_conditions else "phone_directory"
+            )
+        rows = result["items"]
         
         entries = []
         for row in rows:
@@ -163,14 +170,10 @@ async def list_phone_entries(
                 updated_by=row["updated_by"]
             ))
         
-        return PhoneDirectoryListResponse(
-            items=entries,
-            total=total,
-            page=page,
-            size=size,
-            pages=pages
-        )
+        return PhoneDirectoryListResponse(**{**result, "items": entries})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -188,7 +191,7 @@ async def get_phone_entry(
     """
     
     try:
-        rows = db_manager.execute_query("""
+        rows = await db_manager.fetch_all("""
             SELECT id, الاسم, الرقم, الجهه, created_at, updated_at, created_by, updated_by
             FROM phone_directory WHERE id = ?
         """, (entry_id,))
@@ -232,7 +235,7 @@ async def update_phone_entry(
     
     try:
         # Check if entry exists
-        existing_rows = db_manager.execute_query(
+        existing_rows = await db_manager.fetch_all(
             "SELECT id, created_by FROM phone_directory WHERE id = ?", 
             (entry_id,)
         )
@@ -270,14 +273,14 @@ async def update_phone_entry(
         params.extend([current_user.id, entry_id])
         
         # Execute update
-        db_manager.execute_write(f"""
+        await db_manager.execute(f"""
             UPDATE phone_directory 
             SET {', '.join(update_fields)}
             WHERE id = ?
         """, params)
         
         # Fetch updated entry
-        rows = db_manager.execute_query("""
+        rows = await db_manager.fetch_all("""
             SELECT id, الاسم, الرقم, الجهه, created_at, updated_at, created_by, updated_by
             FROM phone_directory WHERE id = ?
         """, (entry_id,))
@@ -327,7 +330,7 @@ async def delete_phone_entry(
     
     try:
         # Check if entry exists
-        existing_rows = db_manager.execute_query(
+        existing_rows = await db_manager.fetch_all(
             "SELECT id FROM phone_directory WHERE id = ?", 
             (entry_id,)
         )
@@ -339,7 +342,7 @@ async def delete_phone_entry(
             )
         
         # Delete entry
-        rows_affected = db_manager.execute_write(
+        rows_affected = await db_manager.execute(
             "DELETE FROM phone_directory WHERE id = ?", 
             (entry_id,)
         )
@@ -380,5 +383,7 @@ async def search_phone_entries(
         name=search_request.الاسم,
         phone=search_request.الرقم,
         org=search_request.الجهه,
+        cursor=None,
+        include_total=True,
         current_user=current_user
     )
@@ -7,9 +7,23 @@ import json
 from dependencies.auth import get_current_user
 from models.user import User
 from config.database import db_manager
+from utils.cache import app_cache
 
 router = APIRouter(prefix="/print", tags=["Print"])
 
+# Tables the print reports are built from; a write to any of them drops cached reports
+PRINT_TAGS = ("cases", "case_types", "case_sessions", "case_notes", "users")
+
+# Reports are cached with these markers in place of their generation time, which is
+# filled in for each response
+REPORT_DATE_MARK = "<!--report-date-->"
+REPORT_TIME_MARK = "<!--report-time-->"
+
+def _stamp_report(html: str) -> str:
+    now = datetime.now()
+    return (html.replace(REPORT_DATE_MARK, now.strftime('%Y-%m-%d %H:%M'))
+                .replace(REPORT_TIME_MARK, now.strftime('%Y-%m-%d %H:%M:%S')))
+
 class PrintManager:
     """Print-friendly document generator"""
     
@@ -94,7 +108,7 @@ class PrintManager:
             <div class="header">
                 <h1>تقرير القضية</h1>
                 <h2>رقم القضية: {case['case_number']}</h2>
-                <p>تاريخ التقرير: {datetime.now().strftime('%Y-%m-%d %H:%M')} (ميلادي)</p>
+                <p>تاريخ التقرير: {REPORT_DATE_MARK} (ميلادي)</p>
             </div>
             
             <div class="case-details">
@@ -197,7 +211,7 @@ class PrintManager:
             </div>
         </body>
         </html>
-        """.format(datetime.now().strftime('%Y-%m-%d %H:%M:%S') + ' (ميلادي)')
+        """.format(REPORT_TIME_MARK + ' (ميلادي)')
         
         return html
     
@@ -261,7 +275,7 @@ class PrintManager:
                 <h1>تقرير قائمة القضايا</h1>
                 <p>المرشحات: {filter_info}</p>
                 <p>إجمالي القضايا: {total_cases}</p>
-                <p>تاريخ التقرير: {datetime.now().strftime('%Y-%m-%d %H:%M')} (ميلادي)</p>
+                <p>تاريخ التقرير: {REPORT_DATE_MARK} (ميلادي)</p>
             </div>
             
             <table>
@@ -299,7 +313,7 @@ class PrintManager:
             </table>
             
             <div class="footer">
-                <p>نظام إدارة القضايا القانونية - تم إنتاج هذا التقرير في {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p>نظام إدارة القضايا القانونية - تم إنتاج هذا التقرير في {REPORT_TIME_MARK}</p>
             </div>
         </body>
         </html>
@@ -358,7 +372,7 @@ class PrintManager:
             
             <div class="header">
                 <h1>تقرير لوحة التحكم</h1>
-                <p>تاريخ التقرير: {datetime.now().strftime('%Y-%m-%d %H:%M')} (ميلادي)</p>
+                <p>تاريخ التقرير: {REPORT_DATE_MARK} (ميلادي)</p>
             </div>
             
             <div class="stats-grid">
@@ -431,7 +445,7 @@ class PrintManager:
             </table>
             
             <div class="footer">
-                <p>نظام إدارة القضايا القانونية - تم إنتاج هذا التقرير في {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} (ميلادي)</p>
+                <p>نظام إدارة القضايا القانونية - تم إنتاج هذا التقرير في {REPORT_TIME_MARK} (ميلادي)</p>
             </div>
         </body>
         </html>
@@ -448,8 +462,12 @@ async def print_case_report(
     current_user: User = Depends(get_current_user)
 ):
     """Generate printable case report"""
-    html = print_manager.generate_case_report(case_id)
-    return HTMLResponse(content=html, status_code=200)
+    html = await app_cache.get_or_set_async(
+        ("print", "case", case_id),
+        lambda: db_manager.run_sync(print_manager.generate_case_report, case_id),
+        tags=PRINT_TAGS
+    )
+    return HTMLResponse(content=_stamp_report(html), status_code=200)
 
 @router.get("/cases", response_class=HTMLResponse)
 async def print_cases_list(
@@ -459,13 +477,21 @@ async def print_cases_list(
     current_user: User = Depends(get_current_user)
 ):
     """Generate printable cases list report"""
-    html = print_manager.generate_cases_list_report(date_from, date_to, status)
-    return HTMLResponse(content=html, status_code=200)
+    html = await app_cache.get_or_set_async(
+        ("print", "cases", date_from, date_to, status),
+        lambda: db_manager.run_sync(print_manager.generate_cases_list_report, date_from, date_to, status),
+        tags=PRINT_TAGS
+    )
+    return HTMLResponse(content=_stamp_report(html), status_code=200)
 
 @router.get("/dashboard", response_class=HTMLResponse)
 async def print_dashboard_report(
     current_user: User = Depends(get_current_user)
 ):
     """Generate printable dashboard report"""
-    html = print_manager.generate_dashboard_report()
-    return HTMLResponse(content=html, status_code=200)
+    html = await app_cache.get_or_set_async(
+        ("print", "dashboard"),
+        lambda: db_manager.run_sync(print_manager.generate_dashboard_report),
+        tags=PRINT_TAGS
+    )
+    return HTMLResponse(content=_stamp_report(html), status_code=200)
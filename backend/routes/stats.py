@@ -1,43 +1,57 @@
 from fastapi import APIRouter, Depends
 from typing import Dict, Any
-from dependencies.auth import get_current_user
+from dependencies.auth import get_current_user, get_admin_user
 from models.user import User
 from config.database import db_manager
+from utils.cache import app_cache
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
 
+# Tables every statistic below is read from; a write to any of them drops the cached results
+STATS_TAGS = ("cases", "case_types", "case_sessions", "case_notes", "users", "stats_counters")
+
+# Case counts per type, read from the materialized counters
+CASE_TYPE_COUNTS_QUERY = """
+    SELECT ct.id, ct.name, ct.description, COALESCE(s.value, 0) as case_count
+    FROM case_types ct
+    LEFT JOIN stats_counters s ON s.metric = 'case_type' AND s.key = ct.id
+    ORDER BY case_count DESC, ct.name ASC
+"""
+
+JUDGMENT_COUNTS_QUERY = """
+    SELECT key as judgment_type, value as case_count
+    FROM stats_counters
+    WHERE metric = 'judgment' AND value > 0
+    ORDER BY case_count DESC
+"""
+
 @router.get("/dashboard")
 async def get_dashboard_statistics(
     current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """Get dashboard statistics"""
+    return await app_cache.get_or_set_async(("stats", "dashboard"), _load_dashboard, tags=STATS_TAGS)
+
+async def _load_dashboard() -> Dict[str, Any]:
+    """Read dashboard statistics from the materialized counters"""
     
     # Total counts
-    total_cases = db_manager.execute_query("SELECT COUNT(*) as count FROM cases")[0]['count']
-    total_users = db_manager.execute_query("SELECT COUNT(*) as count FROM users WHERE is_active = 1")[0]['count']
-    total_case_types = db_manager.execute_query("SELECT COUNT(*) as count FROM case_types")[0]['count']
-    total_sessions = db_manager.execute_query("SELECT COUNT(*) as count FROM case_sessions")[0]['count']
-    total_notes = db_manager.execute_query("SELECT COUNT(*) as count FROM case_notes")[0]['count']
+    totals = {
+        row['key']: row['value']
+        for row in await db_manager.fetch_all("SELECT key, value FROM stats_counters WHERE metric = 'total'")
+    }
     
     # Cases by judgment type
-    judgment_stats = db_manager.execute_query("""
-        SELECT judgment_type, COUNT(*) as case_count
-        FROM cases
-        GROUP BY judgment_type
-        ORDER BY case_count DESC
-    """)
+    judgment_stats = await db_manager.fetch_all(JUDGMENT_COUNTS_QUERY)
     
     # Cases by type
-    type_stats = db_manager.execute_query("""
-        SELECT ct.name, COUNT(c.id) as case_count
-        FROM case_types ct
-        LEFT JOIN cases c ON ct.id = c.case_type_id
-        GROUP BY ct.id, ct.name
-        ORDER BY case_count DESC
-    """)
+    type_stats = [
+        {"name": row["name"], "case_count": row["case_count"]}
+        for row in await db_manager.fetch_all(CASE_TYPE_COUNTS_QUERY)
+    ]
     
     # Recent cases (last 10)
-    recent_cases = db_manager.execute_query("""
+    recent_cases = await db_manager.fetch_all("""
         SELECT c.id, c.case_number, c.plaintiff, c.defendant, 
                ct.name as case_type_name, c.judgment_type, c.created_at
         FROM cases c
@@ -47,32 +61,30 @@ async def get_dashboard_statistics(
     """)
     
     # Cases with upcoming sessions (if session_date is in the future)
-    upcoming_sessions = db_manager.execute_query("""
+    upcoming_sessions = await db_manager.fetch_all("""
         SELECT c.case_number, c.plaintiff, c.defendant,
                cs.session_date, cs.session_notes
         FROM case_sessions cs
         JOIN cases c ON cs.case_id = c.id
-        WHERE cs.session_date > datetime('now')
-        ORDER BY cs.session_date ASC
+        WHERE datetime(cs.session_date) > datetime('now')
+        ORDER BY datetime(cs.session_date) ASC
         LIMIT 10
     """)
     
     # Monthly case creation trend (last 6 months)
-    monthly_trend = db_manager.execute_query("""
-        SELECT strftime('%Y-%m', created_at) as month,
-               COUNT(*) as count
-        FROM cases
-        WHERE created_at >= date('now', '-6 months')
-        GROUP BY strftime('%Y-%m', created_at)
+    monthly_trend = await db_manager.fetch_all("""
+        SELECT month, count
+        FROM stats_monthly
+        WHERE month >= strftime('%Y-%m', 'now', '-6 months') AND count > 0
         ORDER BY month ASC
     """)
     
     return {
-        "total_cases": total_cases,
-        "total_users": total_users,
-        "total_case_types": total_case_types,
-        "total_sessions": total_sessions,
-        "total_notes": total_notes,
+        "total_cases": totals.get("cases", 0),
+        "total_users": totals.get("active_users", 0),
+        "total_case_types": totals.get("case_types", 0),
+        "total_sessions": totals.get("case_sessions", 0),
+        "total_notes": totals.get("case_notes", 0),
         "cases_by_judgment": judgment_stats,
         "cases_by_type": type_stats,
         "recent_cases": recent_cases,
@@ -85,40 +97,37 @@ async def get_cases_by_type(
     current_user: User = Depends(get_current_user)
 ):
     """Get cases count by type"""
+    return await app_cache.get_or_set_async(("stats", "cases_by_type"), _load_cases_by_type, tags=STATS_TAGS)
+
+async def _load_cases_by_type():
+    """Query cases count by type"""
     
-    result = db_manager.execute_query("""
-        SELECT ct.id, ct.name, ct.description, COUNT(c.id) as case_count
-        FROM case_types ct
-        LEFT JOIN cases c ON ct.id = c.case_type_id
-        GROUP BY ct.id, ct.name, ct.description
-        ORDER BY case_count DESC, ct.name ASC
-    """)
-    
-    return result
+    return await db_manager.fetch_all(CASE_TYPE_COUNTS_QUERY)
 
 @router.get("/cases-by-judgment")
 async def get_cases_by_judgment(
     current_user: User = Depends(get_current_user)
 ):
     """Get cases count by judgment type"""
+    return await app_cache.get_or_set_async(("stats", "cases_by_judgment"), _load_cases_by_judgment, tags=STATS_TAGS)
+
+async def _load_cases_by_judgment():
+    """Query cases count by judgment type"""
     
-    result = db_manager.execute_query("""
-        SELECT judgment_type, COUNT(*) as case_count
-        FROM cases
-        GROUP BY judgment_type
-        ORDER BY case_count DESC
-    """)
-    
-    return result
+    return await db_manager.fetch_all(JUDGMENT_COUNTS_QUERY)
 
 @router.get("/user-activity")
 async def get_user_activity(
     current_user: User = Depends(get_current_user)
 ):
     """Get user activity statistics"""
+    return await app_cache.get_or_set_async(("stats", "user_activity"), _load_user_activity, tags=STATS_TAGS)
+
+async def _load_user_activity():
+    """Query user activity statistics"""
     
     # Cases created by user
-    cases_by_user = db_manager.execute_query("""
+    cases_by_user = await db_manager.fetch_all("""
         SELECT u.full_name, COUNT(c.id) as cases_created
         FROM users u
         LEFT JOIN cases c ON u.id = c.created_by
@@ -128,7 +137,7 @@ async def get_user_activity(
     """)
     
     # Sessions created by user
-    sessions_by_user = db_manager.execute_query("""
+    sessions_by_user = await db_manager.fetch_all("""
         SELECT u.full_name, COUNT(cs.id) as sessions_created
         FROM users u
         LEFT JOIN case_sessions cs ON u.id = cs.created_by
@@ -138,7 +147,7 @@ async def get_user_activity(
     """)
     
     # Notes created by user
-    notes_by_user = db_manager.execute_query("""
+    notes_by_user = await db_manager.fetch_all("""
         SELECT u.full_name, COUNT(cn.id) as notes_created
         FROM users u
         LEFT JOIN case_notes cn ON u.id = cn.created_by
@@ -152,3 +161,11 @@ async def get_user_activity(
         "sessions_by_user": sessions_by_user,
         "notes_by_user": notes_by_user
     }
+
+@router.post("/rebuild")
+async def rebuild_statistics(
+    admin_user: User = Depends(get_admin_user)
+):
+    """Recompute the materialized statistics from the source tables (Admin only)"""
+    result = await db_manager.run_sync(db_manager.rebuild_statistics)
+    return {"message": "تم إعادة بناء الإحصائيات بنجاح", **result}
@@ -2,10 +2,10 @@ from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Optional
 from models.user import User, UserCreate, UserUpdate, UserPasswordUpdate
 from models.base import PaginatedResponse
-from dependencies.auth import get_admin_user, get_current_user
-from config.database import db_manager
+from dependencies.auth import get_admin_user, get_current_user, invalidate_cached_user
+from config.database import db_manager, UnitOfWork
 from config.settings import settings
-from utils.auth import auth_utils
+from utils.auth import password_hasher, token_store
 from utils.database import db_utils
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -35,7 +35,7 @@ async def get_users(
     
     base_query += " ORDER BY created_at DESC"
     
-    result = db_utils.paginate_query(base_query, tuple(params), page, size)
+    result = await db_utils.paginate(base_query, tuple(params), page, size)
     
     return PaginatedResponse(**result)
 
@@ -46,8 +46,8 @@ async def create_user(
 ):
     """Create new user (Admin only)"""
     
-    # Check if username already exists
-    existing_users = db_manager.execute_query(
+    # Check if username already exists (fast path before paying for bcrypt)
+    existing_users = await db_manager.fetch_all(
         "SELECT id FROM users WHERE username = ?",
         (user_data.username,)
     )
@@ -58,24 +58,34 @@ async def create_user(
             detail="اسم المستخدم موجود بالفعل"
         )
     
-    # Hash password
-    password_hash = auth_utils.hash_password(user_data.password)
-    
-    # Create user
-    user_id = db_manager.execute_write(
-        """INSERT INTO users (username, password_hash, full_name, user_type, created_by, updated_by)
-           VALUES (?, ?, ?, ?, ?, ?)""",
-        (user_data.username, password_hash, user_data.full_name, 
-         user_data.user_type.value, admin_user.id, admin_user.id)
-    )
+    # Hash password outside the transaction so the write lock is not held during bcrypt
+    password_hash = await password_hasher.hash(user_data.password)
+    
+    def create_in_transaction(uow: UnitOfWork) -> dict:
+        # Re-check under the write lock to close the race with a concurrent insert
+        if uow.execute_query_one("SELECT id FROM users WHERE username = ?", (user_data.username,)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="اسم المستخدم موجود بالفعل"
+            )
+        
+        # Create user
+        user_id = uow.execute_write(
+            """INSERT INTO users (username, password_hash, full_name, user_type, created_by, updated_by)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (user_data.username, password_hash, user_data.full_name, 
+             user_data.user_type.value, admin_user.id, admin_user.id)
+        )
+        
+        # Get created user
+        return uow.execute_query_one(
+            "SELECT id, username, full_name, user_type, is_active, created_at, updated_at FROM users WHERE id = ?",
+            (user_id,)
+        )
     
-    # Get created user
-    users = db_manager.execute_query(
-        "SELECT id, username, full_name, user_type, is_active, created_at, updated_at FROM users WHERE id = ?",
-        (user_id,)
-    )
+    user = await db_manager.run_in_transaction(create_in_transaction)
     
-    return User(**users[0])
+    return User(**user)
 
 @router.get("/{user_id}", response_model=User)
 async def get_user(
@@ -84,7 +94,7 @@ async def get_user(
 ):
     """Get user by ID (Admin only)"""
     
-    users = db_manager.execute_query(
+    users = await db_manager.fetch_all(
         "SELECT id, username, full_name, user_type, is_active, created_at, updated_at FROM users WHERE id = ?",
         (user_id,)
     )
@@ -106,7 +116,7 @@ async def update_user(
     """Update user (Admin only)"""
     
     # Check if user exists
-    users = db_manager.execute_query("SELECT id FROM users WHERE id = ?", (user_id,))
+    users = await db_manager.fetch_all("SELECT id FROM users WHERE id = ?", (user_id,))
     if not users:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,10 +153,11 @@ async def update_user(
     query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
     params.append(user_id)
     
-    db_manager.execute_write(query, tuple(params))
+    await db_manager.execute(query, tuple(params))
+    invalidate_cached_user(user_id)
     
     # Return updated user
-    updated_users = db_manager.execute_query(
+    updated_users = await db_manager.fetch_all(
         "SELECT id, username, full_name, user_type, is_active, created_at, updated_at FROM users WHERE id = ?",
         (user_id,)
     )
@@ -168,7 +179,7 @@ async def delete_user(
         )
     
     # Check if user exists
-    users = db_manager.execute_query("SELECT id FROM users WHERE id = ?", (user_id,))
+    users = await db_manager.fetch_all("SELECT id FROM users WHERE id = ?", (user_id,))
     if not users:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -176,7 +187,8 @@ async def delete_user(
         )
     
     # Delete user (hard delete)
-    rows_affected = db_manager.execute_write("DELETE FROM users WHERE id = ?", (user_id,))
+    rows_affected = await db_manager.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    invalidate_cached_user(user_id)
     
     if rows_affected == 0:
         raise HTTPException(
@@ -193,10 +205,11 @@ async def activate_user(
 ):
     """Activate user (Admin only)"""
     
-    rows_affected = db_manager.execute_write(
+    rows_affected = await db_manager.execute(
         "UPDATE users SET is_active = 1, updated_by = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
         (admin_user.id, user_id)
     )
+    invalidate_cached_user(user_id)
     
     if rows_affected == 0:
         raise HTTPException(
@@ -205,7 +218,7 @@ async def activate_user(
         )
     
     # Return updated user data
-    users = db_manager.execute_query(
+    users = await db_manager.fetch_all(
         """SELECT id, username, full_name, user_type, is_active, 
            created_at, updated_at, created_by, updated_by 
            FROM users WHERE id = ?""",
@@ -245,10 +258,12 @@ async def deactivate_user(
             detail="لا يمكن إلغاء تفعيل حسابك الشخصي"
         )
     
-    rows_affected = db_manager.execute_write(
+    rows_affected = await db_manager.execute(
         "UPDATE users SET is_active = 0, updated_by = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
         (admin_user.id, user_id)
     )
+    invalidate_cached_user(user_id)
+    await token_store.revoke_user_sessions(user_id)
     
     if rows_affected == 0:
         raise HTTPException(
@@ -257,7 +272,7 @@ async def deactivate_user(
         )
     
     # Return updated user data
-    users = db_manager.execute_query(
+    users = await db_manager.fetch_all(
         """SELECT id, username, full_name, user_type, is_active, 
            created_at, updated_at, created_by, updated_by 
            FROM users WHERE id = ?""",
@@ -292,7 +307,7 @@ async def update_user_password(
     """Update user password (Admin only)"""
     
     # Check if user exists
-    users = db_manager.execute_query("SELECT id FROM users WHERE id = ?", (user_id,))
+    users = await db_manager.fetch_all("SELECT id FROM users WHERE id = ?", (user_id,))
     if not users:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -300,12 +315,14 @@ async def update_user_password(
         )
     
     # Hash new password
-    password_hash = auth_utils.hash_password(password_update.new_password)
+    password_hash = await password_hasher.hash(password_update.new_password)
     
     # Update password
-    db_manager.execute_write(
+    await db_manager.execute(
         "UPDATE users SET password_hash = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
         (password_hash, admin_user.id, user_id)
     )
+    invalidate_cached_user(user_id)
+    await token_store.revoke_user_sessions(user_id)
     
     return {"message": "تم تحديث كلمة المرور بنجاح"}
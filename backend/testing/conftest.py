@@ -23,6 +23,10 @@ def setup_test_database():
     # Set environment variable for test database path
     os.environ["DATABASE_PATH"] = TEST_DATABASE
     
+    # Close pooled connections opened at import time before the file is replaced
+    from config.database import db_manager
+    db_manager.close_all()
+
     # Remove existing test database
     if os.path.exists(TEST_DATABASE):
         os.remove(TEST_DATABASE)
@@ -177,6 +181,7 @@ def setup_test_database():
     yield
     
     # Cleanup
+    db_manager.close_all()
     if os.path.exists(TEST_DATABASE):
         os.remove(TEST_DATABASE)
 
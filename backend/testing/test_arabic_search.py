@@ -239,3 +239,24 @@ class TestArabicSearch:
         assert response.status_code == 200
         data = response.json()
         assert len(data["items"]) >= 1
+
+class TestArabicTextProcessor:
+    """Test the table-driven Arabic normalizer"""
+    
+    def test_removes_full_tashkeel_range_and_tatweel(self):
+        """Test that all harakat, Quranic marks, superscript alef and tatweel are dropped"""
+        from utils.arabic import ArabicTextProcessor
+        
+        assert ArabicTextProcessor.normalize_text("مُحَمَّـــد") == "محمد"
+        assert ArabicTextProcessor.normalize_text("رَحْمٰنٗ") == "رحمن"
+        assert ArabicTextProcessor.normalize_text("  مصطفى آل إبراهيم ٱلمؤسسة ") == "مصطفي ال ابراهيم الموسسه"
+    
+    def test_normalize_many_matches_normalize_text(self):
+        """Test that the batch API yields the same values, including for empty input"""
+        from utils.arabic import ArabicTextProcessor
+        
+        texts = ["أحمد", None, "", "شركة الإسكان", "CASE/2025"]
+        
+        assert list(ArabicTextProcessor.normalize_many(texts)) == [
+            ArabicTextProcessor.normalize_text(text) for text in texts
+        ]
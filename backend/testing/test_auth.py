@@ -19,7 +19,8 @@ class TestAuthentication:
         assert "token_type" in data
         assert data["token_type"] == "bearer"
         assert "expires_in" in data
-        assert data["expires_in"] == 43200  # 12 hours
+        assert data["expires_in"] == 1800  # 30 minutes, renewed with the refresh token
+        assert data["refresh_token"]
         assert "user" in data
         assert data["user"]["username"] == "admin"
         assert data["user"]["user_type"] == "admin"
@@ -85,3 +86,78 @@ class TestAuthentication:
         )
         
         assert response.status_code == 403
+    
+    async def test_refresh_token_rotation(self, async_client: AsyncClient):
+        """Test that refresh issues new tokens and consumes the old refresh token"""
+        login = await async_client.post("/api/v1/auth/login", json={
+            "username": "admin", "password": "admin123"
+        })
+        refresh_token = login.json()["refresh_token"]
+        assert refresh_token
+        
+        response = await async_client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["refresh_token"] != refresh_token
+        assert data["user"]["username"] == "admin"
+        
+        me = await async_client.get("/api/v1/users", headers=auth_headers(data["access_token"]))
+        assert me.status_code == 200
+        
+        # A refresh token is single use
+        reused = await async_client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+        assert reused.status_code == 401
+    
+    async def test_logout_revokes_tokens(self, async_client: AsyncClient):
+        """Test that logout revokes both the access token and the refresh token"""
+        login = await async_client.post("/api/v1/auth/login", json={
+            "username": "admin", "password": "admin123"
+        })
+        data = login.json()
+        headers = auth_headers(data["access_token"])
+        assert (await async_client.get("/api/v1/users", headers=headers)).status_code == 200
+        
+        response = await async_client.post("/api/v1/auth/logout", json={"refresh_token": data["refresh_token"]}, headers=headers)
+        assert response.status_code == 200
+        
+        assert (await async_client.get("/api/v1/users", headers=headers)).status_code == 401
+        refreshed = await async_client.post("/api/v1/auth/refresh", json={"refresh_token": data["refresh_token"]})
+        assert refreshed.status_code == 401
+
+@pytest.mark.asyncio
+class TestPasswordHasher:
+    """Test the bounded password hashing pool"""
+    
+    async def test_hash_and_verify_off_loop(self):
+        """Test hashing round trip and latency statistics"""
+        from utils.auth import PasswordHasher
+        hasher = PasswordHasher(workers=1, queue_limit=4)
+        try:
+            hashed = await hasher.hash("secret123")
+            assert await hasher.verify("secret123", hashed)
+            assert not await hasher.verify("wrong", hashed)
+            
+            stats = hasher.get_stats()
+            assert stats["hash_calls"] == 1
+            assert stats["verify_calls"] == 2
+            assert stats["max_ms"] > 0
+            assert stats["in_flight"] == 0
+        finally:
+            hasher.shutdown()
+    
+    async def test_saturated_pool_returns_429(self):
+        """Test that calls beyond workers + queue_limit are rejected"""
+        import asyncio
+        from fastapi import HTTPException
+        from utils.auth import PasswordHasher
+        hasher = PasswordHasher(workers=1, queue_limit=0)
+        try:
+            results = await asyncio.gather(
+                hasher.hash("first"), hasher.hash("second"), return_exceptions=True
+            )
+            rejected = [r for r in results if isinstance(r, HTTPException)]
+            assert len(rejected) == 1
+            assert rejected[0].status_code == 429
+            assert hasher.get_stats()["rejected"] == 1
+        finally:
+            hasher.shutdown()
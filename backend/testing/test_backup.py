@@ -0,0 +1,263 @@
+import pytest
+import asyncio
+import io
+import json
+import os
+import sqlite3
+import struct
+import tempfile
+import time
+import zipfile
+from httpx import AsyncClient
+from conftest import auth_headers
+from datetime import datetime, timedelta
+from config.database import db_manager
+from routes.backup import backup_manager
+from utils import backup_archive
+from utils.backup_store import select_retained
+
+@pytest.mark.asyncio
+class TestBackup:
+    """Test online database backups"""
+    
+    async def wait_for_job(self, async_client: AsyncClient, headers: dict, job_id: str) -> dict:
+        """Poll a backup job until it finishes"""
+        for _ in range(200):
+            job = (await async_client.get(f"/api/v1/backup/jobs/{job_id}", headers=headers)).json()
+            if job["status"] in ("completed", "failed"):
+                return job
+            await asyncio.sleep(0.05)
+        raise AssertionError(f"backup job {job_id} did not finish")
+    
+    async def test_backup_job(self, async_client: AsyncClient, admin_token: str):
+        """Test a background backup from snapshot to a restorable archive"""
+        headers = auth_headers(admin_token)
+        
+        response = await async_client.post("/api/v1/backup/create", headers=headers)
+        assert response.status_code == 202
+        job = await self.wait_for_job(async_client, headers, response.json()["job"]["id"])
+        assert job["status"] == "completed", job["error"]
+        assert job["progress"] == 100.0
+        backup = job["backup"]
+        
+        try:
+            # Backups in the store download as a standalone archive
+            response = await async_client.get(f"/api/v1/backup/download/{backup['id']}", headers=headers)
+            assert response.status_code == 200
+            with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+                assert {"legal_cases.db", "backup_metadata.json", "table_schemas.sql"} <= set(archive.namelist())
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    archive.extract("legal_cases.db", temp_dir)
+                    conn = sqlite3.connect(os.path.join(temp_dir, "legal_cases.db"))
+                    try:
+                        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+                        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+                        cases = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+                    finally:
+                        conn.close()
+            assert backup["metadata"]["statistics"]["cases"] == cases
+            
+            backups = (await async_client.get("/api/v1/backup/list", headers=headers)).json()["backups"]
+            assert backup["id"] in [item["id"] for item in backups]
+        finally:
+            await async_client.delete(f"/api/v1/backup/delete/{backup['id']}", headers=headers)
+        
+        response = await async_client.get("/api/v1/backup/jobs/missing", headers=headers)
+        assert response.status_code == 404
+    
+    async def test_deduplicated_backups(self, async_client: AsyncClient, admin_token: str, monkeypatch):
+        """Test that a backup after a small change only adds the chunks that changed"""
+        headers = auth_headers(admin_token)
+        # One page per chunk; the test database is only a few default-sized chunks
+        monkeypatch.setattr(backup_manager.store, "chunk_size", 4096)
+        
+        response = await async_client.post("/api/v1/backup/create", headers=headers)
+        first = (await self.wait_for_job(async_client, headers, response.json()["job"]["id"]))["backup"]
+        
+        case_number = f"TEST/2025/DEDUP/{int(time.time() * 1000)}"
+        response = await async_client.post("/api/v1/cases", json={
+            "case_number": case_number,
+            "plaintiff": "مدعي النسخة المكررة",
+            "defendant": "مدعى عليه النسخة المكررة",
+            "case_type_id": 1,
+            "judgment_type": "حكم اول"
+        }, headers=headers)
+        assert response.status_code == 201
+        
+        response = await async_client.post("/api/v1/backup/create", headers=headers)
+        job = await self.wait_for_job(async_client, headers, response.json()["job"]["id"])
+        assert job["status"] == "completed", job["error"]
+        second = job["backup"]
+        
+        try:
+            metadata = second["metadata"]
+            assert 0 < metadata["new_chunks"] < metadata["chunk_count"]
+            assert metadata["added_bytes"] < second["backup_size"]
+            
+            # Deleting the first backup keeps every chunk the second one still uses
+            response = await async_client.delete(f"/api/v1/backup/delete/{first['id']}", headers=headers)
+            assert response.status_code == 200
+            
+            with tempfile.TemporaryDirectory() as temp_dir:
+                restored = os.path.join(temp_dir, "restored.db")
+                backup_manager.store.materialize(second["backup_path"], restored)
+                conn = sqlite3.connect(restored)
+                try:
+                    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+                    assert conn.execute("SELECT COUNT(*) FROM cases WHERE case_number = ?", (case_number,)).fetchone()[0] == 1
+                finally:
+                    conn.close()
+        finally:
+            await async_client.delete(f"/api/v1/backup/delete/{first['id']}", headers=headers)
+            await async_client.delete(f"/api/v1/backup/delete/{second['id']}", headers=headers)
+        
+        response = await async_client.post("/api/v1/backup/prune", params={"dry_run": True}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["garbage_collected"] is None
+
+    async def test_restore_registers_later_backups(self, async_client: AsyncClient, admin_token: str):
+        """Test that backups made after the restored one stay listed after a restore"""
+        headers = auth_headers(admin_token)
+        created = []
+        for _ in range(2):
+            response = await async_client.post("/api/v1/backup/create", headers=headers)
+            job = await self.wait_for_job(async_client, headers, response.json()["job"]["id"])
+            assert job["status"] == "completed", job["error"]
+            created.append(job["backup"])
+        first, second = created
+        names = {first["backup_name"], second["backup_name"]}
+        
+        try:
+            response = await async_client.post(f"/api/v1/backup/restore/{first['id']}", headers=headers)
+            assert response.status_code == 200
+            result = response.json()
+            names.add(result["current_backup_created"])
+            # A backup never holds its own row, so the restored table knew none of them
+            assert set(result["backups_registered"]) == names
+            
+            response = await async_client.get("/api/v1/backup/list", headers=headers)
+            listed = {backup["backup_name"]: backup for backup in response.json()["backups"]}
+            assert names <= set(listed)
+            assert all(listed[name]["file_exists"] for name in names)
+            assert backup_manager.reconcile_catalog() == []
+        finally:
+            response = await async_client.get("/api/v1/backup/list", headers=headers)
+            for backup in response.json()["backups"]:
+                if backup["backup_name"] in names:
+                    response = await async_client.delete(f"/api/v1/backup/delete/{backup['id']}", headers=headers)
+                    assert response.status_code == 200
+
+    async def test_prune_dry_run_writes_nothing(self, async_client: AsyncClient, admin_token: str):
+        """Test that a retention dry run reports unlisted backups without registering them"""
+        headers = auth_headers(admin_token)
+        response = await async_client.post("/api/v1/backup/create", headers=headers)
+        job = await self.wait_for_job(async_client, headers, response.json()["job"]["id"])
+        assert job["status"] == "completed", job["error"]
+        backup = job["backup"]
+        
+        try:
+            # As after a restore: the manifest is in the store but the row is gone
+            db_manager.execute_write("UPDATE backup_operations SET backup_id = NULL WHERE backup_id = ?", (backup["id"],))
+            db_manager.execute_write("DELETE FROM backups WHERE id = ?", (backup["id"],))
+            
+            response = await async_client.post("/api/v1/backup/prune", params={"dry_run": True}, headers=headers)
+            assert response.status_code == 200
+            assert backup["backup_name"] in response.json()["kept"]
+            assert not db_manager.execute_query(
+                "SELECT id FROM backups WHERE backup_name = ?", (backup["backup_name"],)
+            )
+        finally:
+            assert backup_manager.reconcile_catalog() == [backup["backup_name"]]
+            row = db_manager.execute_query("SELECT id FROM backups WHERE backup_name = ?", (backup["backup_name"],))
+            response = await async_client.delete(f"/api/v1/backup/delete/{row[0]['id']}", headers=headers)
+            assert response.status_code == 200
+
+def test_select_retained():
+    """Test the keep-last/hourly/daily/weekly retention policy"""
+    start = datetime(2025, 3, 3)  # A Monday
+    # Every 20 minutes for three whole weeks
+    backups = [
+        {"id": i, "created_at": (start + timedelta(minutes=20 * i)).isoformat()}
+        for i in range(3 * 7 * 24 * 3)
+    ]
+    newest = backups[-1]["id"]
+    
+    assert select_retained(backups) == {backup["id"] for backup in backups}
+    assert select_retained(backups, keep_last=2) == {newest, newest - 1}
+    # The newest backup of each hour is the one at minute 40
+    assert select_retained(backups, hourly=3) == {newest, newest - 3, newest - 6}
+    daily = select_retained(backups, daily=2)
+    assert len(daily) == 2 and newest in daily
+    weekly = select_retained(backups, weekly=5)
+    assert len(weekly) == 3  # Only three weeks have backups
+    assert select_retained(backups, keep_last=1, hourly=2) == {newest, newest - 3}
+
+def test_archive_round_trip(tmp_path):
+    """Test that zip archives, with or without page hashes, extract to the original database"""
+    db_path = tmp_path / "source.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT)")
+    conn.executemany("INSERT INTO notes (text) VALUES (?)", [("x" * 200,)] * 2000)
+    conn.commit()
+    conn.close()
+    
+    archive_path = tmp_path / "full.zip"
+    backup_archive.write_full_archive(str(db_path), str(archive_path), {"backup_type": "full"}, {})
+    restored = tmp_path / "restored.db"
+    backup_archive.extract(str(archive_path), str(restored))
+    assert restored.read_bytes() == db_path.read_bytes()
+    
+    # Archives made before the store hold only the database and its metadata
+    legacy_path = tmp_path / "legacy.zip"
+    with zipfile.ZipFile(legacy_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.write(db_path, backup_archive.DATABASE_ENTRY)
+        zipf.writestr(backup_archive.METADATA_ENTRY, '{"backup_type": "full"}')
+    restored = tmp_path / "legacy.db"
+    backup_archive.extract(str(legacy_path), str(restored))
+    assert restored.read_bytes() == db_path.read_bytes()
+
+def test_incremental_archive_chain(tmp_path):
+    """Test that incremental zip archives from before the store still replay onto their full base"""
+    db_path = tmp_path / "source.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT)")
+    conn.executemany("INSERT INTO notes (text) VALUES (?)", [("x" * 200,)] * 2000)
+    conn.commit()
+    
+    full_path = tmp_path / "full.zip"
+    backup_archive.write_full_archive(str(db_path), str(full_path), {"backup_type": "full"}, {})
+    parent_hashes = backup_archive.read_page_hashes(str(full_path))
+    
+    conn.execute("UPDATE notes SET text = 'changed' WHERE id = 1")
+    conn.executemany("INSERT INTO notes (text) VALUES (?)", [("y" * 200,)] * 100)
+    conn.commit()
+    conn.close()
+    
+    # Laid out as the incremental mode wrote them: the changed pages, their numbers and every page's hash
+    page_size = backup_archive.read_page_size(str(db_path))
+    data = db_path.read_bytes()
+    pages = [data[offset:offset + page_size] for offset in range(0, len(data), page_size)]
+    hashes = backup_archive.hash_pages(str(db_path))
+    size = backup_archive.HASH_SIZE
+    changed = [number for number in range(1, len(pages) + 1)
+               if parent_hashes[(number - 1) * size:number * size] != hashes[(number - 1) * size:number * size]]
+    assert 0 < len(changed) < len(pages)
+    
+    incremental_path = tmp_path / "incremental.zip"
+    metadata = {"backup_type": "incremental", "parent_backup": "full.zip",
+                "page_size": page_size, "page_count": len(pages), "changed_pages": len(changed)}
+    with zipfile.ZipFile(incremental_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr(backup_archive.PAGES_ENTRY, b"".join(pages[number - 1] for number in changed))
+        zipf.writestr(backup_archive.PAGE_NUMBERS_ENTRY, struct.pack(f"<{len(changed)}I", *changed))
+        zipf.writestr(backup_archive.HASHES_ENTRY, hashes)
+        zipf.writestr(backup_archive.METADATA_ENTRY, json.dumps(metadata))
+    
+    assert [os.path.basename(path) for path, _ in backup_archive.resolve_chain(str(incremental_path))] == \
+        ["full.zip", "incremental.zip"]
+    restored = tmp_path / "restored.db"
+    assert backup_archive.extract(str(incremental_path), str(restored)) == ["full.zip", "incremental.zip"]
+    assert restored.read_bytes() == data
+    
+    os.remove(full_path)
+    with pytest.raises(FileNotFoundError):
+        backup_archive.extract(str(incremental_path), str(tmp_path / "orphan.db"))
@@ -0,0 +1,99 @@
+import pytest
+import time
+from config.database import db_manager
+from utils.cache import TTLCache, app_cache
+
+class TestTTLCache:
+    """Test the TTL + LRU result cache"""
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = TTLCache(max_entries=2, default_ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "b" is now least recently used
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()["evictions"] == 1
+    
+    def test_entries_expire(self):
+        """Test per-entry TTL"""
+        cache = TTLCache(max_entries=10, default_ttl=60)
+        cache.set("short", "value", ttl=0.05)
+        cache.set("long", "value")
+        time.sleep(0.1)
+        
+        assert cache.get("short") is None
+        assert cache.get("long") == "value"
+        assert cache.get_stats()["expirations"] == 1
+    
+    def test_loader_runs_once(self):
+        """Test that get_or_set caches the loader result and counts hits and misses"""
+        cache = TTLCache(max_entries=10, default_ttl=60)
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            return "computed"
+        
+        assert cache.get_or_set("key", loader) == "computed"
+        assert cache.get_or_set("key", loader) == "computed"
+        
+        stats = cache.get_stats()
+        assert len(calls) == 1
+        assert stats["hits"] == 1 and stats["misses"] == 1
+    
+    def test_database_write_invalidates_tagged_entries(self):
+        """Test that a committed write drops entries tagged with the written table"""
+        app_cache.set(("test", "case_types"), "stale", tags=("case_types",))
+        app_cache.set(("test", "users"), "kept", tags=("users",))
+        
+        new_id = db_manager.execute_write(
+            "INSERT INTO case_types (name, description) VALUES (?, ?)", ("نوع لاختبار الذاكرة المؤقتة", None)
+        )
+        db_manager.execute_write("DELETE FROM case_types WHERE id = ?", (new_id,))
+        
+        assert app_cache.get(("test", "case_types")) is None
+        assert app_cache.get(("test", "users")) == "kept"
+        app_cache.delete(("test", "users"))
+    
+    @pytest.mark.asyncio
+    async def test_value_computed_across_a_write_is_not_cached(self):
+        """Test that a result read before a concurrent write is not stored"""
+        cache = TTLCache(max_entries=10, default_ttl=60)
+        
+        async def loader():
+            cache.invalidate_tags(["cases"])  # A write lands while the loader runs
+            return "outdated"
+        
+        assert await cache.get_or_set_async("key", loader, tags=("cases",)) == "outdated"
+        assert cache.get("key") is None
+    
+    @pytest.mark.asyncio
+    async def test_cached_print_report_is_stamped_per_request(self, async_client, admin_token, monkeypatch):
+        """Test that a cached print report shows the time of the request, not of the cached render"""
+        import routes.print as print_routes
+        from datetime import datetime
+        from conftest import auth_headers
+        
+        class FixedDatetime(datetime):
+            moment = datetime(2025, 1, 1, 9, 0, 0)
+            
+            @classmethod
+            def now(cls, tz=None):
+                return cls.moment
+        
+        monkeypatch.setattr(print_routes, "datetime", FixedDatetime)
+        app_cache.clear()
+        headers = auth_headers(admin_token)
+        
+        first = (await async_client.get("/api/v1/print/dashboard", headers=headers)).text
+        FixedDatetime.moment = datetime(2025, 1, 1, 10, 30, 15)
+        second = (await async_client.get("/api/v1/print/dashboard", headers=headers)).text
+        
+        assert "2025-01-01 09:00" in first
+        assert "2025-01-01 10:30" in second and "2025-01-01 10:30:15" in second
+        assert "2025-01-01 09:00" not in second
+        assert print_routes.REPORT_DATE_MARK not in second
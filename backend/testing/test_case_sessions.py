@@ -265,3 +265,34 @@ class TestCaseSessions:
         assert data["size"] == 3
         assert len(data["items"]) <= 3
         assert data["total"] >= 5
+    
+    async def test_sessions_calendar(self, async_client: AsyncClient, admin_token: str):
+        """Test the calendar groups a date range by day and pages by cursor"""
+        headers = auth_headers(admin_token)
+        test_case = await self.setup_test_case(async_client, admin_token)
+        
+        # Three sessions over two days, one outside the range
+        for session_date in ("2031-03-02T09:00:00", "2031-03-02T13:00:00", "2031-03-04T10:00:00", "2031-03-09T10:00:00"):
+            await async_client.post(f"/api/v1/cases/{test_case['id']}/sessions", json={
+                "session_date": session_date, "session_notes": "جلسة التقويم"
+            }, headers=headers)
+        
+        response = await async_client.get("/api/v1/sessions/calendar?from=2031-03-01&to=2031-03-07", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [day["date"] for day in data["days"]] == ["2031-03-02", "2031-03-04"]
+        assert len(data["days"][0]["sessions"]) == 2
+        assert data["days"][0]["sessions"][0]["case_number"] == test_case["case_number"]
+        assert data["next_cursor"] is None
+        
+        # Two per page: the second page continues after the cursor
+        first = (await async_client.get("/api/v1/sessions/calendar?from=2031-03-01&to=2031-03-07&size=2", headers=headers)).json()
+        assert first["next_cursor"]
+        second = (await async_client.get(
+            f"/api/v1/sessions/calendar?from=2031-03-01&to=2031-03-07&size=2&cursor={first['next_cursor']}", headers=headers
+        )).json()
+        assert [day["date"] for day in second["days"]] == ["2031-03-04"]
+        assert second["next_cursor"] is None
+        
+        invalid = await async_client.get("/api/v1/sessions/calendar?from=2031-03-07&to=2031-03-01", headers=headers)
+        assert invalid.status_code == 400
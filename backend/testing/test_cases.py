@@ -267,6 +267,33 @@ class TestCases:
         response2 = await async_client.get("/api/v1/cases?search=شركة", headers=headers)
         assert response2.status_code == 200
     
+    async def test_search_without_full_text_index(self, async_client: AsyncClient, admin_token: str, monkeypatch):
+        """Test that searches fall back to the normalized columns when SQLite lacks trigram FTS5"""
+        from config.database import db_manager
+        headers = auth_headers(admin_token)
+        
+        import time
+        timestamp = int(time.time() * 1000)
+        response = await async_client.post("/api/v1/cases", json={
+            "case_number": f"NOFTS/{timestamp}/001",
+            "plaintiff": "مُنير الاحتياطي",
+            "defendant": "مؤسسة البديل",
+            "case_type_id": 1,
+            "judgment_type": "حكم اول"
+        }, headers=headers)
+        case_id = response.json()["id"]
+        await async_client.post(f"/api/v1/cases/{case_id}/notes", json={"note_text": "مذكرة الاستئناف المتأخر"}, headers=headers)
+        
+        monkeypatch.setattr(db_manager, "fts_available", False)
+        
+        response = await async_client.get("/api/v1/cases?search=منير الاحتياط", headers=headers)
+        assert [item["id"] for item in response.json()["items"]] == [case_id]
+        
+        response = await async_client.get("/api/v1/cases?search=الاستيناف المتاخر&include_notes=true", headers=headers)
+        assert [item["id"] for item in response.json()["items"]] == [case_id]
+        
+        await async_client.delete(f"/api/v1/cases/{case_id}", headers=headers)
+    
     async def test_filter_cases_by_type(self, async_client: AsyncClient, admin_token: str):
         """Test filtering cases by case type"""
         headers = auth_headers(admin_token)
@@ -301,6 +328,108 @@ class TestCases:
         assert data["size"] == 10
         assert len(data["items"]) <= 10
     
+    async def test_cases_cursor_pagination(self, async_client: AsyncClient, admin_token: str):
+        """Test that following next_cursor walks the same rows as offset pages"""
+        import time
+        headers = auth_headers(admin_token)
+        timestamp = int(time.time() * 1000)
+        for i in range(5):
+            await async_client.post("/api/v1/cases", json={
+                "case_number": f"CURSOR/{timestamp}/{i}",
+                "plaintiff": "مدعي صفحات المؤشر",
+                "defendant": "مدعى عليه صفحات المؤشر",
+                "case_type_id": 1,
+                "judgment_type": "حكم اول"
+            }, headers=headers)
+        
+        offset_page = await async_client.get("/api/v1/cases?page=1&size=1000", headers=headers)
+        expected = [case["id"] for case in offset_page.json()["items"]]
+        
+        first = (await async_client.get("/api/v1/cases?size=2", headers=headers)).json()
+        seen = [case["id"] for case in first["items"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            response = await async_client.get("/api/v1/cases", params={"size": 2, "cursor": cursor}, headers=headers)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] is None
+            seen.extend(case["id"] for case in data["items"])
+            cursor = data["next_cursor"]
+        
+        assert seen == expected
+        
+        response = await async_client.get("/api/v1/cases?cursor=not-a-cursor", headers=headers)
+        assert response.status_code == 400
+    
+    async def test_cases_total_modes(self, async_client: AsyncClient, admin_token: str):
+        """Test cached, single-pass and skipped totals"""
+        import time
+        headers = auth_headers(admin_token)
+        
+        before = (await async_client.get("/api/v1/cases?size=1", headers=headers)).json()
+        assert before["total_exact"] is True
+        
+        # Cached unfiltered total must follow writes
+        await async_client.post("/api/v1/cases", json={
+            "case_number": f"TOTAL/{int(time.time() * 1000)}",
+            "plaintiff": "مدعي العدد الكلي",
+            "defendant": "مدعى عليه العدد الكلي",
+            "case_type_id": 1,
+            "judgment_type": "حكم اول"
+        }, headers=headers)
+        after = (await async_client.get("/api/v1/cases?size=1", headers=headers)).json()
+        assert after["total"] == before["total"] + 1
+        
+        # Filtered listings count in the same pass as the page
+        filtered = (await async_client.get("/api/v1/cases?size=1&case_type_id=1", headers=headers)).json()
+        assert filtered["total"] == len((await async_client.get(
+            "/api/v1/cases?size=1000&case_type_id=1", headers=headers
+        )).json()["items"])
+        
+        skipped = (await async_client.get("/api/v1/cases?size=1&include_total=false", headers=headers)).json()
+        assert len(skipped["items"]) == 1
+        assert skipped["total_exact"] is False
+        assert skipped["total"] == 2
+    
+    async def test_case_aggregates_follow_sessions_and_notes(self, async_client: AsyncClient, admin_token: str):
+        """Test that session/note counts and latest session date are kept on the case"""
+        import time
+        headers = auth_headers(admin_token)
+        
+        case = (await async_client.post("/api/v1/cases", json={
+            "case_number": f"AGG/{int(time.time() * 1000)}",
+            "plaintiff": "مدعي التجميع",
+            "defendant": "مدعى عليه التجميع",
+            "case_type_id": 1,
+            "judgment_type": "حكم اول"
+        }, headers=headers)).json()
+        assert case["sessions_count"] == 0
+        
+        sessions = []
+        for session_date in ("2025-02-01T10:00:00", "2025-05-01T10:00:00"):
+            response = await async_client.post(f"/api/v1/cases/{case['id']}/sessions", json={
+                "session_date": session_date, "session_notes": "جلسة"
+            }, headers=headers)
+            sessions.append(response.json())
+        await async_client.post(f"/api/v1/cases/{case['id']}/notes", json={"note_text": "ملاحظة"}, headers=headers)
+        
+        full = (await async_client.get(f"/api/v1/cases/{case['id']}/full", headers=headers)).json()
+        assert full["sessions_count"] == 2
+        assert full["notes_count"] == 1
+        assert full["latest_session"].startswith("2025-05-01")
+        
+        # The listing returns the same aggregates without extra queries
+        listed = (await async_client.get("/api/v1/cases?size=5", headers=headers)).json()["items"]
+        listed_case = next(item for item in listed if item["id"] == case["id"])
+        assert listed_case["sessions_count"] == 2
+        assert listed_case["notes_count"] == 1
+        
+        # Deleting the latest session falls back to the previous one
+        await async_client.delete(f"/api/v1/sessions/{sessions[1]['id']}", headers=headers)
+        full = (await async_client.get(f"/api/v1/cases/{case['id']}/full", headers=headers)).json()
+        assert full["sessions_count"] == 1
+        assert full["latest_session"].startswith("2025-02-01")
+    
     async def test_get_case_with_full_details(self, async_client: AsyncClient, admin_token: str):
         """Test getting case with full details"""
         headers = auth_headers(admin_token)
@@ -0,0 +1,430 @@
+import pytest
+import sqlite3
+import threading
+from config.database import DatabaseManager, db_manager
+
+class TestDatabaseManager:
+    """Test pooled database connection manager"""
+    
+    def test_connection_is_reused(self):
+        """Test that sequential queries share one pooled connection"""
+        with db_manager.get_connection() as first:
+            pass
+        with db_manager.get_connection() as second:
+            pass
+        
+        assert first is second
+    
+    def test_pragmas_applied(self):
+        """Test that WAL and tuned PRAGMAs are set on pooled connections"""
+        with db_manager.get_connection() as conn:
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+            busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+        
+        assert journal_mode.lower() == "wal"
+        assert foreign_keys == 1
+        assert busy_timeout > 0
+    
+    def test_pool_is_bounded(self):
+        """Test that concurrent checkouts never exceed the pool size"""
+        manager = DatabaseManager()
+        manager.pool_size = 2
+        manager._pool.maxsize = 2
+        seen = set()
+        lock = threading.Lock()
+        
+        def worker():
+            for _ in range(20):
+                with manager.get_connection() as conn:
+                    with lock:
+                        seen.add(id(conn))
+        
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(seen) <= 2
+        assert manager.get_pool_status()["in_use_connections"] == 0
+        manager.close_all()
+    
+    def test_streams_do_not_hold_pooled_connections(self, monkeypatch):
+        """Test that open streamed queries use their own connections, capped at max_streams"""
+        monkeypatch.setattr("config.database.settings.db_pool_timeout", 0.1)
+        manager = DatabaseManager()
+        manager.pool_size = 1
+        manager._pool.maxsize = 1
+        manager.max_streams = 2
+        manager._stream_slots = threading.BoundedSemaphore(2)
+        
+        streams = [manager.stream_query("SELECT id FROM users", chunk_size=1) for _ in range(2)]
+        for stream in streams:
+            assert next(stream)
+        assert manager.get_pool_status()["open_streams"] == 2
+        # The pool is still free for ordinary queries
+        assert manager.execute_query("SELECT 1 AS one") == [{"one": 1}]
+        
+        with pytest.raises(sqlite3.OperationalError):
+            next(manager.stream_query("SELECT id FROM users"))
+        
+        for stream in streams:
+            stream.close()
+        assert manager.get_pool_status()["open_streams"] == 0
+        stream = manager.stream_query("SELECT id FROM users")
+        assert next(stream)
+        stream.close()
+        manager.close_all()
+    
+    def test_failed_write_is_rolled_back(self):
+        """Test that a connection is returned without an open transaction"""
+        with pytest.raises(sqlite3.IntegrityError):
+            with db_manager.get_connection() as conn:
+                conn.execute(
+                    "INSERT INTO case_types (name, description) VALUES (?, ?)",
+                    ("نوع مؤقت للاختبار", None)
+                )
+                conn.execute(
+                    "INSERT INTO case_types (name, description) VALUES (?, ?)",
+                    ("نوع مؤقت للاختبار", None)
+                )
+        
+        rows = db_manager.execute_query(
+            "SELECT id FROM case_types WHERE name = ?", ("نوع مؤقت للاختبار",)
+        )
+        assert rows == []
+    
+    def test_write_returns_rowcount_after_insert(self):
+        """Test that updates report affected rows even on a reused connection"""
+        new_id = db_manager.execute_write(
+            "INSERT INTO case_types (name, description) VALUES (?, ?)",
+            ("نوع لاختبار عدد الصفوف", None)
+        )
+        assert new_id > 0
+        
+        affected = db_manager.execute_write(
+            "UPDATE case_types SET description = ? WHERE id = ?", ("وصف", -1)
+        )
+        assert affected == 0
+        
+        db_manager.execute_write("DELETE FROM case_types WHERE id = ?", (new_id,))
+    
+    @pytest.mark.asyncio
+    async def test_async_fetch_keeps_dict_rows(self):
+        """Test that the async layer returns the same dict rows as execute_query"""
+        rows = await db_manager.fetch_all("SELECT id, name FROM case_types ORDER BY id")
+        
+        assert rows == db_manager.execute_query("SELECT id, name FROM case_types ORDER BY id")
+        assert isinstance(rows[0], dict)
+        assert await db_manager.fetch_one("SELECT id FROM case_types WHERE id = ?", (-1,)) is None
+    
+    @pytest.mark.asyncio
+    async def test_async_queries_overlap(self):
+        """Test that blocking queries run off the event loop and concurrently"""
+        import asyncio
+        import time
+        
+        def slow_query():
+            time.sleep(0.2)
+            return db_manager.execute_query("SELECT 1 as value")
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*[db_manager.run_sync(slow_query) for _ in range(4)])
+        elapsed = time.perf_counter() - start
+        
+        assert all(result[0]["value"] == 1 for result in results)
+        assert elapsed < 0.6
+    
+    def test_transaction_commits_once(self):
+        """Test that a unit of work sees its own writes and commits them together"""
+        with db_manager.transaction() as uow:
+            new_id = uow.execute_write(
+                "INSERT INTO case_types (name, description) VALUES (?, ?)",
+                ("نوع لاختبار وحدة العمل", None)
+            )
+            assert uow.execute_query_one("SELECT id FROM case_types WHERE id = ?", (new_id,))
+        
+        assert db_manager.execute_query("SELECT id FROM case_types WHERE id = ?", (new_id,))
+        db_manager.execute_write("DELETE FROM case_types WHERE id = ?", (new_id,))
+    
+    def test_transaction_rolls_back_on_error(self):
+        """Test that an exception inside a unit of work discards all of its writes"""
+        with pytest.raises(ValueError):
+            with db_manager.transaction() as uow:
+                uow.execute_write(
+                    "INSERT INTO case_types (name, description) VALUES (?, ?)",
+                    ("نوع لاختبار التراجع", None)
+                )
+                raise ValueError("validation failed")
+        
+        rows = db_manager.execute_query(
+            "SELECT id FROM case_types WHERE name = ?", ("نوع لاختبار التراجع",)
+        )
+        assert rows == []
+    
+    def test_write_pipeline_group_commits(self):
+        """Test that concurrent queued writes share commits and each get their own result"""
+        from concurrent.futures import ThreadPoolExecutor
+        from config.database import WritePipeline
+        
+        pipeline = WritePipeline(db_manager)
+        pipeline.max_wait = 0.05
+        names = [f"نوع دفعة {i}" for i in range(40)]
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                futures = list(pool.map(
+                    lambda name: pipeline.submit(
+                        "INSERT INTO case_types (name, description) VALUES (?, ?)", (name, None)
+                    ),
+                    names
+                ))
+            ids = [future.result(timeout=10) for future in futures]
+            status = pipeline.get_status()
+        finally:
+            pipeline.stop()
+        
+        assert len(set(ids)) == len(names)
+        assert status["jobs"] == len(names)
+        assert status["batches"] < len(names)
+        
+        rows = db_manager.execute_query(
+            f"SELECT id FROM case_types WHERE id IN ({','.join('?' * len(ids))})", tuple(ids)
+        )
+        assert len(rows) == len(names)
+        db_manager.execute_write(
+            f"DELETE FROM case_types WHERE id IN ({','.join('?' * len(ids))})", tuple(ids)
+        )
+    
+    def test_write_pipeline_isolates_failed_job(self):
+        """Test that one failing write does not roll back the rest of its batch"""
+        from config.database import WritePipeline
+        
+        pipeline = WritePipeline(db_manager)
+        pipeline.max_wait = 0.05
+        try:
+            good = pipeline.submit(
+                "INSERT INTO case_types (name, description) VALUES (?, ?)", ("نوع دفعة سليم", None)
+            )
+            bad = pipeline.submit(
+                "INSERT INTO case_types (name, description) VALUES (?, ?)", ("نوع دفعة سليم", None)
+            )
+            good_id = good.result(timeout=10)
+            with pytest.raises(sqlite3.IntegrityError):
+                bad.result(timeout=10)
+        finally:
+            pipeline.stop()
+        
+        assert db_manager.execute_query("SELECT id FROM case_types WHERE id = ?", (good_id,))
+        db_manager.execute_write("DELETE FROM case_types WHERE id = ?", (good_id,))
+    
+    def test_search_columns_follow_inserts_and_updates(self):
+        """Test that triggers keep the normalized *_norm search columns in sync"""
+        case_id = db_manager.execute_write(
+            "INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, judgment_type) VALUES (?, ?, ?, ?, ?)",
+            ("NORM/2025/001", "مُحَمَّد أحمد", "شركة الإسكان", 1, "حكم اول")
+        )
+        try:
+            row = db_manager.execute_query(
+                "SELECT plaintiff_norm, defendant_norm, case_number_norm FROM cases WHERE id = ?", (case_id,)
+            )[0]
+            assert row["plaintiff_norm"] == "محمد احمد"
+            assert row["defendant_norm"] == "شركه الاسكان"
+            assert row["case_number_norm"] == "norm/2025/001"
+            
+            db_manager.execute_write("UPDATE cases SET defendant = ? WHERE id = ?", ("مؤسسة إبراهيم", case_id))
+            row = db_manager.execute_query("SELECT defendant_norm FROM cases WHERE id = ?", (case_id,))[0]
+            assert row["defendant_norm"] == "موسسه ابراهيم"
+        finally:
+            db_manager.execute_write("DELETE FROM cases WHERE id = ?", (case_id,))
+    
+    def test_full_text_index_follows_writes(self):
+        """Test that FTS rows are added, replaced and removed with their source rows"""
+        case_id = db_manager.execute_write(
+            "INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, judgment_type) VALUES (?, ?, ?, ?, ?)",
+            ("FTS/2025/001", "سَعِيد الفهرسة", "مؤسسة الفهرس", 1, "حكم اول")
+        )
+        note_id = db_manager.execute_write(
+            "INSERT INTO case_notes (case_id, note_text) VALUES (?, ?)", (case_id, "مذكرة بشأن التعويض")
+        )
+        
+        def matches(fts_table, term):
+            return [row["rowid"] for row in db_manager.execute_query(
+                f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?", (f'"{term}"',)
+            )]
+        
+        try:
+            assert matches("cases_fts", "سعيد") == [case_id]
+            assert matches("case_notes_fts", "تعويض") == [note_id]
+            
+            db_manager.execute_write("UPDATE cases SET plaintiff = ? WHERE id = ?", ("خالد الفهرسة", case_id))
+            assert matches("cases_fts", "سعيد") == []
+            assert matches("cases_fts", "خالد") == [case_id]
+            
+            assert db_manager.rebuild_search_index()["cases_fts"] >= 1
+            assert matches("cases_fts", "خالد") == [case_id]
+        finally:
+            db_manager.execute_write("DELETE FROM cases WHERE id = ?", (case_id,))
+        
+        # Notes removed by ON DELETE CASCADE leave the index too
+        assert matches("cases_fts", "خالد") == []
+        assert matches("case_notes_fts", "تعويض") == []
+    
+    def test_other_connections_can_write(self):
+        """Test that connections without arabic_normalize can write, and their rows are indexed on the next pool start"""
+        db_manager.execute_query("SELECT 1")  # The app has set up the schema
+        conn = sqlite3.connect(db_manager.db_path)
+        try:
+            case_id = conn.execute(
+                "INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, judgment_type) VALUES (?, ?, ?, ?, ?)",
+                ("EXT/2025/001", "سَعِيد الخارجي", "مؤسسة الأداة", 1, "حكم اول")
+            ).lastrowid
+            conn.execute("INSERT INTO case_notes (case_id, note_text) VALUES (?, ?)", (case_id, "مذكرة من أداة خارجية"))
+            conn.commit()
+        finally:
+            conn.close()
+        
+        try:
+            db_manager.close_all()
+            row = db_manager.execute_query("SELECT plaintiff_norm FROM cases WHERE id = ?", (case_id,))[0]
+            assert row["plaintiff_norm"] == "سعيد الخارجي"
+            assert db_manager.execute_query(
+                "SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?", ('"سعيد الخارجي"',)
+            ) == [{"rowid": case_id}]
+            
+            # An update from another tool is marked stale and refreshed on the next pool start
+            conn = sqlite3.connect(db_manager.db_path)
+            try:
+                conn.execute("UPDATE cases SET plaintiff = ? WHERE id = ?", ("خالِد الخارجي", case_id))
+                conn.commit()
+            finally:
+                conn.close()
+            db_manager.close_all()
+            row = db_manager.execute_query("SELECT plaintiff_norm FROM cases WHERE id = ?", (case_id,))[0]
+            assert row["plaintiff_norm"] == "خالد الخارجي"
+            assert db_manager.execute_query(
+                "SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?", ('"خالد الخارجي"',)
+            ) == [{"rowid": case_id}]
+            assert db_manager.execute_query(
+                "SELECT rowid FROM cases_fts WHERE cases_fts MATCH ?", ('"سعيد الخارجي"',)
+            ) == []
+            assert db_manager.execute_query("SELECT COUNT(*) AS count FROM search_stale")[0]["count"] == 0
+        finally:
+            conn = sqlite3.connect(db_manager.db_path)
+            try:
+                conn.execute("DELETE FROM cases WHERE id = ?", (case_id,))
+                conn.commit()
+            finally:
+                conn.close()
+        
+        assert db_manager.execute_query("SELECT rowid FROM cases_fts WHERE rowid = ?", (case_id,)) == []
+    
+    def test_sql_and_python_normalizers_agree(self):
+        """Test that the registered SQL function is the Python normalizer"""
+        from utils.arabic import arabic_processor
+        
+        text = "مُصْطَفَى عليّ إبراهيم المحاماة"
+        row = db_manager.execute_query("SELECT arabic_normalize(?) AS value", (text,))[0]
+        
+        assert row["value"] == arabic_processor.normalize_text(text)
+    
+    def test_prefix_lookup_seeks_normalized_index(self):
+        """Test that exact/prefix searches on *_norm columns use their index"""
+        from utils.database import db_utils
+        
+        condition, params = db_utils.build_normalized_search_conditions("أحمد", ["plaintiff_norm"], "prefix")
+        plan = db_manager.execute_query(f"EXPLAIN QUERY PLAN SELECT id FROM cases WHERE {condition}", tuple(params))
+        
+        assert any("idx_cases_plaintiff_norm" in row["detail"] for row in plan)
+        
+        case_id = db_manager.execute_write(
+            "INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, judgment_type) VALUES (?, ?, ?, ?, ?)",
+            ("PREFIX/2025/001", "أَحمد بادئة", "طرف آخر", 1, "حكم اول")
+        )
+        try:
+            rows = db_manager.execute_query(f"SELECT id FROM cases WHERE {condition}", tuple(params))
+            assert case_id in [row["id"] for row in rows]
+        finally:
+            db_manager.execute_write("DELETE FROM cases WHERE id = ?", (case_id,))
+    
+    def test_statistics_follow_writes(self):
+        """Test that materialized counters match live aggregates through insert, update and delete"""
+        def materialized():
+            rows = db_manager.execute_query("SELECT metric, key, value FROM stats_counters WHERE value != 0")
+            months = db_manager.execute_query("SELECT month, count FROM stats_monthly WHERE count != 0")
+            return (
+                {(row["metric"], str(row["key"])): row["value"] for row in rows},
+                {row["month"]: row["count"] for row in months}
+            )
+        
+        def live():
+            counters = {
+                ("total", "cases"): db_manager.execute_query("SELECT COUNT(*) AS n FROM cases")[0]["n"],
+                ("total", "case_notes"): db_manager.execute_query("SELECT COUNT(*) AS n FROM case_notes")[0]["n"],
+            }
+            for row in db_manager.execute_query("SELECT judgment_type, COUNT(*) AS n FROM cases GROUP BY judgment_type"):
+                counters[("judgment", row["judgment_type"])] = row["n"]
+            for row in db_manager.execute_query("SELECT case_type_id, COUNT(*) AS n FROM cases GROUP BY case_type_id"):
+                counters[("case_type", str(row["case_type_id"]))] = row["n"]
+            return counters
+        
+        def assert_consistent():
+            counters, _ = materialized()
+            for key, value in live().items():
+                assert counters.get(key, 0) == value, key
+        
+        case_id = db_manager.execute_write(
+            "INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, judgment_type, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            ("STATS/2025/900", "مدعي الإحصاء", "مدعى عليه", 1, "حكم اول", "2025-03-15 10:00:00")
+        )
+        try:
+            db_manager.execute_write("INSERT INTO case_notes (case_id, note_text) VALUES (?, ?)", (case_id, "ملاحظة"))
+            assert_consistent()
+            assert materialized()[1].get("2025-03", 0) >= 1
+            
+            db_manager.execute_write(
+                "UPDATE cases SET judgment_type = ?, case_type_id = ? WHERE id = ?", ("حكم ثان", 2, case_id)
+            )
+            assert_consistent()
+            
+            before = materialized()
+            assert db_manager.rebuild_statistics()["counters"] >= 1
+            assert materialized() == before
+        finally:
+            db_manager.execute_write("DELETE FROM cases WHERE id = ?", (case_id,))
+        
+        # The cascaded note delete is counted as well
+        assert_consistent()
+    
+    def test_latest_session_date_mixed_formats(self):
+        """Test that latest_session_date compares session dates chronologically, not lexically"""
+        def latest():
+            return db_manager.execute_query(
+                "SELECT latest_session_date FROM cases WHERE id = ?", (case_id,)
+            )[0]["latest_session_date"]
+        
+        case_id = db_manager.execute_write(
+            "INSERT INTO cases (case_number, plaintiff, defendant, case_type_id, judgment_type) VALUES (?, ?, ?, ?, ?)",
+            ("STATS/2025/901", "مدعي الجلسات", "مدعى عليه", 1, "حكم اول")
+        )
+        try:
+            latest_id = db_manager.execute_write(
+                "INSERT INTO case_sessions (case_id, session_date) VALUES (?, ?)", (case_id, "2025-01-15 10:00:00")
+            )
+            # Both sort after "2025-01-15 10:00:00" as text but are earlier in time
+            db_manager.execute_write(
+                "INSERT INTO case_sessions (case_id, session_date) VALUES (?, ?)", (case_id, "2025-01-15T09:00:00")
+            )
+            db_manager.execute_write(
+                "INSERT INTO case_sessions (case_id, session_date) VALUES (?, ?)", (case_id, "2025-01-15")
+            )
+            assert latest() == "2025-01-15 10:00:00"
+            
+            db_manager.rebuild_statistics()
+            assert latest() == "2025-01-15 10:00:00"
+            
+            db_manager.execute_write("DELETE FROM case_sessions WHERE id = ?", (latest_id,))
+            assert latest() == "2025-01-15T09:00:00"
+        finally:
+            db_manager.execute_write("DELETE FROM case_sessions WHERE case_id = ?", (case_id,))
+            db_manager.execute_write("DELETE FROM cases WHERE id = ?", (case_id,))
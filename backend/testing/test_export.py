@@ -0,0 +1,208 @@
+import pytest
+import csv
+import gzip
+import io
+import json
+from httpx import AsyncClient
+from conftest import auth_headers
+
+@pytest.mark.asyncio
+class TestExport:
+    """Test streamed exports"""
+    
+    async def setup_test_case(self, async_client: AsyncClient, admin_token: str):
+        """Helper method to create a case with two sessions"""
+        import time
+        headers = auth_headers(admin_token)
+        case = (await async_client.post("/api/v1/cases", json={
+            "case_number": f"EXPORT/{int(time.time() * 1000)}",
+            "plaintiff": "مدعي التصدير",
+            "defendant": "مدعى عليه التصدير",
+            "case_type_id": 1,
+            "judgment_type": "حكم اول"
+        }, headers=headers)).json()
+        for session_date in ("2025-06-01T10:00:00", "2025-06-08T10:00:00"):
+            await async_client.post(f"/api/v1/cases/{case['id']}/sessions", json={
+                "session_date": session_date, "session_notes": "جلسة تصدير"
+            }, headers=headers)
+        return case
+    
+    async def test_export_cases_csv(self, async_client: AsyncClient, admin_token: str):
+        """Test CSV export of cases, one row per session with include_sessions"""
+        headers = auth_headers(admin_token)
+        case = await self.setup_test_case(async_client, admin_token)
+        
+        response = await async_client.get("/api/v1/export/cases?format=csv", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["case_number"] for row in rows].count(case["case_number"]) == 1
+        
+        response = await async_client.get("/api/v1/export/cases?format=csv&include_sessions=true", headers=headers)
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["case_number"] for row in rows].count(case["case_number"]) == 2
+    
+    async def test_export_json_formats(self, async_client: AsyncClient, admin_token: str):
+        """Test streamed JSON document and JSON Lines agree"""
+        headers = auth_headers(admin_token)
+        await self.setup_test_case(async_client, admin_token)
+        
+        document = (await async_client.get("/api/v1/export/cases?format=json", headers=headers)).json()
+        assert document["data_type"] == "cases"
+        assert document["total_records"] == len(document["data"]) >= 1
+        
+        response = await async_client.get("/api/v1/export/cases?format=ndjson", headers=headers)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in lines] == [row["id"] for row in document["data"]]
+    
+    async def test_export_gzip(self, async_client: AsyncClient, admin_token: str):
+        """Test on-the-fly gzip of a sessions export"""
+        headers = auth_headers(admin_token)
+        case = await self.setup_test_case(async_client, admin_token)
+        
+        response = await async_client.get("/api/v1/export/sessions?format=ndjson&gzip=true", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+        assert ".ndjson.gz" in response.headers["content-disposition"]
+        
+        lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+        assert sum(json.loads(line)["case_number"] == case["case_number"] for line in lines) == 2
+    
+    async def test_export_empty_result(self, async_client: AsyncClient, admin_token: str):
+        """Test that an empty export is a 404 rather than an empty stream"""
+        headers = auth_headers(admin_token)
+        response = await async_client.get("/api/v1/export/cases?format=csv&date_from=2099-01-01", headers=headers)
+        assert response.status_code == 404
+    
+    async def test_export_excel(self, async_client: AsyncClient, admin_token: str):
+        """Test the write-only Excel export"""
+        openpyxl = pytest.importorskip("openpyxl")
+        headers = auth_headers(admin_token)
+        case = await self.setup_test_case(async_client, admin_token)
+        
+        response = await async_client.get("/api/v1/export/cases?format=excel", headers=headers)
+        assert response.status_code == 200
+        
+        workbook = openpyxl.load_workbook(io.BytesIO(response.content), read_only=True)
+        rows = list(workbook["Cases"].iter_rows(values_only=True))
+        assert rows[0][:2] == ("id", "case_number")
+        assert case["case_number"] in [row[1] for row in rows[1:]]
+    
+    async def test_export_pdf(self, async_client: AsyncClient, admin_token: str, monkeypatch):
+        """Test the PDF export rendered in a worker process, large ones handed to a job and larger ones refused"""
+        pytest.importorskip("reportlab")
+        from config.settings import settings
+        headers = auth_headers(admin_token)
+        await self.setup_test_case(async_client, admin_token)
+        
+        response = await async_client.get("/api/v1/export/sessions?format=pdf", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content.startswith(b"%PDF-")
+        
+        monkeypatch.setattr(settings, "pdf_max_rows", 1)
+        response = await async_client.get("/api/v1/export/sessions?format=pdf", headers=headers)
+        assert response.status_code == 202
+        job = await self.wait_for_job(async_client, headers, response.json()["id"])
+        assert job["status"] == "completed"
+        assert job["rows_done"] > 1
+        
+        response = await async_client.get(f"/api/v1/export/jobs/{job['id']}/download", headers=headers)
+        assert response.status_code == 200
+        assert response.content.startswith(b"%PDF-")
+        
+        # Beyond the job cap the export is refused instead of laid out in memory
+        monkeypatch.setattr(settings, "pdf_job_max_rows", 1)
+        response = await async_client.get("/api/v1/export/sessions?format=pdf", headers=headers)
+        assert response.status_code == 413
+        response = await async_client.post(
+            "/api/v1/export/jobs", json={"data_type": "sessions", "format": "pdf"}, headers=headers
+        )
+        assert response.status_code == 413
+    
+    async def wait_for_job(self, async_client: AsyncClient, headers: dict, job_id: str) -> dict:
+        """Poll an export job until it finishes"""
+        import asyncio
+        for _ in range(200):
+            job = (await async_client.get(f"/api/v1/export/jobs/{job_id}", headers=headers)).json()
+            if job["status"] in ("completed", "failed"):
+                return job
+            await asyncio.sleep(0.05)
+        raise AssertionError(f"export job {job_id} did not finish")
+    
+    async def test_export_job_download(self, async_client: AsyncClient, admin_token: str):
+        """Test a background export job from queueing to a ranged download"""
+        from routes.export import export_job_manager
+        headers = auth_headers(admin_token)
+        case = await self.setup_test_case(async_client, admin_token)
+        
+        try:
+            response = await async_client.post("/api/v1/export/jobs", json={
+                "data_type": "cases", "format": "csv", "include_sessions": True
+            }, headers=headers)
+            assert response.status_code == 202
+            job = await self.wait_for_job(async_client, headers, response.json()["id"])
+            assert job["status"] == "completed"
+            assert job["rows_done"] == job["total_rows"] >= 2
+            assert job["progress"] == 100.0
+            
+            url = f"/api/v1/export/jobs/{job['id']}/download"
+            response = await async_client.get(url, headers=headers)
+            assert response.status_code == 200
+            assert response.headers["accept-ranges"] == "bytes"
+            assert len(response.content) == job["size"]
+            rows = list(csv.DictReader(io.StringIO(response.text)))
+            assert len(rows) == job["rows_done"]
+            assert [row["case_number"] for row in rows].count(case["case_number"]) == 2
+            
+            partial = await async_client.get(url, headers={**headers, "Range": "bytes=10-"})
+            assert partial.status_code == 206
+            assert partial.headers["content-range"] == f"bytes 10-{job['size'] - 1}/{job['size']}"
+            assert partial.content == response.content[10:]
+            
+            suffix = await async_client.get(url, headers={**headers, "Range": "bytes=-5"})
+            assert suffix.content == response.content[-5:]
+            
+            beyond = await async_client.get(url, headers={**headers, "Range": f"bytes={job['size']}-"})
+            assert beyond.status_code == 416
+            
+            # An inverted range is invalid, so it is ignored rather than refused
+            inverted = await async_client.get(url, headers={**headers, "Range": "bytes=5-3"})
+            assert inverted.status_code == 200
+            assert "content-range" not in inverted.headers
+            assert inverted.content == response.content
+        finally:
+            export_job_manager.clear()
+    
+    async def test_export_job_reuse(self, async_client: AsyncClient, admin_token: str):
+        """Test that identical jobs are shared until the exported tables change"""
+        from routes.export import export_job_manager
+        headers = auth_headers(admin_token)
+        await self.setup_test_case(async_client, admin_token)
+        request = {"data_type": "sessions", "format": "ndjson", "gzip": True}
+        
+        try:
+            first = (await async_client.post("/api/v1/export/jobs", json=request, headers=headers)).json()
+            second = (await async_client.post("/api/v1/export/jobs", json=request, headers=headers)).json()
+            assert second["id"] == first["id"]
+            
+            job = await self.wait_for_job(async_client, headers, first["id"])
+            assert job["status"] == "completed"
+            assert job["filename"].endswith(".ndjson.gz")
+            reused = (await async_client.post("/api/v1/export/jobs", json=request, headers=headers)).json()
+            assert reused["id"] == first["id"]
+            
+            await self.setup_test_case(async_client, admin_token)
+            fresh = (await async_client.post("/api/v1/export/jobs", json=request, headers=headers)).json()
+            assert fresh["id"] != first["id"]
+            job = await self.wait_for_job(async_client, headers, fresh["id"])
+            assert job["rows_done"] == reused["rows_done"] + 2
+            
+            response = await async_client.post("/api/v1/export/jobs", json={
+                "data_type": "cases", "format": "docx"
+            }, headers=headers)
+            assert response.status_code == 400
+            response = await async_client.get("/api/v1/export/jobs/missing", headers=headers)
+            assert response.status_code == 404
+        finally:
+            export_job_manager.clear()
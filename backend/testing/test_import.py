@@ -0,0 +1,120 @@
+import pytest
+import csv
+import io
+import time
+from httpx import AsyncClient
+from conftest import auth_headers
+from config.database import db_manager
+from utils.arabic import ArabicTextProcessor
+
+@pytest.mark.asyncio
+class TestImport:
+    """Test bulk case import"""
+    
+    def build_csv(self, rows) -> bytes:
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(["case_number", "plaintiff", "defendant", "case_type", "judgment_type"])
+        writer.writerows(rows)
+        return output.getvalue().encode("utf-8")
+    
+    async def test_import_cases_csv(self, async_client: AsyncClient, admin_token: str):
+        """Test that valid rows are inserted and each rejected row is reported"""
+        headers = auth_headers(admin_token)
+        prefix = f"IMPORT/{int(time.time() * 1000)}"
+        content = self.build_csv([
+            (f"{prefix}/1", "مدعي  الاستيراد", "مدعى عليه", "مدني", "حكم أول"),
+            (f"{prefix}/2", "مدعي الاستيراد", "مدعى عليه", "احوال شخصيه", "حكم ثان"),
+            (f"{prefix}/3", "مدعي الاستيراد", "مدعى عليه", "غير موجود", "حكم اول"),
+            (f"{prefix}/1", "مدعي الاستيراد", "مدعى عليه", "مدني", "حكم اول"),
+            (f"{prefix}/4", "م", "مدعى عليه", "مدني", "حكم رابع"),
+        ])
+        
+        response = await async_client.post(
+            "/api/v1/import/cases",
+            files={"file": ("cases.csv", content, "text/csv")},
+            headers=headers
+        )
+        assert response.status_code == 200
+        report = response.json()
+        assert (report["total_rows"], report["imported"], report["failed"]) == (5, 2, 3)
+        assert [error["row"] for error in report["errors"]] == [4, 5, 6]
+        assert report["errors"][0]["errors"] == ["نوع القضية غير موجود"]
+        assert report["errors"][1]["errors"] == ["رقم القضية مكرر في الملف"]
+        assert len(report["errors"][2]["errors"]) == 2
+        
+        cases = (await async_client.get(f"/api/v1/cases?search={prefix}", headers=headers)).json()["items"]
+        imported = {case["case_number"]: case for case in cases}
+        assert set(imported) == {f"{prefix}/1", f"{prefix}/2"}
+        assert imported[f"{prefix}/1"]["plaintiff"] == "مدعي الاستيراد"
+        assert imported[f"{prefix}/1"]["judgment_type"] == "حكم اول"
+        
+        # The importer writes the normalized search columns itself
+        row = db_manager.execute_query(
+            "SELECT case_number_norm, plaintiff_norm FROM cases WHERE case_number = ?", (f"{prefix}/2",)
+        )[0]
+        assert row["case_number_norm"] == ArabicTextProcessor.normalize_text(f"{prefix}/2")
+        assert row["plaintiff_norm"] == ArabicTextProcessor.normalize_text("مدعي الاستيراد")
+        search = (await async_client.get("/api/v1/cases?search=مُدعي الاستيراد", headers=headers)).json()["items"]
+        assert {f"{prefix}/1", f"{prefix}/2"} <= {case["case_number"] for case in search}
+        
+        # Importing the same file again reports every row as already present
+        response = await async_client.post(
+            "/api/v1/import/cases",
+            files={"file": ("cases.csv", content, "text/csv")},
+            headers=headers
+        )
+        report = response.json()
+        assert report["imported"] == 0
+        assert report["errors"][0]["errors"] == ["رقم القضية موجود بالفعل"]
+    
+    async def test_import_cases_xlsx(self, async_client: AsyncClient, admin_token: str):
+        """Test XLSX import with case types given by id"""
+        openpyxl = pytest.importorskip("openpyxl")
+        headers = auth_headers(admin_token)
+        case_number = f"IMPORTX/{int(time.time() * 1000)}"
+        
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["case_number", "plaintiff", "defendant", "case_type_id", "judgment_type"])
+        sheet.append([case_number, "مدعي الجدول", "مدعى عليه", 1, "حكم ثالث"])
+        sheet.append([None, None, None, None, None])
+        content = io.BytesIO()
+        workbook.save(content)
+        
+        response = await async_client.post(
+            "/api/v1/import/cases",
+            files={"file": ("cases.xlsx", content.getvalue(), "application/octet-stream")},
+            headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json() == {"total_rows": 1, "imported": 1, "failed": 0, "errors": []}
+    
+    async def test_import_rejects_bad_files(self, async_client: AsyncClient, admin_token: str):
+        """Test unsupported formats, missing columns and unreadable files"""
+        headers = auth_headers(admin_token)
+        response = await async_client.post(
+            "/api/v1/import/cases", files={"file": ("cases.txt", b"x", "text/plain")}, headers=headers
+        )
+        assert response.status_code == 400
+        
+        response = await async_client.post(
+            "/api/v1/import/cases",
+            files={"file": ("cases.csv", b"case_number,plaintiff\nA/1,x\n", "text/csv")},
+            headers=headers
+        )
+        assert response.status_code == 400
+        
+        header = "case_number,plaintiff,defendant,judgment_type,case_type\n"
+        bad_files = [
+            ("cases.csv", (header + "A/1,أحمد,علي,حكم أول,مدني\n").encode("cp1256"), "text/csv"),
+            ("cases.csv", (header + '"' + "x" * 200000 + '",y,z,w,v\n').encode(), "text/csv"),
+            ("cases.xlsx", b"not a zip file",
+             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+        ]
+        for filename, content, content_type in bad_files:
+            response = await async_client.post(
+                "/api/v1/import/cases", files={"file": (filename, content, content_type)}, headers=headers
+            )
+            assert response.status_code == 400
+            assert response.json()["detail"]
@@ -199,3 +199,33 @@ class TestUsers:
         # Verify user is deleted
         get_response = await async_client.get(f"/api/v1/users/{created_user['id']}", headers=headers)
         assert get_response.status_code == 404
+    
+    async def test_deactivation_revokes_cached_user(self, async_client: AsyncClient, admin_token: str):
+        """Test that a deactivated user is rejected even while cached"""
+        import time
+        headers = auth_headers(admin_token)
+        timestamp = int(time.time())
+        
+        new_user = {
+            "username": f"cachedtest{timestamp}",
+            "password": "password123",
+            "full_name": "مستخدم مخزن مؤقتا",
+            "user_type": "user"
+        }
+        create_response = await async_client.post("/api/v1/users", json=new_user, headers=headers)
+        created_user = create_response.json()
+        
+        login_response = await async_client.post("/api/v1/auth/login", json={
+            "username": new_user["username"], "password": new_user["password"]
+        })
+        user_headers = auth_headers(login_response.json()["access_token"])
+        
+        # Two requests with the same token: the second is served from the user cache
+        for _ in range(2):
+            response = await async_client.get("/api/v1/cases", headers=user_headers)
+            assert response.status_code == 200
+        
+        await async_client.post(f"/api/v1/users/{created_user['id']}/deactivate", headers=headers)
+        
+        response = await async_client.get("/api/v1/cases", headers=user_headers)
+        assert response.status_code == 401
@@ -1,52 +1,60 @@
-import re
+from typing import Iterable, Iterator, Optional
 
 class ArabicTextProcessor:
     """Utility class for processing Arabic text for search"""
-    
+
     # Arabic character mappings for normalization
     CHAR_MAPPINGS = {
-        'أ': 'ا', 'إ': 'ا', 'آ': 'ا',  # Alef variations
-        'ة': 'ه',                        # Taa marbuta to haa
-        'ي': 'ى', 'ى': 'ي',             # Yaa variations
-        'ؤ': 'و',                        # Waw with hamza
-        'ئ': 'ي',                        # Yaa with hamza
+        'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',  # Alef variations (incl. alef wasla)
+        'ة': 'ه',                                  # Taa marbuta to haa
+        'ى': 'ي',                                  # Alef maksura to yaa
+        'ؤ': 'و',                                  # Waw with hamza
+        'ئ': 'ي',                                  # Yaa with hamza
     }
-    
-    # Diacritics (Tashkeel) to remove
-    DIACRITICS = 'ًٌٍَُِّْ'
-    
+
+    # Characters removed entirely: tashkeel and Quranic marks (U+064B-U+065F),
+    # superscript alef (U+0670) and tatweel (U+0640)
+    DIACRITICS = ''.join(chr(code) for code in range(0x064B, 0x0660)) + 'ٰ' + 'ـ'
+
+    # Bump when the rules above change so stored normalized columns are rebuilt
+    VERSION = 2
+
+    # One str.translate pass applies every removal and folding above
+    _TRANSLATION = str.maketrans({
+        **{char: None for char in DIACRITICS},
+        **CHAR_MAPPINGS
+    })
+
     @classmethod
-    def normalize_text(cls, text: str) -> str:
+    def normalize_text(cls, text: Optional[str]) -> str:
         """
         Normalize Arabic text for better search matching
-        - Remove diacritics
+        - Remove diacritics and tatweel
         - Normalize similar characters
         - Convert to lowercase
         """
         if not text:
             return ""
-        
-        # Remove diacritics
-        normalized = ''.join(char for char in text if char not in cls.DIACRITICS)
-        
-        # Normalize characters
-        for original, replacement in cls.CHAR_MAPPINGS.items():
-            normalized = normalized.replace(original, replacement)
-        
-        # Convert to lowercase and strip whitespace
-        return normalized.lower().strip()
-    
+        return text.translate(cls._TRANSLATION).lower().strip()
+
+    @classmethod
+    def normalize_many(cls, texts: Iterable[Optional[str]]) -> Iterator[str]:
+        """Lazily normalize a stream of texts (backfills, imports)"""
+        table = cls._TRANSLATION
+        for text in texts:
+            yield text.translate(table).lower().strip() if text else ""
+
     @classmethod
     def prepare_search_term(cls, search_term: str) -> str:
         """Prepare search term for database matching"""
         return cls.normalize_text(search_term)
-    
+
     @classmethod
     def create_search_pattern(cls, search_term: str) -> str:
         """Create SQL LIKE pattern with normalized search term"""
         normalized = cls.prepare_search_term(search_term)
         return f"%{normalized}%"
-    
+
     @classmethod
     def matches_search(cls, text: str, search_term: str) -> bool:
         """Check if text matches search term using Arabic normalization"""
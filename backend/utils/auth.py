@@ -1,10 +1,21 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Set, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from fastapi import HTTPException, status
 import jwt
+import time
+import asyncio
+import uuid
 import hashlib
+import secrets
 import platform
+import threading
+from config.database import db_manager, UnitOfWork
 from config.settings import settings
+from utils.cache import TTLCache
 
 # Password hashing context with cross-platform compatibility
 pwd_context = CryptContext(
@@ -13,6 +24,9 @@ pwd_context = CryptContext(
     bcrypt__rounds=12  # Explicit rounds for consistency
 )
 
+# Decoded payloads of recently seen tokens; an entry never outlives the token's own expiry
+_token_cache = TTLCache(settings.auth_token_cache_size, default_ttl=300.0)
+
 class AuthUtils:
     """Authentication utilities with bcrypt 72-byte limit handling"""
     
@@ -62,23 +76,213 @@ class AuthUtils:
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
         else:
-            expire = datetime.utcnow() + timedelta(hours=settings.access_token_expire_hours)
+            expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
         
-        to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+        # jti identifies the token in the revocation list
+        to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": uuid.uuid4().hex})
         
         encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
         return encoded_jwt
     
     @staticmethod
     def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
-        """Decode JWT access token"""
+        """Decode JWT access token, reusing the verified payload of a recently seen token"""
+        payload = _token_cache.get(token)
+        if payload is not None:
+            return dict(payload)
+        
         try:
             payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-            return payload
         except jwt.ExpiredSignatureError:
             return None
         except jwt.PyJWTError:
             return None
+        
+        # Cache only until the token expires, so expiry is still enforced on cache hits
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            _token_cache.set(token, dict(payload), ttl=min(remaining, _token_cache.default_ttl))
+        return payload
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a small dedicated thread pool.
+
+    bcrypt costs a few hundred milliseconds of CPU per call, so it must never run on the
+    event loop. Work beyond the pool plus queue_limit waiting calls is rejected with 429
+    instead of piling up behind a burst of logins.
+    """
+
+    def __init__(self, workers: int = 2, queue_limit: int = 16):
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=512)  # Recent durations in milliseconds
+        self._stats = {"hash": 0, "verify": 0, "rejected": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="password-hash"
+                    )
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self._submit("hash", AuthUtils.hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await self._submit("verify", AuthUtils.verify_password, plain_password, hashed_password)
+
+    async def _submit(self, operation: str, func: Callable, *args) -> Any:
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self._stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="الخادم مشغول حالياً، يرجى المحاولة بعد قليل",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(self._timed, operation, func, *args))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _timed(self, operation: str, func: Callable, *args) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._stats[operation] += 1
+                self._stats["total_ms"] += elapsed_ms
+                self._stats["max_ms"] = max(self._stats["max_ms"], elapsed_ms)
+                self._latencies.append(elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get call counts, rejections and hashing latency in milliseconds"""
+        with self._lock:
+            calls = self._stats["hash"] + self._stats["verify"]
+            recent = sorted(self._latencies)
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self._in_flight,
+                "hash_calls": self._stats["hash"],
+                "verify_calls": self._stats["verify"],
+                "rejected": self._stats["rejected"],
+                "avg_ms": round(self._stats["total_ms"] / calls, 2) if calls else 0.0,
+                "max_ms": round(self._stats["max_ms"], 2),
+                "p50_ms": round(recent[len(recent) // 2], 2) if recent else 0.0,
+                "p95_ms": round(recent[int(len(recent) * 0.95)], 2) if recent else 0.0,
+            }
+
+    def shutdown(self):
+        """Wait for running hashes and stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+class TokenStore:
+    """Rotating refresh tokens and the revocation list for access tokens.
+
+    Refresh tokens are opaque random strings stored only as SHA-256 digests and are
+    single use: every renewal consumes the presented token and issues a new one.
+    Revoked access token ids are held in an in-memory set, reloaded from the
+    revoked_tokens table after any write to it.
+    """
+
+    _USER_COLUMNS = "u.id, u.username, u.full_name, u.user_type, u.is_active, u.created_at, u.updated_at"
+
+    def __init__(self):
+        self._revoked: Set[str] = set()
+        self._revoked_stale = True
+        db_manager.add_write_listener(self._on_database_write)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def _on_database_write(self, tables: Optional[Set[str]]):
+        if tables is None or "revoked_tokens" in tables:
+            self._revoked_stale = True
+
+    def _issue(self, uow: UnitOfWork, user_id: int) -> str:
+        now = int(time.time())
+        # Drop this user's expired tokens while the write lock is held anyway
+        uow.execute_write("DELETE FROM refresh_tokens WHERE user_id = ? AND expires_at <= ?", (user_id, now))
+        token = secrets.token_urlsafe(32)
+        uow.execute_write(
+            "INSERT INTO refresh_tokens (token_hash, user_id, expires_at) VALUES (?, ?, ?)",
+            (self._digest(token), user_id, now + settings.refresh_token_expire_days * 86400)
+        )
+        return token
+
+    def _rotate(self, uow: UnitOfWork, token: str) -> Optional[Tuple[dict, str]]:
+        digest = self._digest(token)
+        row = uow.execute_query_one(
+            f"""SELECT rt.expires_at AS token_expires_at, {self._USER_COLUMNS}
+                FROM refresh_tokens rt JOIN users u ON u.id = rt.user_id
+                WHERE rt.token_hash = ?""",
+            (digest,)
+        )
+        if row is None:
+            return None
+        # The presented token is consumed even when it can no longer be renewed
+        uow.execute_write("DELETE FROM refresh_tokens WHERE token_hash = ?", (digest,))
+        if row.pop("token_expires_at") <= time.time() or not row["is_active"]:
+            return None
+        return row, self._issue(uow, row["id"])
+
+    async def issue(self, user_id: int) -> str:
+        """Create a refresh token for a user who just logged in"""
+        return await db_manager.run_in_transaction(self._issue, user_id)
+
+    async def rotate(self, token: str) -> Optional[Tuple[dict, str]]:
+        """Exchange a refresh token for (user row, new refresh token), or None if it is not valid"""
+        return await db_manager.run_in_transaction(self._rotate, token)
+
+    async def revoke_refresh_token(self, token: str):
+        """Invalidate one refresh token (logout)"""
+        await db_manager.execute("DELETE FROM refresh_tokens WHERE token_hash = ?", (self._digest(token),))
+
+    async def revoke_user_sessions(self, user_id: int):
+        """Invalidate every refresh token of a user (password change, deactivation)"""
+        await db_manager.execute("DELETE FROM refresh_tokens WHERE user_id = ?", (user_id,))
+
+    def _revoke_access_token(self, uow: UnitOfWork, jti: str, expires_at: int):
+        uow.execute_write("DELETE FROM revoked_tokens WHERE expires_at <= ?", (int(time.time()),))
+        uow.execute_write(
+            "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+            (jti, expires_at)
+        )
+
+    async def revoke_access_token(self, jti: str, expires_at: int):
+        """Reject an access token until it would have expired anyway"""
+        await db_manager.run_in_transaction(self._revoke_access_token, jti, expires_at)
+        self._revoked.add(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        """Set lookup; the set is reloaded only after revoked_tokens changed"""
+        if self._revoked_stale:
+            # Cleared before reading so a revocation committed meanwhile triggers another reload
+            self._revoked_stale = False
+            rows = await db_manager.fetch_all(
+                "SELECT jti FROM revoked_tokens WHERE expires_at > ?", (int(time.time()),)
+            )
+            self._revoked = {row["jti"] for row in rows}
+        return jti in self._revoked
 
-# Create global instance
+# Create global instances
 auth_utils = AuthUtils()
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_queue_limit)
+token_store = TokenStore()
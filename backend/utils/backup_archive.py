@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import zipfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+HASH_SIZE = 16                     # blake2b digest bytes per page
+BLOCK_PAGES = 256                  # Pages read per block while hashing or copying
+
+DATABASE_ENTRY = "legal_cases.db"
+METADATA_ENTRY = "backup_metadata.json"
+HASHES_ENTRY = "page_hashes.bin"
+PAGE_NUMBERS_ENTRY = "changed_pages.bin"   # Incremental archives: little-endian uint32 page numbers (1-based)
+PAGES_ENTRY = "pages.bin"                  # Incremental archives: the changed pages, in the same order
+
+ProgressCallback = Callable[[str, int, int], None]
+
+# Downloads and backups made before the store (utils/backup_store.py) are zip archives
+# holding the whole database file. Archives written here also carry the hash of every page,
+# which is checked when the database is extracted again.
+#
+# Backups made in incremental mode, before the store, are zip archives holding only the pages
+# whose hash differed from their parent backup, which their metadata names. No new ones are
+# written, but they are still restored by replaying the chain onto its full base.
+
+def read_page_size(db_path: str) -> int:
+    """Read the page size from a SQLite database header"""
+    with open(db_path, "rb") as f:
+        header = f.read(100)
+    if len(header) < 100 or not header.startswith(b"SQLite format 3\x00"):
+        raise ValueError(f"{db_path} is not a SQLite database")
+    page_size = struct.unpack(">H", header[16:18])[0]
+    return 65536 if page_size == 1 else page_size
+
+def _iter_pages(db_path: str, page_size: int):
+    with open(db_path, "rb") as f:
+        while True:
+            block = f.read(page_size * BLOCK_PAGES)
+            if not block:
+                break
+            for offset in range(0, len(block), page_size):
+                yield block[offset:offset + page_size]
+
+def _digest(page: bytes) -> bytes:
+    return hashlib.blake2b(page, digest_size=HASH_SIZE).digest()
+
+def hash_pages(db_path: str) -> bytes:
+    """Hash every page of a database file, returning the concatenated digests"""
+    page_size = read_page_size(db_path)
+    return b"".join(_digest(page) for page in _iter_pages(db_path, page_size))
+
+def write_full_archive(snapshot_path: str, archive_path: str, metadata: Dict[str, Any],
+                       extra_files: Dict[str, str], progress: Optional[ProgressCallback] = None):
+    """Compress a whole snapshot, hashing its pages on the way"""
+    page_size = read_page_size(snapshot_path)
+    total = os.path.getsize(snapshot_path)
+    hashes = []
+
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        done = 0
+        with zipf.open(DATABASE_ENTRY, "w", force_zip64=True) as target:
+            for page in _iter_pages(snapshot_path, page_size):
+                target.write(page)
+                hashes.append(_digest(page))
+                done += len(page)
+                if progress and (len(hashes) % BLOCK_PAGES == 0 or done == total):
+                    progress("compress", done, total)
+
+        metadata.update(page_size=page_size, page_count=len(hashes))
+        zipf.writestr(HASHES_ENTRY, b"".join(hashes))
+        zipf.writestr(METADATA_ENTRY, json.dumps(metadata, indent=2, ensure_ascii=False))
+        for name, content in extra_files.items():
+            zipf.writestr(name, content)
+
+def read_archive_metadata(archive_path: str) -> Dict[str, Any]:
+    with zipfile.ZipFile(archive_path) as zipf:
+        return json.loads(zipf.read(METADATA_ENTRY))
+
+def read_page_hashes(archive_path: str) -> Optional[bytes]:
+    """Page hashes stored in an archive, or None for archives made before they were recorded"""
+    with zipfile.ZipFile(archive_path) as zipf:
+        if HASHES_ENTRY not in zipf.namelist():
+            return None
+        return zipf.read(HASHES_ENTRY)
+
+def resolve_chain(archive_path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Return (path, metadata) from the full base up to archive_path.
+
+    Parents of incremental archives are looked up by file name in the archive's own directory.
+    """
+    chain = []
+    path = archive_path
+    while True:
+        metadata = read_archive_metadata(path)
+        chain.append((path, metadata))
+        if metadata.get("backup_type") != "incremental":
+            break
+        path = os.path.join(os.path.dirname(archive_path), metadata["parent_backup"])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Parent backup {metadata['parent_backup']} is missing")
+        if len(chain) > 10000:
+            raise ValueError("Backup chain does not end in a full backup")
+    chain.reverse()
+    return chain
+
+def extract(archive_path: str, output_path: str) -> List[str]:
+    """Extract the database of an archive into output_path, checking its page hashes if recorded.
+
+    For an incremental archive the full base is extracted and each incremental up to
+    archive_path is replayed on top of it. Returns the names of the archives applied, base first.
+    """
+    chain = resolve_chain(archive_path)
+
+    base_path, _ = chain[0]
+    with zipfile.ZipFile(base_path) as zipf, zipf.open(DATABASE_ENTRY) as source, open(output_path, "wb") as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+
+    if len(chain) > 1:
+        with open(output_path, "r+b") as target:
+            for path, metadata in chain[1:]:
+                page_size = metadata["page_size"]
+                with zipfile.ZipFile(path) as zipf:
+                    page_numbers = zipf.read(PAGE_NUMBERS_ENTRY)
+                    with zipf.open(PAGES_ENTRY) as pages:
+                        for (page_number,) in struct.iter_unpack("<I", page_numbers):
+                            target.seek((page_number - 1) * page_size)
+                            target.write(pages.read(page_size))
+                # The database may have shrunk (VACUUM) or grown since the parent
+                target.truncate(metadata["page_count"] * page_size)
+
+    expected = read_page_hashes(archive_path)
+    if expected is not None and hash_pages(output_path) != expected:
+        raise ValueError(f"Restored database does not match the page hashes of {os.path.basename(archive_path)}")
+
+    return [os.path.basename(path) for path, _ in chain]
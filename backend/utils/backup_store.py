@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.backup_archive import read_page_size
+
+HASH_SIZE = 16              # blake2b digest bytes per chunk
+COMPRESS_LEVEL = 6
+
+ProgressCallback = Callable[[str, int, int], None]
+
+# The store keeps every chunk once under the hash of its content and each backup as a
+# manifest listing its chunks in order:
+#
+#   store/chunks/ab/ab12...   zlib-compressed chunk
+#   store/manifests/<backup name>.json
+#
+# Chunks are aligned to database pages. SQLite rewrites pages in place, so a page-aligned
+# chunk only changes when a page inside it does; content-defined (rolling hash) chunking
+# would only help with shifted data, which a database file does not have. A backup of a
+# mostly unchanged database therefore adds only the chunks holding changed pages, while
+# every manifest can still be restored on its own.
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=HASH_SIZE).hexdigest()
+
+class BackupStore:
+    """Content-addressed, deduplicated store for database backups"""
+
+    def __init__(self, root: str, chunk_size: int = 64 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.manifest_dir = os.path.join(root, "manifests")
+        # Held while writing a backup or collecting garbage, so collection never sees the
+        # chunks of a backup whose manifest is not written yet
+        self._lock = threading.Lock()
+
+    def manifest_path(self, name: str) -> str:
+        return os.path.join(self.manifest_dir, f"{name}.json")
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _put(self, data: bytes) -> Tuple[str, int, int]:
+        """Store a chunk unless it is already present; returns (digest, stored size, added bytes)"""
+        digest = _digest(data)
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            return digest, os.path.getsize(path), 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, COMPRESS_LEVEL)
+        part_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(part_path, "wb") as f:
+            f.write(compressed)
+        os.replace(part_path, path)
+        return digest, len(compressed), len(compressed)
+
+    def _get(self, digest: str) -> bytes:
+        path = self._chunk_path(digest)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Backup chunk {digest} is missing")
+        with open(path, "rb") as f:
+            data = zlib.decompress(f.read())
+        if _digest(data) != digest:
+            raise ValueError(f"Backup chunk {digest} is corrupted")
+        return data
+
+    def write(self, name: str, db_path: str, metadata: Dict[str, Any], extra_files: Dict[str, str],
+              progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Store a database file and its side files as backup `name`; returns the manifest.
+
+        The manifest records the total stored size of the chunks it references ("size",
+        what the backup would take on its own) and the bytes this backup added ("added_bytes").
+        """
+        page_size = read_page_size(db_path)
+        chunk_size = max(page_size, self.chunk_size // page_size * page_size)
+        total = os.path.getsize(db_path)
+
+        with self._lock:
+            chunks: List[str] = []
+            size = added = new_chunks = done = 0
+            with open(db_path, "rb") as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    digest, stored, new = self._put(data)
+                    chunks.append(digest)
+                    size += stored
+                    added += new
+                    new_chunks += bool(new)
+                    done += len(data)
+                    if progress:
+                        progress("store", done, total)
+
+            files = {}
+            for file_name, content in extra_files.items():
+                digest, stored, new = self._put(content.encode("utf-8"))
+                files[file_name] = digest
+                size += stored
+                added += new
+
+            manifest = {
+                "name": name,
+                "created_at": datetime.now().isoformat(),
+                "database_size": total,
+                "page_size": page_size,
+                "chunk_size": chunk_size,
+                "chunks": chunks,
+                "files": files,
+                "size": size,
+                "added_bytes": added,
+                "new_chunks": new_chunks,
+                "metadata": metadata
+            }
+
+            os.makedirs(self.manifest_dir, exist_ok=True)
+            path = self.manifest_path(name)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+        return manifest
+
+    @staticmethod
+    def read_manifest(manifest_path: str) -> Dict[str, Any]:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def materialize(self, manifest_path: str, output_path: str) -> Dict[str, Any]:
+        """Rebuild the database of a backup into output_path, verifying every chunk"""
+        manifest = self.read_manifest(manifest_path)
+        with open(output_path, "wb") as f:
+            for digest in manifest["chunks"]:
+                f.write(self._get(digest))
+        if os.path.getsize(output_path) != manifest["database_size"]:
+            raise ValueError(f"Restored database does not match backup {manifest['name']}")
+        return manifest
+
+    def read_file(self, manifest: Dict[str, Any], file_name: str) -> str:
+        """Read one of the side files (e.g. table_schemas.sql) stored with a backup"""
+        return self._get(manifest["files"][file_name]).decode("utf-8")
+
+    def delete(self, manifest_path: str):
+        """Remove a backup's manifest; its chunks go at the next garbage collection"""
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """Delete chunks that no manifest references"""
+        with self._lock:
+            referenced: Set[str] = set()
+            for manifest_path in self._manifest_paths():
+                manifest = self.read_manifest(manifest_path)
+                referenced.update(manifest["chunks"])
+                referenced.update(manifest["files"].values())
+
+            # Leftover .tmp files from interrupted writes are never referenced either
+            removed = freed = 0
+            emptied = set()
+            for path in list(self._chunk_paths()):
+                if os.path.basename(path) in referenced:
+                    continue
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+                emptied.add(os.path.dirname(path))
+            for directory in emptied:
+                if not os.listdir(directory):
+                    os.rmdir(directory)
+        return {"removed_chunks": removed, "freed_bytes": freed}
+
+    def names(self) -> List[str]:
+        """Names of the backups that have a manifest in the store"""
+        return [os.path.basename(path)[:-len(".json")] for path in self._manifest_paths()]
+
+    def usage(self) -> Dict[str, int]:
+        """Number of backups and chunks in the store and the bytes the chunks take"""
+        chunks = list(self._chunk_paths())
+        return {
+            "backups": len(list(self._manifest_paths())),
+            "chunks": len(chunks),
+            "bytes": sum(os.path.getsize(path) for path in chunks)
+        }
+
+    def _manifest_paths(self) -> Iterable[str]:
+        if os.path.isdir(self.manifest_dir):
+            for name in os.listdir(self.manifest_dir):
+                if name.endswith(".json"):
+                    yield os.path.join(self.manifest_dir, name)
+
+    def _chunk_paths(self) -> Iterable[str]:
+        if os.path.isdir(self.chunk_dir):
+            for prefix in os.listdir(self.chunk_dir):
+                directory = os.path.join(self.chunk_dir, prefix)
+                for name in os.listdir(directory):
+                    yield os.path.join(directory, name)
+
+def select_retained(backups: List[Dict[str, Any]], keep_last: int = 0, hourly: int = 0,
+                    daily: int = 0, weekly: int = 0) -> Set[Any]:
+    """Apply a keep-last/hourly/daily/weekly policy and return the ids of backups to keep.
+
+    backups are dicts with "id" and "created_at" (ISO format). Each periodic rule keeps the
+    newest backup of each of its N most recent periods that have a backup, so a backup can
+    be kept by several rules at once. A policy with every count at 0 keeps everything.
+    """
+    if not any((keep_last, hourly, daily, weekly)):
+        return {backup["id"] for backup in backups}
+
+    newest_first = sorted(backups, key=lambda backup: backup["created_at"], reverse=True)
+    keep = {backup["id"] for backup in newest_first[:keep_last]}
+
+    periods = (
+        (hourly, lambda moment: (moment.date(), moment.hour)),
+        (daily, lambda moment: moment.date()),
+        (weekly, lambda moment: moment.isocalendar()[:2])
+    )
+    for count, period_of in periods:
+        seen = set()
+        for backup in newest_first:
+            if len(seen) >= count:
+                break
+            period = period_of(datetime.fromisoformat(backup["created_at"]))
+            if period not in seen:
+                seen.add(period)
+                keep.add(backup["id"])
+    return keep
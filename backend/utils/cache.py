@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set
+from config.database import db_manager
+from config.settings import settings
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded in-process cache with LRU eviction, per-entry TTL and tag invalidation.
+
+    Entries are tagged with the tables their value was read from. DatabaseManager reports
+    the tables touched by every committed write, and all entries carrying one of those
+    tags are dropped, so cached results never outlive the data they were built from.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 60.0):
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._tag_versions: Dict[str, int] = {}
+        self._epoch = 0  # Bumped by clear()
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry (marking it most recently used) or default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        self._store(key, value, ttl, tuple(tags), None)
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float], tags: tuple, tag_versions: Optional[tuple]):
+        with self._lock:
+            # Skip values computed before one of their tags was invalidated
+            if tag_versions is not None and tag_versions != self._versions(tags):
+                return
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+            self._entries[key] = (expires_at, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None,
+                   tags: Iterable[str] = ()) -> Any:
+        """Return the cached value or compute it with loader() and cache it"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        tags = tuple(tags)
+        tag_versions = self._versions(tags)
+        value = loader()
+        self._store(key, value, ttl, tags, tag_versions)
+        return value
+
+    async def get_or_set_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                               ttl: Optional[float] = None, tags: Iterable[str] = ()) -> Any:
+        """Async version of get_or_set for loaders that must be awaited"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        tags = tuple(tags)
+        tag_versions = self._versions(tags)
+        value = await loader()
+        self._store(key, value, ttl, tags, tag_versions)
+        return value
+
+    def delete(self, key: Hashable) -> bool:
+        """Drop one entry"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying one of the tags and return how many were removed"""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self._stats["invalidations"] += removed
+        return removed
+
+    def purge_expired(self) -> int:
+        """Drop expired entries and return how many were removed"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry[0] <= now]
+            for key in expired:
+                self._remove(key)
+            self._stats["expirations"] += len(expired)
+        return len(expired)
+
+    def clear(self) -> int:
+        """Drop every entry and return how many were removed"""
+        with self._lock:
+            count = len(self._entries)
+            self._epoch += 1
+            self._entries.clear()
+            self._tags.clear()
+        return count
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get_stats(self) -> dict:
+        """Get size and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "default_ttl_seconds": self.default_ttl,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+            }
+
+    def on_database_write(self, tables: Optional[Set[str]]):
+        """Write listener: None means the whole database changed (restore, pool reset)"""
+        if tables is None:
+            self.clear()
+        else:
+            self.invalidate_tags(tables)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _versions(self, tags: tuple) -> tuple:
+        with self._lock:
+            return (self._epoch,) + tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def _remove(self, key: Hashable):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+# Global application cache
+app_cache = TTLCache(settings.cache_max_entries, settings.cache_default_ttl_seconds)
+db_manager.add_write_listener(app_cache.on_database_write)
@@ -1,128 +1,263 @@
+import base64
+import json
+import re
+from fastapi import HTTPException, status
 from config.database import db_manager
 from utils.arabic import arabic_processor
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
+
+# Leading SELECT of a listing query, where the single-pass window count is injected
+_LEADING_SELECT = re.compile(r"^\s*SELECT\s+(?!DISTINCT\b)", re.IGNORECASE)
+
+# Keyset sort key: (SQL expression, key of the value in the result row, descending)
+KeysetKey = Tuple[str, str, bool]
+
+# Trigram FTS5 tables can only use the index for terms of at least three characters
+FTS_MIN_TERM_LENGTH = 3
 
 class DatabaseUtils:
     """Enhanced database utilities with Arabic search support"""
     
     def __init__(self):
         self.db = db_manager
+        # Totals of unfiltered listings: (table, query, params) -> (table version stamp, total)
+        self._total_cache: Dict[tuple, Tuple[tuple, int]] = {}
     
-    def paginate_query(self, base_query: str, params: tuple, page: int = 1, size: int = 40) -> Dict:
-        """Execute paginated query with count"""
-        # Get total count
-        count_query = f"SELECT COUNT(*) as total FROM ({base_query})"
-        count_result = self.db.execute_query(count_query, params)
-        total = count_result[0]['total'] if count_result else 0
+    def paginate_query(self, base_query: str, params: tuple, page: int = 1, size: int = 40,
+                       keys: Optional[List[KeysetKey]] = None, include_total: bool = True,
+                       total_table: Optional[str] = None) -> Dict:
+        """Execute paginated query and work out its total as cheaply as possible.
         
-        # Get paginated results
+        - include_total=False: no counting at all; total is the lower bound implied by this
+          page (total_exact is False).
+        - total_table: the query is an unfiltered listing of that table, so its total is
+          cached until the next committed write to the table.
+        - otherwise the total comes from COUNT(*) OVER () in the same pass as the page.
+        
+        With keyset keys, the response also carries next_cursor so a client can continue
+        from this page with keyset_paginate_query.
+        """
         offset = (page - 1) * size
         paginated_query = f"{base_query} LIMIT ? OFFSET ?"
-        items = self.db.execute_query(paginated_query, params + (size, offset))
+        total_exact = True
+        
+        if not include_total:
+            # Fetch one extra row to learn whether another page exists
+            rows = self.db.execute_query(paginated_query, params + (size + 1, offset))
+            items = rows[:size]
+            total = offset + len(rows)
+            # Exact only when this page reached the end (an empty page past the end proves nothing)
+            total_exact = len(rows) <= size and (bool(rows) or offset == 0)
+        elif total_table:
+            items = self.db.execute_query(paginated_query, params + (size, offset))
+            total = self._cached_total(total_table, base_query, params)
+        else:
+            items, total = self._page_with_total(base_query, params, size, offset)
         
         # Calculate pagination info
         pages = (total + size - 1) // size  # Ceiling division
         
+        next_cursor = None
+        if keys and items and (offset + len(items) < total):
+            next_cursor = self.encode_cursor([items[-1][key] for _, key, _ in keys])
+        
         return {
             "items": items,
             "total": total,
+            "total_exact": total_exact,
             "page": page,
             "size": size,
-            "pages": pages
+            "pages": pages,
+            "next_cursor": next_cursor
         }
     
-    def build_search_conditions(self, search_term: str, fields: List[str]) -> Tuple[str, List[str]]:
-        """Build SQL search conditions for Arabic text with comprehensive normalization"""
-        if not search_term or not fields:
-            return "", []
+    def _count(self, base_query: str, params: tuple) -> int:
+        count_result = self.db.execute_query(f"SELECT COUNT(*) as total FROM ({base_query})", params)
+        return count_result[0]['total'] if count_result else 0
+    
+    def _page_with_total(self, base_query: str, params: tuple, size: int, offset: int) -> Tuple[List[Dict], int]:
+        """Fetch one page and the full row count in a single statement"""
+        if not _LEADING_SELECT.match(base_query):
+            items = self.db.execute_query(f"{base_query} LIMIT ? OFFSET ?", params + (size, offset))
+            return items, self._count(base_query, params)
         
-        # Get the original and normalized search terms
-        original_term = search_term.strip()
-        normalized_search = arabic_processor.prepare_search_term(search_term)
+        # The window count is computed over every matching row before LIMIT applies
+        counted_query = _LEADING_SELECT.sub("SELECT COUNT(*) OVER () AS _total_rows, ", base_query, count=1)
+        items = self.db.execute_query(f"{counted_query} LIMIT ? OFFSET ?", params + (size, offset))
+        if not items:
+            # Past the last page there is no row to carry the count
+            return items, (self._count(base_query, params) if offset else 0)
         
-        # For Arabic text matching, we need a different approach
-        # Since SQLite doesn't handle Arabic normalization well, we'll use REPLACE function
-        # to normalize the database content on-the-fly for comparison
+        total = items[0]['_total_rows']
+        for item in items:
+            del item['_total_rows']
+        return items, total
+    
+    def _cached_total(self, table: str, base_query: str, params: tuple) -> int:
+        """Row count of an unfiltered listing, recounted only after the table was written to"""
+        key = (table, base_query, params)
+        stamp = self.db.table_version(table)
+        cached = self._total_cache.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        
+        total = self._count(base_query, params)
+        self._total_cache[key] = (stamp, total)
+        return total
+    
+    async def paginate(self, base_query: str, params: tuple, page: int = 1, size: int = 40,
+                       keys: Optional[List[KeysetKey]] = None, include_total: bool = True,
+                       total_table: Optional[str] = None) -> Dict:
+        """Async version of paginate_query, run on the database executor"""
+        return await self.db.run_sync(
+            self.paginate_query, base_query, params, page, size, keys, include_total, total_table
+        )
+    
+    @staticmethod
+    def encode_cursor(values: List[Any]) -> str:
+        """Encode the sort-key values of the last row of a page as an opaque cursor"""
+        raw = json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    
+    @staticmethod
+    def decode_cursor(cursor: str, length: int) -> List[Any]:
+        """Decode a cursor produced by encode_cursor, rejecting tampered or foreign values"""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except ValueError:
+            values = None
         
-        conditions = []
+        if (not isinstance(values, list) or len(values) != length or
+                not all(isinstance(value, (str, int, float)) for value in values)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="مؤشر الصفحة غير صالح"
+            )
+        return values
+    
+    @staticmethod
+    def keyset_order_by(keys: List[KeysetKey]) -> str:
+        """ORDER BY expression matching a keyset definition"""
+        return ", ".join(f"{expression} {'DESC' if descending else 'ASC'}" for expression, _, descending in keys)
+    
+    def build_keyset_condition(self, keys: List[KeysetKey], cursor: str) -> Tuple[str, List[Any]]:
+        """Build the condition that resumes a keyset-ordered listing after the cursor row"""
+        values = self.decode_cursor(cursor, len(keys))
+        directions = {descending for _, _, descending in keys}
+        
+        if len(directions) == 1:
+            # Row-value comparison lets SQLite seek the composite index directly
+            columns = ", ".join(expression for expression, _, _ in keys)
+            placeholders = ", ".join("?" for _ in keys)
+            operator = "<" if directions.pop() else ">"
+            return f"(({columns}) {operator} ({placeholders}))", values
+        
+        # Mixed directions: (k1 after v1) OR (k1 = v1 AND k2 after v2) OR ...
+        alternatives = []
         params = []
+        for i, (expression, _, descending) in enumerate(keys):
+            parts = [f"{keys[j][0]} = ?" for j in range(i)] + [f"{expression} {'<' if descending else '>'} ?"]
+            alternatives.append(f"({' AND '.join(parts)})")
+            params.extend(values[:i + 1])
+        return f"({' OR '.join(alternatives)})", params
+    
+    def keyset_paginate_query(self, query: str, params: tuple, keys: List[KeysetKey], size: int = 40) -> Dict:
+        """Fetch one page of a query already filtered by build_keyset_condition and ordered by its keys.
+        
+        Cost does not depend on how deep the page is. No total is computed.
+        """
+        rows = self.db.execute_query(f"{query} LIMIT ?", tuple(params) + (size + 1,))
+        items = rows[:size]
         
-        for field in fields:
-            field_conditions = []
-            
-            # Method 1: Direct match (case insensitive)
-            field_conditions.append(f"LOWER({field}) LIKE LOWER(?)")
-            params.append(f"%{original_term}%")
-            
-            # Method 2: Normalized comparison using nested REPLACE functions
-            # This normalizes the database field content and compares with normalized search
-            if normalized_search != original_term.lower():
-                # Create a field expression that removes diacritics and normalizes characters
-                normalized_field = field
-                
-                # Remove common diacritics from the field
-                diacritics = ['ً', 'ٌ', 'ٍ', 'َ', 'ُ', 'ِ', 'ّ', 'ْ']
-                for diacritic in diacritics:
-                    normalized_field = f"REPLACE({normalized_field}, '{diacritic}', '')"
-                
-                # Normalize common character variations
-                char_mappings = {
-                    'أ': 'ا', 'إ': 'ا', 'آ': 'ا',  # Alef variations
-                    'ة': 'ه',                        # Taa marbuta to haa
-                    'ى': 'ي',                        # Alef maksura to yaa
-                }
-                
-                for original_char, replacement_char in char_mappings.items():
-                    normalized_field = f"REPLACE({normalized_field}, '{original_char}', '{replacement_char}')"
-                
-                # Compare normalized field with normalized search term
-                field_conditions.append(f"LOWER({normalized_field}) LIKE LOWER(?)")
-                params.append(f"%{normalized_search}%")
-            
-            # Method 3: More conservative flexible matching for diacritics  
-            # Only apply flexible matching for short, clearly Arabic words
-            diacritics = 'ًٌٍَُِّْ'
-            if (not any(d in original_term for d in diacritics) and 
-                any('\u0600' <= c <= '\u06FF' for c in original_term) and
-                len(original_term.strip()) <= 6 and  # Only for short terms
-                ' ' not in original_term.strip()):    # Only for single words
-                
-                word = original_term.strip()
-                if len(word) >= 3:  # Only for meaningful words
-                    # Create a more conservative flexible pattern
-                    # Instead of %char%, use char followed by 0-2 characters
-                    # This allows for diacritics but not unlimited gaps
-                    
-                    flexible_pattern = ""
-                    for i, char in enumerate(word):
-                        if i == 0:
-                            flexible_pattern += char
-                        else:
-                            # Allow up to 2 characters (diacritics) between Arabic letters
-                            flexible_pattern += f"__{char}"  # __ allows exactly 0-2 chars
-                    
-                    # Allow flexible matching for common Arabic words/names
-                    # This helps with diacritics matching while avoiding overly broad matches
-                    common_words = ['محمد', 'أحمد', 'إبراهيم', 'فاطمة', 'علي', 'الله', 'شركة', 'مؤسسة']
-                    
-                    if word in common_words or len(word) <= 4:  # Common words or short words
-                        # Create a pattern that allows diacritics between letters
-                        # For "محمد", this creates a pattern like "%م%ح%م%د%" to match "مُحَمَّد"
-                        flexible_pattern = ""
-                        for i, char in enumerate(word):
-                            if i == 0:
-                                flexible_pattern += f"%{char}"
-                            else:
-                                flexible_pattern += f"%{char}"
-                        flexible_pattern += "%"
-                        
-                        field_conditions.append(f"LOWER({field}) LIKE LOWER(?)")
-                        params.append(flexible_pattern)
-            
-            conditions.append(f"({' OR '.join(field_conditions)})")
-        
-        where_clause = " OR ".join(conditions)
-        return f"({where_clause})", params
+        next_cursor = None
+        if len(rows) > size:
+            next_cursor = self.encode_cursor([items[-1][key] for _, key, _ in keys])
+        
+        return {
+            "items": items,
+            "total": None,
+            "total_exact": None,
+            "page": None,
+            "size": size,
+            "pages": None,
+            "next_cursor": next_cursor
+        }
+    
+    async def keyset_paginate(self, query: str, params: tuple, keys: List[KeysetKey], size: int = 40) -> Dict:
+        """Async version of keyset_paginate_query, run on the database executor"""
+        return await self.db.run_sync(self.keyset_paginate_query, query, params, keys, size)
+    
+    def build_fts_query(self, search_term: str) -> Optional[str]:
+        """Turn a search term into an FTS5 phrase over normalized text.
+        
+        Returns None if the term is too short or SQLite has no trigram FTS5; callers then
+        fall back to LIKE searches on normalized text.
+        """
+        if not self.db.fts_available:
+            return None
+        normalized_search = arabic_processor.prepare_search_term(search_term) if search_term else ""
+        if len(normalized_search) < FTS_MIN_TERM_LENGTH:
+            return None
+        # Quote as a single phrase so FTS5 operators in user input are taken literally
+        return '"' + normalized_search.replace('"', '""') + '"'
+    
+    def build_case_match_query(self, fts_query: str, include_notes: bool = False) -> Tuple[str, List[str]]:
+        """Build a subquery of (case_id, rank) for cases matching an FTS5 query.
+        
+        rank is the FTS5 rank column, bm25 by default (lower is better). With include_notes, cases whose notes or
+        session notes match are included with their best score.
+        """
+        parts = ["SELECT rowid AS case_id, rank FROM cases_fts WHERE cases_fts MATCH ?"]
+        if include_notes:
+            parts.append(
+                "SELECT cn.case_id, case_notes_fts.rank FROM case_notes_fts "
+                "JOIN case_notes cn ON cn.id = case_notes_fts.rowid WHERE case_notes_fts MATCH ?"
+            )
+            parts.append(
+                "SELECT cs.case_id, case_sessions_fts.rank FROM case_sessions_fts "
+                "JOIN case_sessions cs ON cs.id = case_sessions_fts.rowid WHERE case_sessions_fts MATCH ?"
+            )
+        query = f"SELECT case_id, MIN(rank) AS rank FROM ({' UNION ALL '.join(parts)}) GROUP BY case_id"
+        return query, [fts_query] * len(parts)
+    
+    def build_normalized_search_conditions(self, search_term: str, norm_fields: List[str],
+                                           match: str = "contains") -> Tuple[str, List[str]]:
+        """Build SQL search conditions against pre-normalized *_norm shadow columns.
+        
+        The columns already hold ArabicTextProcessor.normalize_text output (maintained by
+        triggers), so only the search term needs normalizing. "exact" and "prefix" matches
+        are written as equality/range comparisons so they can seek the *_norm indexes;
+        "contains" uses LIKE '%term%'.
+        """
+        normalized_search = arabic_processor.prepare_search_term(search_term) if search_term else ""
+        if not normalized_search or not norm_fields:
+            return "", []
+        
+        if match == "exact":
+            conditions = [f"{field} = ?" for field in norm_fields]
+            params = [normalized_search] * len(norm_fields)
+        elif match == "prefix":
+            conditions = [f"({field} >= ? AND {field} < ?)" for field in norm_fields]
+            params = [normalized_search, normalized_search + "\U0010ffff"] * len(norm_fields)
+        else:
+            conditions = [f"{field} LIKE ?" for field in norm_fields]
+            params = [f"%{normalized_search}%"] * len(norm_fields)
+        return f"({' OR '.join(conditions)})", params
+    
+    def build_search_conditions(self, search_term: str, fields: List[str]) -> Tuple[str, List[str]]:
+        """Build SQL search conditions for Arabic text on columns without a *_norm shadow column.
+        
+        Each field is normalized in SQL by arabic_normalize(), the same
+        ArabicTextProcessor.normalize_text registered on every connection, so the
+        database side and the search term are folded by one normalizer.
+        """
+        if not search_term or not fields:
+            return "", []
+        
+        normalized_search = arabic_processor.prepare_search_term(search_term)
+        conditions = [f"arabic_normalize({field}) LIKE ?" for field in fields]
+        params = [f"%{normalized_search}%"] * len(fields)
+        return f"({' OR '.join(conditions)})", params
 
 # Global database utilities instance
 db_utils = DatabaseUtils()
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, List, Optional, Sequence
+
+# Optional import - PDF export reports itself unavailable without reportlab
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, LongTable, TableStyle, Paragraph, Spacer
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+from config.settings import settings
+
+ROWS_PER_TABLE = 250        # Rows per table flowable; small tables keep page splitting linear
+MAX_CELL_CHARS = 30         # Longer values are truncated for display
+
+TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+] if PDF_AVAILABLE else []
+
+def _cell(value: Any) -> str:
+    text = str(value)
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS - 3] + "..."
+    return text
+
+def render_table_pdf(headers: Sequence[str], rows: List[tuple], data_type: str,
+                     output_dir: Optional[str] = None) -> str:
+    """Render rows as a landscape A4 table report and return the path of the written PDF.
+
+    Runs in a worker process. The rows are laid out as a sequence of LongTables of
+    ROWS_PER_TABLE rows sharing one set of column widths and a repeated header row,
+    instead of one table whose every page split re-measures all remaining rows.
+    """
+    fd, path = tempfile.mkstemp(prefix=f"{data_type}_export_", suffix=".pdf", dir=output_dir)
+    os.close(fd)
+    try:
+        doc = SimpleDocTemplate(path, pagesize=landscape(A4))
+
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        )
+
+        elements = [
+            Paragraph(f"{data_type.title()} Export Report", title_style),
+            Spacer(1, 20),
+            Paragraph(
+                f"Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>Total Records: {len(rows)}",
+                styles['Normal']
+            ),
+            Spacer(1, 20)
+        ]
+
+        header_row = [str(header) for header in headers]
+
+        # Widths must be shared by every table; size columns by their longest text in the first rows
+        sample = [[_cell(value) for value in row] for row in rows[:ROWS_PER_TABLE]]
+        lengths = [
+            max([len(header)] + [len(row[col]) for row in sample]) + 2
+            for col, header in enumerate(header_row)
+        ]
+        col_widths = [doc.width * length / sum(lengths) for length in lengths]
+
+        for start in range(0, len(rows), ROWS_PER_TABLE):
+            body = sample if start == 0 else [
+                [_cell(value) for value in row] for row in rows[start:start + ROWS_PER_TABLE]
+            ]
+            table = LongTable([header_row] + body, colWidths=col_widths, repeatRows=1)
+            table.setStyle(TableStyle(TABLE_STYLE))
+            elements.append(table)
+
+        doc.build(elements)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+class PdfRenderer:
+    """Runs PDF layout in a pool of worker processes.
+
+    reportlab layout is pure-Python CPU work that would hold the GIL for the whole API;
+    in separate processes it only costs the calling thread a wait. Workers are spawned
+    rather than forked because the server process is multi-threaded.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+            return self._executor
+
+    def render(self, headers: Sequence[str], rows: List[tuple], data_type: str) -> str:
+        """Render a table report in a worker process and return the temporary PDF's path"""
+        executor = self._get_executor()
+        try:
+            return executor.submit(render_table_pdf, list(headers), rows, data_type).result()
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    async def render_async(self, headers: Sequence[str], rows: List[tuple], data_type: str) -> str:
+        """Like render, but awaits the worker instead of blocking a thread while it lays out"""
+        executor = self._get_executor()
+        try:
+            return await asyncio.wrap_future(executor.submit(render_table_pdf, list(headers), rows, data_type))
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Global PDF renderer
+pdf_renderer = PdfRenderer(settings.pdf_render_workers)
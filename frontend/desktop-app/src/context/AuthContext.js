@@ -1,6 +1,7 @@
 // AuthContext.js - Based on backend auth endpoints from api-helper.js
 import React, { createContext, useContext, useState, useEffect } from 'react';
 import { toast } from 'react-toastify';
+import { saveAuthTokens, clearAuthTokens, hasValidSession } from '../services/api';
 
 const AuthContext = createContext();
 
@@ -29,15 +30,14 @@ export const AuthProvider = ({ children }) => {
     try {
       const savedToken = localStorage.getItem('access_token');
       const savedUser = localStorage.getItem('user_data');
-      const expiresAt = localStorage.getItem('token_expires_at');
 
-      if (savedToken && savedUser && expiresAt) {
-        // Check if token is still valid
-        if (Date.now() < parseInt(expiresAt)) {
+      if (savedToken && savedUser) {
+        // An expired access token is renewed by apiService while the refresh token is valid
+        if (hasValidSession()) {
           setToken(savedToken);
           setUser(JSON.parse(savedUser));
         } else {
-          // Token expired, clear data
+          // Session expired, clear data
           clearAuthData();
         }
       }
@@ -77,11 +77,7 @@ export const AuthProvider = ({ children }) => {
       const data = await response.json();
       
       // Save auth data - matching LoginResponse model
-      const expiresAt = Date.now() + (data.expires_in * 1000);
-      
-      localStorage.setItem('access_token', data.access_token);
-      localStorage.setItem('user_data', JSON.stringify(data.user));
-      localStorage.setItem('token_expires_at', expiresAt.toString());
+      saveAuthTokens(data);
 
       setToken(data.access_token);
       setUser(data.user);
@@ -101,14 +97,18 @@ export const AuthProvider = ({ children }) => {
   // Logout function - matches POST /auth/logout endpoint
   const logout = async () => {
     try {
-      // Call backend logout endpoint if token exists
-      if (token) {
+      // Call backend logout endpoint if token exists; apiService may have renewed the
+      // tokens since login, so read the current ones from storage
+      const currentToken = localStorage.getItem('access_token');
+      const refreshToken = localStorage.getItem('refresh_token');
+      if (currentToken) {
         await fetch(`${API_BASE_URL}/auth/logout`, {
           method: 'POST',
           headers: {
-            'Authorization': `Bearer ${token}`,
+            'Authorization': `Bearer ${currentToken}`,
             'Content-Type': 'application/json',
-          }
+          },
+          body: refreshToken ? JSON.stringify({ refresh_token: refreshToken }) : undefined
         }).catch(() => {
           // Ignore network errors on logout
         });
@@ -123,18 +123,17 @@ export const AuthProvider = ({ children }) => {
   };
 
   const clearAuthData = () => {
-    localStorage.removeItem('access_token');
-    localStorage.removeItem('user_data');
-    localStorage.removeItem('token_expires_at');
+    clearAuthTokens();
     setToken(null);
     setUser(null);
   };
 
   // Get auth headers for API requests
   const getAuthHeaders = () => {
-    if (!token) return {};
+    const currentToken = localStorage.getItem('access_token') || token;
+    if (!currentToken) return {};
     return {
-      'Authorization': `Bearer ${token}`,
+      'Authorization': `Bearer ${currentToken}`,
       'Content-Type': 'application/json'
     };
   };
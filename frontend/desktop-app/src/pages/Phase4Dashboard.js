@@ -38,11 +38,16 @@ const Phase4Dashboard = () => {
   const handleCreateBackup = async () => {
     try {
       setLoading(true);
-      await apiService.createDatabaseBackup();
+      // The backup runs as a background job; wait until it has finished
+      const { job } = await apiService.createDatabaseBackup();
+      const finished = await apiService.waitForJob(job, (jobId) => apiService.getBackupJob(jobId));
+      if (finished.status !== 'completed') {
+        throw new Error(finished.error || 'فشل في إنشاء النسخة الاحتياطية');
+      }
       toast.success('تم إنشاء النسخة الاحتياطية بنجاح');
       loadSystemData(); // Refresh data
     } catch (error) {
-      toast.error('فشل في إنشاء النسخة الاحتياطية');
+      toast.error(error.message || 'فشل في إنشاء النسخة الاحتياطية');
     } finally {
       setLoading(false);
     }
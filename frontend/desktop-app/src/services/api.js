@@ -25,10 +25,49 @@ if (typeof window !== 'undefined') {
   configInitPromise = initializeApiConfig();
 }
 
+// Seconds before expiry at which the access token is renewed ahead of a request
+const TOKEN_RENEW_MARGIN_SECONDS = 30;
+
+// Interval between status checks of a background job (exports, backups)
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// Store tokens from a LoginResponse (POST /auth/login or /auth/refresh)
+export const saveAuthTokens = (data) => {
+  localStorage.setItem('access_token', data.access_token);
+  localStorage.setItem('token_expires_at', (Date.now() + data.expires_in * 1000).toString());
+  if (data.refresh_token) {
+    localStorage.setItem('refresh_token', data.refresh_token);
+    localStorage.setItem('refresh_expires_at', (Date.now() + data.refresh_expires_in * 1000).toString());
+  }
+  if (data.user) {
+    localStorage.setItem('user_data', JSON.stringify(data.user));
+  }
+};
+
+export const clearAuthTokens = () => {
+  localStorage.removeItem('access_token');
+  localStorage.removeItem('user_data');
+  localStorage.removeItem('token_expires_at');
+  localStorage.removeItem('refresh_token');
+  localStorage.removeItem('refresh_expires_at');
+};
+
+// True while the session can continue, with a valid access token or by refreshing it
+export const hasValidSession = () => {
+  const now = Date.now();
+  const accessExpiresAt = parseInt(localStorage.getItem('token_expires_at') || '0', 10);
+  const refreshExpiresAt = parseInt(localStorage.getItem('refresh_expires_at') || '0', 10);
+  return (!!localStorage.getItem('access_token') && now < accessExpiresAt)
+    || (!!localStorage.getItem('refresh_token') && now < refreshExpiresAt);
+};
+
 class ApiService {
   constructor() {
     this.baseURL = API_BASE_URL;
     this.configInitialized = false;
+    // Refresh in flight; concurrent requests wait for it instead of spending the
+    // single-use refresh token again
+    this.refreshPromise = null;
     this.initializeConfig();
   }
 
@@ -54,10 +93,59 @@ class ApiService {
     };
   }
 
+  // Exchange the stored refresh token for new tokens - POST /auth/refresh
+  async refreshAccessToken() {
+    if (!this.refreshPromise) {
+      this.refreshPromise = (async () => {
+        const refreshToken = localStorage.getItem('refresh_token');
+        if (!refreshToken) {
+          return false;
+        }
+        try {
+          const response = await fetch(`${this.baseURL}/auth/refresh`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh_token: refreshToken })
+          });
+          if (!response.ok) {
+            return false;
+          }
+          saveAuthTokens(await response.json());
+          return true;
+        } catch (error) {
+          console.error('Token refresh failed:', error);
+          return false;
+        }
+      })().finally(() => {
+        this.refreshPromise = null;
+      });
+    }
+    return this.refreshPromise;
+  }
+
+  // Renew an access token that is about to expire before sending a request with it
+  async ensureFreshToken() {
+    const expiresAt = parseInt(localStorage.getItem('token_expires_at') || '0', 10);
+    if (localStorage.getItem('refresh_token') && Date.now() > expiresAt - TOKEN_RENEW_MARGIN_SECONDS * 1000) {
+      await this.refreshAccessToken();
+    }
+  }
+
+  // Poll a background job until it is neither queued nor running
+  async waitForJob(job, fetchJob) {
+    let current = job;
+    while (current.status === 'queued' || current.status === 'running') {
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+      current = await fetchJob(current.id);
+    }
+    return current;
+  }
+
   // Generic request method with error handling
-  async request(endpoint, options = {}) {
+  async request(endpoint, options = {}, retried = false) {
     // Ensure configuration is loaded
     await this.initializeConfig();
+    await this.ensureFreshToken();
     const url = `${this.baseURL}${endpoint}`;
     
     const config = {
@@ -68,12 +156,12 @@ class ApiService {
     try {
       const response = await fetch(url, config);
       
-      // Handle auth errors - based on testing insights
+      // Handle auth errors: renew the access token once, then give up on the session
       if (response.status === 401) {
-        // Token expired, clear auth data and redirect
-        localStorage.removeItem('access_token');
-        localStorage.removeItem('user_data');
-        localStorage.removeItem('token_expires_at');
+        if (!retried && await this.refreshAccessToken()) {
+          return this.request(endpoint, options, true);
+        }
+        clearAuthTokens();
         throw new Error('انتهت جلسة العمل، يرجى تسجيل الدخول مرة أخرى');
       }
       
@@ -338,6 +426,14 @@ class ApiService {
     return this.post('/backup/create');
   }
 
+  async getBackupJob(jobId) {
+    return this.get(`/backup/jobs/${jobId}`);
+  }
+
+  async pruneBackups(dryRun = false) {
+    return this.post(`/backup/prune?dry_run=${dryRun}`);
+  }
+
   async listBackups() {
     return this.get('/backup/list');
   }
@@ -347,6 +443,7 @@ class ApiService {
   }
 
   async downloadBackup(backupId) {
+    await this.ensureFreshToken();
     const response = await fetch(`${this.baseURL}/backup/download/${backupId}`, {
       headers: this.getAuthHeaders()
     });
@@ -364,28 +461,50 @@ class ApiService {
   // Export Endpoints
   async exportCases(format, filters = {}) {
     const params = { format, ...filters };
+    await this.ensureFreshToken();
     const response = await fetch(`${this.baseURL}/export/cases?${new URLSearchParams(params)}`, {
       headers: this.getAuthHeaders()
     });
-    return response;
+    return this.followExportJob(response);
   }
 
   async exportSessions(format, filters = {}) {
     const params = { format, ...filters };
+    await this.ensureFreshToken();
     const response = await fetch(`${this.baseURL}/export/sessions?${new URLSearchParams(params)}`, {
       headers: this.getAuthHeaders()
     });
-    return response;
+    return this.followExportJob(response);
   }
 
   async exportSummaryReport(format, filters = {}) {
     const params = { format, ...filters };
+    await this.ensureFreshToken();
     const response = await fetch(`${this.baseURL}/export/summary?${new URLSearchParams(params)}`, {
       headers: this.getAuthHeaders()
     });
     return response;
   }
 
+  async getExportJob(jobId) {
+    return this.get(`/export/jobs/${jobId}`);
+  }
+
+  // Large PDF exports answer 202 with a background job; wait for it and return its download
+  async followExportJob(response) {
+    if (response.status !== 202) {
+      return response;
+    }
+    const job = await this.waitForJob(await response.json(), (jobId) => this.getExportJob(jobId));
+    if (job.status !== 'completed') {
+      throw new Error(job.error || 'فشل في التصدير');
+    }
+    await this.ensureFreshToken();
+    return fetch(`${this.baseURL}/export/jobs/${job.id}/download`, {
+      headers: this.getAuthHeaders()
+    });
+  }
+
   async getSupportedExportFormats() {
     return this.get('/export/formats');
   }
@@ -155,6 +155,10 @@ const AuthUtils = {
     localStorage.setItem('access_token', loginResponse.access_token);
     localStorage.setItem('user_data', JSON.stringify(loginResponse.user));
     localStorage.setItem('token_expires_at', Date.now() + (loginResponse.expires_in * 1000));
+    if (loginResponse.refresh_token) {
+      localStorage.setItem('refresh_token', loginResponse.refresh_token);
+      localStorage.setItem('refresh_expires_at', Date.now() + (loginResponse.refresh_expires_in * 1000));
+    }
   },
   
   /**
@@ -164,6 +168,8 @@ const AuthUtils = {
     localStorage.removeItem('access_token');
     localStorage.removeItem('user_data');
     localStorage.removeItem('token_expires_at');
+    localStorage.removeItem('refresh_token');
+    localStorage.removeItem('refresh_expires_at');
   }
 };
 